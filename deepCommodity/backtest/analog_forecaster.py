@@ -0,0 +1,63 @@
+"""Adapter: historical-analog index -> backtest forecaster callable.
+
+Daily bars only (the index is built over the daily contextual dataset). On each
+window, builds the last `price_seq` price-feature rows per symbol and the macro
+window as of the last bar's date, then asks the index for neighbours whose
+outcome was realized on or before that date (each window's `realized` bar date
+is stored in the index), so the backtest never sees the future through its
+analogs.
+
+Bar carries close and volume only, so the index must be built on those
+channels (tools/build_analog_index.py --close-volume-only); hl_spread and
+oc_spread would be constant 0 here and match the wrong neighbours.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from deepCommodity.backtest.engine import Bar, Forecast
+
+
+@dataclass
+class AnalogForecaster:
+    analog: Any                          # deepCommodity.model.analog.AnalogModel
+    macro: pd.DataFrame                  # daily macro panel (MACRO_FEATURE_COLS), date index
+    k: int = 32
+    min_confidence: float = 0.55
+
+    def __post_init__(self):
+        from deepCommodity.model.analog import CLOSE_VOLUME, PRICE_FEATS
+        if not set(self.analog.meta.get("price_feats", PRICE_FEATS)) <= set(CLOSE_VOLUME):
+            raise ValueError("backtest bars have no OHLC; build the analog index with "
+                             "--close-volume-only")
+
+    def __call__(self, window: dict[str, list[Bar]]) -> list[Forecast]:
+        from deepCommodity.model.price_transformer import CLASSES, forecast_codes, make_features
+        price_seq, macro_seq = self.analog.meta["price_shape"][0], self.analog.meta["macro_shape"][0]
+        syms, px, mx, max_dates = [], [], [], []
+        for sym, bars in window.items():
+            if len(bars) < price_seq + 1:
+                continue
+            recent = bars[-(price_seq + 1):]     # +1 for pct_change drop
+            closes = [b.close for b in recent]   # OHLCV not on Bar; fallback to close
+            df = pd.DataFrame({"open": closes, "high": closes, "low": closes, "close": closes,
+                               "volume": [b.volume for b in recent]})
+            day = pd.Timestamp(bars[-1].ts.replace(tzinfo=None)).normalize()
+            mwin = self.macro.loc[:day].tail(macro_seq)
+            if len(mwin) < macro_seq:
+                continue
+            syms.append(sym)
+            px.append(make_features(df)[-price_seq:])
+            mx.append(mwin.to_numpy())
+            max_dates.append(day.toordinal())
+        if not syms:
+            return []
+        out = self.analog.predict(np.asarray(px, np.float32), np.asarray(mx, np.float32),
+                                  k=self.k, max_date=np.asarray(max_dates))
+        codes, confs = forecast_codes(out["weekly"], self.min_confidence)
+        return [Forecast(symbol=sym, direction=CLASSES[c], confidence=float(conf))
+                for sym, c, conf in zip(syms, codes, confs)]
@@ -0,0 +1,310 @@
+"""Historical-analog forecaster: k nearest past windows -> their realized outcomes.
+
+Every (price window, macro window) sample in data/contextual/dataset.npz is
+embedded once and put in an IVF index. A forecast embeds the current windows,
+retrieves the k most similar past ones and reads the forecast off what
+actually followed them:
+
+    proba      distance-weighted vote of the neighbours' y_weekly / y_daily
+    expected   distance-weighted mean of their r_weekly / r_daily
+
+Embeddings (`embedding=` at build time):
+    raw        contextual-normalized windows, flattened (price and macro blocks
+               weighted equally) and Gaussian random-projected to `dim` dims
+    encoder    [price_enc(px), encode_macro(mx)] from a trained contextual
+               checkpoint (needs torch; the index remembers the checkpoint hash)
+
+`price_feats` picks the make_features channels the raw embedding sees. The
+backtest's Bar carries close and volume only, so its hl_spread / oc_spread
+would always be 0; an index for backtests is built on CLOSE_VOLUME (pct_close,
+log_vol_chg) so queries and stored windows share a distribution.
+
+The index is pure NumPy. A k-means coarse quantizer splits the vectors into
+~sqrt(N) lists stored contiguously. A query scans the `nprobe` nearest lists
+exactly. It is saved as a directory of .npy files plus meta.json and loaded
+memory-mapped, so a multi-million-window index opens instantly and a query
+touches only the lists it probes (~1 ms).
+
+`max_date` (date ordinal) restricts neighbours to windows whose outcome was
+realized by then (the dataset's `realized` date, the bar `weekly_h` bars after
+the window), for backtests; lists are probed further until k qualify.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from deepCommodity.model.contextual_transformer import HORIZONS, apply_norm, fit_norm
+
+INDEX_META = "meta.json"
+PRICE_FEATS = (0, 1, 2, 3)        # every make_features channel
+CLOSE_VOLUME = (0, 1)             # pct_close, log_vol_chg
+_ARRAYS = ("centroids", "offsets", "vectors", "rows", "realized", "asset_id",
+           "y_weekly", "y_daily", "r_weekly", "r_daily")
+
+
+# ---- IVF index -------------------------------------------------------------
+
+def _nearest(x: np.ndarray, c: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    """Index of the nearest row of `c` for each row of `x` (L2), chunked."""
+    c2 = (c * c).sum(1)
+    out = np.empty(len(x), dtype=np.int64)
+    for i in range(0, len(x), chunk):
+        out[i:i + chunk] = (c2 - 2.0 * x[i:i + chunk] @ c.T).argmin(1)
+    return out
+
+
+def kmeans(x: np.ndarray, k: int, iters: int = 12, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means; empty clusters are re-seeded from random points."""
+    rng = np.random.default_rng(seed)
+    c = x[rng.choice(len(x), k, replace=False)].astype(np.float32)
+    for _ in range(iters):
+        a = _nearest(x, c)
+        order = np.argsort(a, kind="stable")
+        counts = np.bincount(a, minlength=k)
+        nonempty = counts > 0
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sums = np.add.reduceat(x[order], starts[nonempty], axis=0)
+        c[nonempty] = sums / counts[nonempty, None]
+        c[~nonempty] = x[rng.choice(len(x), int((~nonempty).sum()))]
+    return c
+
+
+@dataclass
+class IVFIndex:
+    centroids: np.ndarray      # (C, d)
+    offsets: np.ndarray        # (C + 1,) list i = rows offsets[i]:offsets[i+1]
+    vectors: np.ndarray        # (N, d) float32, grouped by list
+    dates: np.ndarray          # (N,) date ordinal `max_date` filters on
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, dates: np.ndarray, n_lists: int | None = None,
+              train_size: int = 64, seed: int = 0) -> tuple["IVFIndex", np.ndarray]:
+        """(index, order): vectors[order] is the index's storage order.
+
+        k-means trains on at most `train_size` points per list.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(n, min(n, n_lists * train_size), replace=False)]
+        centroids = kmeans(sample, n_lists, seed=seed) if n_lists > 1 else vectors.mean(0, keepdims=True)
+        assign = _nearest(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))])
+        return cls(centroids, offsets, vectors[order], np.asarray(dates)[order]), order
+
+    def search(self, q: np.ndarray, k: int = 32, nprobe: int = 8,
+               max_date=None) -> tuple[np.ndarray, np.ndarray]:
+        """(positions (m, k), squared distances (m, k)) of the nearest stored
+        vectors; -1 / inf pad rows with fewer than k candidates."""
+        q = np.atleast_2d(np.asarray(q, dtype=np.float32))
+        n_lists = len(self.centroids)
+        max_dates = np.broadcast_to(np.asarray(max_date if max_date is not None else np.iinfo(np.int64).max),
+                                    (len(q),))
+        coarse = ((self.centroids * self.centroids).sum(1) - 2.0 * q @ self.centroids.T).argsort(1)
+        idx = np.full((len(q), k), -1, dtype=np.int64)
+        dist = np.full((len(q), k), np.inf, dtype=np.float32)
+        for i in range(len(q)):
+            qq = float(q[i] @ q[i])
+            pos, ds, found, probed = [], [], 0, 0
+            probe = min(nprobe, n_lists)
+            while True:
+                # lists are contiguous slices: no gather, and widening only scans new lists
+                for l in coarse[i, probed:probe]:
+                    a, b = self.offsets[l], self.offsets[l + 1]
+                    v = self.vectors[a:b]
+                    d = np.einsum("ij,ij->i", v, v) - 2.0 * (v @ q[i]) + qq
+                    d[self.dates[a:b] > max_dates[i]] = np.inf
+                    pos.append(np.arange(a, b)); ds.append(d)
+                    found += int(np.isfinite(d).sum())
+                probed = probe
+                if found >= k or probe == n_lists:
+                    break
+                probe = min(2 * probe, n_lists)
+            cand, d = np.concatenate(pos), np.concatenate(ds)
+            top = np.argpartition(d, k - 1)[:k] if len(d) > k else np.arange(len(d))
+            top = top[np.argsort(d[top])]
+            top = top[np.isfinite(d[top])]
+            idx[i, :len(top)], dist[i, :len(top)] = cand[top], np.maximum(d[top], 0.0)
+        return idx, dist
+
+
+# ---- embeddings ------------------------------------------------------------
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class RawEmbedder:
+    """Normalized, flattened windows -> Gaussian random projection (JL)."""
+
+    kind = "raw"
+
+    def __init__(self, norm: dict, proj: np.ndarray):
+        self.norm, self.proj = norm, proj
+
+    @classmethod
+    def fit(cls, price_X: np.ndarray, macro_X: np.ndarray, dim: int = 64, seed: int = 0):
+        norm = fit_norm(price_X, macro_X)
+        d_in = price_X[0].size + macro_X[0].size
+        proj = np.random.default_rng(seed).standard_normal((d_in, dim)).astype(np.float32)
+        return cls(norm, proj / np.sqrt(dim))
+
+    def __call__(self, price_X: np.ndarray, macro_X: np.ndarray) -> np.ndarray:
+        px, mx = apply_norm(price_X, macro_X, self.norm)
+        px = px.reshape(len(px), -1) / np.sqrt(px[0].size)
+        mx = mx.reshape(len(mx), -1) / np.sqrt(mx[0].size)
+        return np.concatenate([px, mx], axis=1) @ self.proj
+
+    def state(self) -> dict:
+        return {"norm": self.norm}
+
+
+class EncoderEmbedder:
+    """Last-step price + macro encodings of a trained contextual model."""
+
+    kind = "encoder"
+
+    def __init__(self, ckpt_path: Path):
+        import torch
+        from deepCommodity.model.contextual_transformer import ContextualConfig, build_model
+        self.ckpt_path = Path(ckpt_path)
+        self.ckpt_sha = _sha256(self.ckpt_path)
+        ck = torch.load(self.ckpt_path, map_location="cpu", weights_only=False)
+        self.model = build_model(ContextualConfig(**ck["config"]))
+        self.model.load_state_dict(ck["state_dict"])
+        self.model.eval()
+        self.norm = ck["norm"]
+
+    def __call__(self, price_X: np.ndarray, macro_X: np.ndarray, batch_size: int = 1024) -> np.ndarray:
+        import torch
+        px, mx = apply_norm(price_X, macro_X, self.norm)
+        out = []
+        with torch.no_grad():
+            for i in range(0, len(px), batch_size):
+                p = self.model.price_enc(torch.from_numpy(px[i:i + batch_size]))
+                m = self.model.encode_macro(torch.from_numpy(mx[i:i + batch_size]))
+                out.append(torch.cat([p, m], -1).numpy())
+        return np.concatenate(out) if out else np.empty((0, 2 * self.model.c.d_model), np.float32)
+
+    def state(self) -> dict:
+        return {"ckpt": str(self.ckpt_path), "ckpt_sha256": self.ckpt_sha}
+
+
+def _embed_chunked(embed, price_X, macro_X, chunk: int = 65536) -> np.ndarray:
+    return np.concatenate([embed(price_X[i:i + chunk], macro_X[i:i + chunk])
+                           for i in range(0, len(price_X), chunk)]).astype(np.float32)
+
+
+# ---- forecaster ------------------------------------------------------------
+
+class AnalogModel:
+    """An IVF index over embedded dataset windows plus their outcomes."""
+
+    def __init__(self, index: IVFIndex, embed, outcomes: dict[str, np.ndarray], meta: dict):
+        self.index, self.embed, self.outcomes, self.meta = index, embed, outcomes, meta
+
+    def neighbours(self, price_X: np.ndarray, macro_X: np.ndarray, k: int = 32,
+                   nprobe: int = 8, max_date=None) -> tuple[np.ndarray, np.ndarray]:
+        feats = list(self.meta.get("price_feats", PRICE_FEATS))
+        q = self.embed(np.asarray(price_X, np.float32)[..., feats], np.asarray(macro_X, np.float32))
+        return self.index.search(q, k=k, nprobe=nprobe, max_date=max_date)
+
+    def predict(self, price_X: np.ndarray, macro_X: np.ndarray, k: int = 32,
+                nprobe: int = 8, max_date=None) -> dict[str, np.ndarray]:
+        """{horizon: (N, 3) proba, "r_<horizon>": (N,) expected return, "n": (N,)}.
+
+        Inputs are raw (un-normalized) windows, like dataset.npz. Rows with no
+        qualifying neighbour get a uniform proba and 0 expected return.
+        """
+        idx, dist = self.neighbours(price_X, macro_X, k, nprobe, max_date)
+        valid = idx >= 0
+        # inverse-distance weights, scaled by the median so they don't blow up on exact matches
+        scale = np.median(dist[valid]) if valid.any() else 1.0
+        w = np.where(valid, 1.0 / (1.0 + dist / (scale + 1e-12)), 0.0)
+        total = w.sum(1)
+        safe = np.where(valid, idx, 0)
+        out: dict[str, np.ndarray] = {"n": valid.sum(1)}
+        for h in HORIZONS:
+            y = self.outcomes[f"y_{h}"][safe]
+            proba = np.stack([(w * (y == c)).sum(1) for c in range(3)], axis=1)
+            out[h] = np.where(total[:, None] > 0, proba / np.maximum(total, 1e-12)[:, None], 1 / 3)
+            r = (w * self.outcomes[f"r_{h}"][safe]).sum(1)
+            out[f"r_{h}"] = np.where(total > 0, r / np.maximum(total, 1e-12), 0.0)
+        return out
+
+
+def build_analog_index(dataset_path: Path, out_dir: Path, embedding: str = "raw",
+                       ckpt: Path | None = None, dim: int = 64, n_lists: int | None = None,
+                       seed: int = 0, price_feats: tuple[int, ...] = PRICE_FEATS) -> dict:
+    """Embed every dataset window, build the IVF index and save it to `out_dir`.
+
+    Queries pass full (T, 4) price windows; only `price_feats` are embedded.
+    """
+    d = np.load(dataset_path)
+    if "realized" not in d.files:
+        raise ValueError(f"{dataset_path} has no realization dates; rebuild it with "
+                         "tools/build_contextual_dataset.py")
+    price_X, macro_X = d["price_X"][..., list(price_feats)], d["macro_X"]
+    if embedding == "raw":
+        embed = RawEmbedder.fit(price_X, macro_X, dim=dim, seed=seed)
+    elif embedding == "encoder":
+        if ckpt is None:
+            raise ValueError("embedding='encoder' needs the contextual checkpoint")
+        if tuple(price_feats) != PRICE_FEATS:
+            raise ValueError("embedding='encoder' needs every price feature")
+        embed = EncoderEmbedder(ckpt)
+    else:
+        raise ValueError(f"unknown embedding: {embedding!r}")
+    vectors = _embed_chunked(embed, price_X, macro_X)
+    index, order = IVFIndex.build(vectors, d["realized"], n_lists=n_lists, seed=seed)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    arrays = {"centroids": index.centroids, "offsets": index.offsets, "vectors": index.vectors,
+              "rows": order, "realized": index.dates}
+    for key in ("asset_id", "y_weekly", "y_daily", "r_weekly", "r_daily"):
+        arrays[key] = d[key][order]
+    for key, a in arrays.items():
+        np.save(out_dir / f"{key}.npy", a)
+    if embedding == "raw":
+        np.save(out_dir / "proj.npy", embed.proj)
+    ds_meta_path = Path(dataset_path).with_suffix(".meta.json")
+    ds_meta = json.loads(ds_meta_path.read_text()) if ds_meta_path.exists() else {}
+    meta = {"embedding": embedding, **embed.state(), "dim": int(vectors.shape[1]),
+            "weekly_h": ds_meta.get("weekly_h", 10), "daily_h": ds_meta.get("daily_h", 2),
+            "n": int(len(vectors)), "n_lists": int(len(index.centroids)),
+            "dataset": str(dataset_path), "price_feats": list(price_feats),
+            "price_shape": list(d["price_X"].shape[1:]),
+            "macro_shape": list(macro_X.shape[1:])}
+    (out_dir / INDEX_META).write_text(json.dumps(meta, indent=2))
+    return meta
+
+
+def load_analog(index_dir: Path, mmap: bool = True) -> AnalogModel:
+    """Open a saved index; arrays are memory-mapped unless `mmap=False`."""
+    index_dir = Path(index_dir)
+    meta = json.loads((index_dir / INDEX_META).read_text())
+    if not (index_dir / "realized.npy").exists():
+        raise ValueError(f"{index_dir} predates realization dates; rebuild it")
+    mode = "r" if mmap else None
+    a = {key: np.load(index_dir / f"{key}.npy", mmap_mode=mode) for key in _ARRAYS}
+    if meta["embedding"] == "raw":
+        embed = RawEmbedder(meta["norm"], np.load(index_dir / "proj.npy"))
+    else:
+        embed = EncoderEmbedder(Path(meta["ckpt"]))
+        if embed.ckpt_sha != meta["ckpt_sha256"]:
+            raise ValueError(f"{meta['ckpt']} changed since the index was built; rebuild it")
+    index = IVFIndex(np.asarray(a["centroids"]), np.asarray(a["offsets"]), a["vectors"], a["realized"])
+    outcomes = {key: a[key] for key in ("y_weekly", "y_daily", "r_weekly", "r_daily", "asset_id", "rows")}
+    return AnalogModel(index, embed, outcomes, meta)
@@ -22,7 +22,17 @@ if TYPE_CHECKING:
     import torch  # noqa: F401
 
 HORIZONS = ("weekly", "daily")
-CLASSES = ["short", "flat", "long"]   # index 0,1,2 == down,flat,up
+
+# Macro channel layout (order matters); tools/fetch_macro_features.py writes these columns.
+MACRO_FEATURE_COLS = [
+    "m2_yoy",          # M2 year-over-year growth
+    "netliq_z",        # net liquidity level, trailing z-score
+    "netliq_chg4w",    # net liquidity 4-week change (normalized)
+    "dxy_z",           # broad USD index level, trailing z-score
+    "dxy_chg4w",       # USD 4-week change
+    "totalcap_chg4w",  # total crypto market cap 4-week change
+    "btc_dom",         # BTC dominance in [0,1]
+]
 
 
 @dataclass
@@ -83,15 +93,25 @@ def build_model(cfg: ContextualConfig | None = None):
             )
             self.heads = nn.ModuleDict({h: nn.Linear(c.d_model, c.n_classes) for h in HORIZONS})
 
-        def forward(self, price_x, macro_x, asset_id):
+        def encode_macro(self, macro_x):
+            """(B, macro_seq, macro_feats) -> (B, d_model). Shared by every asset on a date."""
+            return self.macro_enc(macro_x)
+
+        def forward_encoded(self, price_x, macro_h, asset_id):
+            """forward() with a precomputed encode_macro() output; a (1, d_model)
+            macro_h broadcasts over the price batch."""
             p = self.price_enc(price_x) + self.asset_emb(asset_id)
-            if macro_x is None:                       # graceful: no macro -> zeros
+            if macro_h is None:                       # graceful: no macro -> zeros
                 m = torch.zeros_like(p)
             else:
-                m = self.macro_enc(macro_x)
+                m = macro_h.expand_as(p)
             z = self.trunk(torch.cat([p, m], dim=-1))
             return {h: self.heads[h](z) for h in HORIZONS}
 
+        def forward(self, price_x, macro_x, asset_id):
+            macro_h = None if macro_x is None else self.encode_macro(macro_x)
+            return self.forward_encoded(price_x, macro_h, asset_id)
+
     return Contextual(cfg)
 
 
@@ -131,13 +151,6 @@ def predict(model, price_X: np.ndarray, macro_X: np.ndarray, asset_id: np.ndarra
     return {h: (np.concatenate(v) if v else np.empty((0, 3))) for h, v in out.items()}
 
 
-def proba_to_forecast(proba: np.ndarray, min_conf: float = 0.0) -> tuple[str, float]:
-    """Single (3,) proba -> (direction, confidence) — margin over uniform, scaled to [0,1]."""
-    top = int(np.argmax(proba))
-    conf = max(0.0, min(1.0, float((proba[top] - 1 / 3) / (2 / 3))))
-    return (("flat", conf) if conf < min_conf else (CLASSES[top], conf))
-
-
 # ---- regime readout (transparent rule over the macro panel) -----------------
 
 def regime_readout(macro_row: dict) -> dict:
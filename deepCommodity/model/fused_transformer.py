@@ -17,6 +17,10 @@ where keys are any subset of {"price", "orderflow", "news"}.
 The "news" branch ingests a sentiment vector `(value, confidence)` rather
 than tokens — keeps the fused model lightweight and decouples it from the
 text backend choice in news_model.py.
+
+Checkpoint (`<SYM>.fused.pt`, see `fused_checkpoint` / `load_fused`):
+    {"config": FusedConfig, "price_config": TransformerConfig | None,
+     "orderflow_config": OrderflowConfig | None, "state_dict": fused + encoders}
 """
 from __future__ import annotations
 
@@ -48,8 +52,11 @@ def build_model(price_encoder, orderflow_encoder, cfg: FusedConfig | None = None
     """Compose the fused trunk over pre-built specialist encoders.
 
     `price_encoder` / `orderflow_encoder` are torch.nn.Modules that expose
-    `.encode(x) -> (B, T, d_model)`. Either may be None — the trunk handles
-    missing modalities by zero-vector substitution.
+    `.embed(x) -> (B, d_model)` (the last-step encoding). Either may be None;
+    the trunk handles missing modalities by zero-vector substitution.
+    forward() also takes those embeddings precomputed (`price_h` /
+    `orderflow_h`), e.g. from the standalone specialists' pass over the same
+    window, and then only runs the trunk.
     """
     torch, nn = _torch()
     cfg = cfg or FusedConfig()
@@ -81,18 +88,25 @@ def build_model(price_encoder, orderflow_encoder, cfg: FusedConfig | None = None
         def forward(self,
                     price_x: "torch.Tensor | None" = None,
                     orderflow_x: "torch.Tensor | None" = None,
-                    news_x: "torch.Tensor | None" = None) -> "torch.Tensor":
+                    news_x: "torch.Tensor | None" = None,
+                    price_h: "torch.Tensor | None" = None,
+                    orderflow_h: "torch.Tensor | None" = None) -> "torch.Tensor":
             # Determine batch size from any provided modality
-            batch = next((t.size(0) for t in (price_x, orderflow_x, news_x) if t is not None), 1)
+            batch = next((t.size(0) for t in (price_x, orderflow_x, news_x, price_h, orderflow_h)
+                          if t is not None), 1)
             device = next(self.parameters()).device
 
-            if price_x is not None and self.price is not None:
-                p = self.price.encode(price_x)[:, -1]   # (B, d_model)
+            if price_h is not None:
+                p = price_h.float()
+            elif price_x is not None and self.price is not None:
+                p = self.price.embed(price_x)           # (B, d_model)
             else:
                 p = torch.zeros(batch, cfg.price_d_model, device=device)
 
-            if orderflow_x is not None and self.orderflow is not None:
-                o = self.orderflow.encode(orderflow_x)[:, -1]
+            if orderflow_h is not None:
+                o = orderflow_h.float()
+            elif orderflow_x is not None and self.orderflow is not None:
+                o = self.orderflow.embed(orderflow_x)
             else:
                 o = torch.zeros(batch, cfg.orderflow_d_model, device=device)
 
@@ -110,6 +124,33 @@ def build_model(price_encoder, orderflow_encoder, cfg: FusedConfig | None = None
     return FusedTransformer()
 
 
+def fused_checkpoint(model, price_config=None, orderflow_config=None) -> dict:
+    """Everything `load_fused` needs, encoder weights included (torch.save it)."""
+    return {"config": dict(model.c.__dict__),
+            "price_config": dict(price_config.__dict__) if price_config else None,
+            "orderflow_config": dict(orderflow_config.__dict__) if orderflow_config else None,
+            "state_dict": model.state_dict()}
+
+
+def load_fused(ckpt: dict, assign: bool = False):
+    """Rebuild a fused model (and its specialist encoders) from `fused_checkpoint` output.
+
+    `assign=True` adopts the checkpoint tensors instead of copying them (for
+    mmap-loaded checkpoints; build under `torch.device("meta")` to skip init)."""
+    from deepCommodity.model import orderflow_transformer, price_transformer
+    price = orderflow = None
+    if ckpt.get("price_config"):
+        price = price_transformer.build_model(
+            price_transformer.TransformerConfig(**ckpt["price_config"]))
+    if ckpt.get("orderflow_config"):
+        orderflow = orderflow_transformer.build_model(
+            orderflow_transformer.OrderflowConfig(**ckpt["orderflow_config"]))
+    model = build_model(price, orderflow, FusedConfig(**ckpt["config"]))
+    model.load_state_dict(ckpt["state_dict"], assign=assign)
+    model.eval()
+    return model
+
+
 def fit_fused(model, batches, epochs: int = 10, lr: float = 3e-4, device: str | None = None):
     """Train the fused trunk (specialist encoders can be frozen via requires_grad=False).
 
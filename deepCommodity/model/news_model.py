@@ -3,20 +3,28 @@
 Three pluggable backends behind a single interface:
 
     score(text: str) -> SentimentScore(value: float in [-1, 1], confidence: float in [0, 1])
+    score_many(texts: list[str]) -> list[SentimentScore]   (one batched pass)
 
 Backends:
-    1. RuleBasedSentiment — keyword lexicon, no deps. Ships ready to run.
+    1. RuleBasedSentiment — keyword/phrase lexicon, one trie scan, no deps.
     2. SklearnSentiment   — TF-IDF + logistic regression, trains when labeled
                             news data is accumulated by the routines.
     3. HuggingFaceSentiment — wraps a finance-tuned classifier (e.g. ProsusAI/finbert).
                               Lazy-imported, opt-in.
 
 Strategy in TRADING-STRATEGY.md picks the backend via env or config.
+`get_sentiment_backend()` builds each configured backend once per process
+(an HF pipeline load is seconds) and wraps it in a content-hash LRU
+(SENTIMENT_CACHE_MAX, default 4096): the same digest scored for every symbol
+in a pass runs the model once.
 """
 from __future__ import annotations
 
+import hashlib
 import os
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Protocol
@@ -31,6 +39,7 @@ class SentimentScore:
 class SentimentBackend(Protocol):
     name: str
     def score(self, text: str) -> SentimentScore: ...
+    def score_many(self, texts: list[str]) -> list[SentimentScore]: ...
 
 
 # ---- 1. rule-based --------------------------------------------------------
@@ -47,9 +56,76 @@ BEAR_TERMS = {
 }
 INTENSIFIERS = {"sharp": 1.3, "massive": 1.5, "modest": 0.7, "slight": 0.6}
 
+_WORD = re.compile(r"[a-z][a-z']+")
+TOKENIZER_VERSION = 2      # bump on any change to _tokenize (2: hyphens split)
+
 
 def _tokenize(text: str) -> list[str]:
-    return [w.lower() for w in re.findall(r"[A-Za-z][A-Za-z'-]+", text)]
+    """Lower-cased word tokens; hyphens split, so "all-time" matches "all time"."""
+    return _WORD.findall(text.lower().replace("-", " "))
+
+
+def _compile_lexicon() -> dict:
+    """Token trie over every lexicon entry; a node's None key holds the
+    (side, weight) of the phrase that ends there."""
+    root: dict = {}
+    entries = ([(t, ("bull", 1.0)) for t in BULL_TERMS] + [(t, ("bear", 1.0)) for t in BEAR_TERMS]
+               + [(t, ("mult", m)) for t, m in INTENSIFIERS.items()])
+    for phrase, tag in entries:
+        node = root
+        for tok in _tokenize(phrase):
+            node = node.setdefault(tok, {})
+        node[None] = tag
+    return root
+
+
+_LEXICON = _compile_lexicon()
+
+
+def _lexicon_version() -> str:
+    """Digest of everything the rule-based score depends on, so cached scores
+    (tools/forecast.py) expire when the lexicon or tokenizer changes."""
+    spec = (sorted(BULL_TERMS), sorted(BEAR_TERMS), sorted(INTENSIFIERS.items()),
+            _WORD.pattern, TOKENIZER_VERSION)
+    return hashlib.blake2b(repr(spec).encode(), digest_size=8).hexdigest()
+
+
+LEXICON_VERSION = _lexicon_version()
+
+
+def _scan(tokens: list[str]) -> tuple[int, int, float]:
+    """(bull hits, bear hits, strongest intensifier) in one left-to-right pass.
+
+    At each token the trie is walked as far as it goes and the longest phrase
+    ending on the way is taken ("etf approval" over "etf"); scanning resumes
+    after it, so phrases don't double-count their words.
+    """
+    bull = bear = 0
+    mult = 1.0
+    n, end = len(tokens), 0
+    # only tokens that start some entry can start a match; most tokens don't
+    for i in [i for i, t in enumerate(tokens) if t in _LEXICON]:
+        if i < end:                         # inside the phrase just counted
+            continue
+        node = _LEXICON[tokens[i]]
+        tag, stop = node.get(None), i + 1
+        j = i + 1
+        while j < n and tokens[j] in node:
+            node = node[tokens[j]]
+            j += 1
+            if None in node:
+                tag, stop = node[None], j
+        if tag is None:
+            continue
+        side, weight = tag
+        if side == "bull":
+            bull += 1
+        elif side == "bear":
+            bear += 1
+        else:
+            mult = max(mult, weight)
+        end = stop
+    return bull, bear, mult
 
 
 @dataclass
@@ -59,14 +135,8 @@ class RuleBasedSentiment:
     def score(self, text: str) -> SentimentScore:
         if not text:
             return SentimentScore(0.0, 0.0)
-        tokens = _tokenize(text)
-        bull = sum(1 for t in tokens if t in BULL_TERMS)
-        bear = sum(1 for t in tokens if t in BEAR_TERMS)
-        # rough intensifier multiplier on the dominant side
-        mult = 1.0
-        for t, m in INTENSIFIERS.items():
-            if t in tokens:
-                mult = max(mult, m)
+        bull, bear, mult = _scan(_tokenize(text))
+        # intensifier multiplier (strongest one present) on the dominant side
         net = bull - bear
         n = max(1, bull + bear)
         value = max(-1.0, min(1.0, (net / n) * mult))
@@ -74,6 +144,9 @@ class RuleBasedSentiment:
         confidence = min(1.0, (bull + bear) / 8.0)
         return SentimentScore(value=value, confidence=confidence)
 
+    def score_many(self, texts: list[str]) -> list[SentimentScore]:
+        return [self.score(t) for t in texts]
+
 
 # ---- 2. sklearn TF-IDF + LR ----------------------------------------------
 
@@ -104,15 +177,23 @@ class SklearnSentiment:
         return self
 
     def score(self, text: str) -> SentimentScore:
-        if self._pipeline is None or not text:
-            return SentimentScore(0.0, 0.0)
-        proba = self._pipeline.predict_proba([text])[0]
+        return self.score_many([text])[0]
+
+    def score_many(self, texts: list[str]) -> list[SentimentScore]:
+        """One TF-IDF transform + predict_proba over every non-empty text."""
+        out = [SentimentScore(0.0, 0.0)] * len(texts)
+        idx = [i for i, t in enumerate(texts) if t]
+        if self._pipeline is None or not idx:
+            return out
+        probas = self._pipeline.predict_proba([texts[i] for i in idx])
         classes = list(self._pipeline.classes_)   # e.g. [-1, 0, 1]
-        value = sum(c * p for c, p in zip(classes, proba))
-        # confidence = top class margin over uniform
-        top = max(proba)
-        confidence = max(0.0, min(1.0, (top - 1 / len(classes)) / (1 - 1 / len(classes))))
-        return SentimentScore(value=float(value), confidence=float(confidence))
+        for i, proba in zip(idx, probas):
+            value = sum(c * p for c, p in zip(classes, proba))
+            # confidence = top class margin over uniform
+            top = max(proba)
+            confidence = max(0.0, min(1.0, (top - 1 / len(classes)) / (1 - 1 / len(classes))))
+            out[i] = SentimentScore(value=float(value), confidence=float(confidence))
+        return out
 
     def save(self, path: str | Path):
         import joblib
@@ -130,17 +211,30 @@ class HuggingFaceSentiment:
 
     name = "huggingface"
 
-    def __init__(self, model_id: str = "ProsusAI/finbert"):
+    def __init__(self, model_id: str = "ProsusAI/finbert", batch_size: int = 16):
         try:
             from transformers import pipeline  # type: ignore
         except ImportError as e:
             raise RuntimeError("transformers not installed; pip install transformers torch") from e
         self._pipe = pipeline("sentiment-analysis", model=model_id)
+        self.batch_size = batch_size
 
     def score(self, text: str) -> SentimentScore:
-        if not text:
-            return SentimentScore(0.0, 0.0)
-        out = self._pipe(text[:512])[0]
+        return self.score_many([text])[0]
+
+    def score_many(self, texts: list[str]) -> list[SentimentScore]:
+        """Non-empty texts go through the pipeline as padded batches."""
+        out = [SentimentScore(0.0, 0.0)] * len(texts)
+        idx = [i for i, t in enumerate(texts) if t]
+        if not idx:
+            return out
+        preds = self._pipe([texts[i][:512] for i in idx], batch_size=self.batch_size)
+        for i, pred in zip(idx, preds):
+            out[i] = self._to_score(pred)
+        return out
+
+    @staticmethod
+    def _to_score(out: dict) -> SentimentScore:
         label = out["label"].lower()
         prob = float(out["score"])
         if "pos" in label or "bull" in label:
@@ -150,11 +244,56 @@ class HuggingFaceSentiment:
         return SentimentScore(value=0.0, confidence=prob)
 
 
+# ---- memoization ----------------------------------------------------------
+
+class CachedSentiment:
+    """LRU of scores by text digest in front of a backend; `score_many` sends
+    only the texts it has not seen, deduplicated, to the backend in one call."""
+
+    def __init__(self, backend: SentimentBackend, max_entries: int = 4096):
+        self.backend = backend
+        self.name = backend.name
+        self.max_entries = max(1, int(max_entries))
+        self._entries: OrderedDict[str, SentimentScore] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def score(self, text: str) -> SentimentScore:
+        return self.score_many([text])[0]
+
+    def score_many(self, texts: list[str]) -> list[SentimentScore]:
+        keys = [self._key(t or "") for t in texts]
+        found: dict[str, SentimentScore] = {}
+        with self._lock:
+            for k in keys:
+                if k in self._entries:
+                    self._entries.move_to_end(k)
+                    found[k] = self._entries[k]
+            todo = {k: t or "" for k, t in zip(keys, texts) if k not in found}
+            self.hits += len(keys) - len(todo)      # repeats within the call count as hits
+            self.misses += len(todo)
+        if todo:
+            scored = dict(zip(todo, self.backend.score_many(list(todo.values()))))
+            found.update(scored)
+            with self._lock:
+                self._entries.update(scored)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return [found[k] for k in keys]
+
+
 # ---- factory --------------------------------------------------------------
 
-def get_sentiment_backend(name: str | None = None) -> SentimentBackend:
-    """Resolve via arg → SENTIMENT_BACKEND env → 'rule-based' default."""
-    name = (name or os.getenv("SENTIMENT_BACKEND") or "rule-based").lower()
+_BACKENDS: dict[tuple, CachedSentiment] = {}
+_BACKENDS_LOCK = threading.Lock()
+
+
+def _build_backend(name: str) -> SentimentBackend:
     if name in ("rule-based", "rules", "lexicon"):
         return RuleBasedSentiment()
     if name == "sklearn":
@@ -162,3 +301,21 @@ def get_sentiment_backend(name: str | None = None) -> SentimentBackend:
     if name in ("huggingface", "hf", "finbert"):
         return HuggingFaceSentiment(os.getenv("SENTIMENT_HF_MODEL", "ProsusAI/finbert"))
     raise ValueError(f"unknown sentiment backend: {name!r}")
+
+
+def get_sentiment_backend(name: str | None = None) -> CachedSentiment:
+    """Resolve via arg → SENTIMENT_BACKEND env → 'rule-based' default.
+
+    One memoized instance per (backend, model settings) for the process; a
+    retrained sklearn model (new file mtime) gets a fresh instance.
+    """
+    name = (name or os.getenv("SENTIMENT_BACKEND") or "rule-based").lower()
+    model_path = os.getenv("SENTIMENT_MODEL_PATH") if name == "sklearn" else None
+    mtime = Path(model_path).stat().st_mtime_ns if model_path and Path(model_path).exists() else None
+    key = (name, model_path, mtime,
+           os.getenv("SENTIMENT_HF_MODEL") if name in ("huggingface", "hf", "finbert") else None)
+    with _BACKENDS_LOCK:
+        if key not in _BACKENDS:
+            _BACKENDS[key] = CachedSentiment(_build_backend(name),
+                                             int(os.getenv("SENTIMENT_CACHE_MAX", "4096")))
+        return _BACKENDS[key]
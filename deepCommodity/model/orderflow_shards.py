@@ -0,0 +1,150 @@
+"""Chunked order-flow featurization + labelling, written as training shards.
+
+`orderflow_transformer.make_features` / `make_labels` / `windowize` work on
+a whole tape in memory, and the windowed copy alone is ~1.7 GB per day of
+per-second tape (86400 x 600 x 4 float64 values, overlapping).
+This pipeline streams the tape in bounded blocks instead:
+
+    features  each block is z-scored together with the previous
+              ROLLING_WIN - 1 raw rows it carries over, so block boundaries
+              don't change the rolling mean/std
+    labels    forward drift from a cumulative sum over the rows still waiting
+              for their horizon; a row is final once `horizon_sec + 1` later
+              rows have arrived (the same rows `windowize` keeps)
+    shards    final (feature row, label) pairs go to `shard_NNNNN.npz` files
+              plus a `manifest.json`; rows are stored once, not per window
+
+`load_shards` rebuilds the (N, seq_len, F) windows as a zero-copy strided view
+over the concatenated rows. `fit` indexes it batch by batch, so a multi-day
+tape trains in tens of MB. Output matches make_features + make_labels +
+windowize on the whole tape, for tapes of at least ROLLING_WIN rows.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from deepCommodity.model.orderflow_transformer import ORDERFLOW_FEATURES, ROLLING_WIN
+
+MANIFEST = "manifest.json"
+
+
+class OrderflowChunker:
+    """Push tape blocks in order; get back the rows whose labels became final."""
+
+    def __init__(self, horizon_sec: int = 60, up_thresh: float = 0.0008,
+                 down_thresh: float = -0.0008):
+        self.horizon_sec = horizon_sec
+        self.up_thresh = up_thresh
+        self.down_thresh = down_thresh
+        f = len(ORDERFLOW_FEATURES)
+        self._carry = np.empty((0, f))                   # last ROLLING_WIN - 1 raw rows
+        self._feats = np.empty((0, f), dtype=np.float32)   # rows awaiting their label
+        self._drift = np.empty(0)
+        self.rows_in = 0
+        self.rows_out = 0
+
+    def _zscore(self, raw: np.ndarray) -> np.ndarray:
+        ext = np.concatenate([self._carry, raw])
+        roll = pd.DataFrame(ext).rolling(ROLLING_WIN, min_periods=1)
+        mu = roll.mean().to_numpy()[-len(raw):]
+        sd = roll.std().to_numpy()[-len(raw):]
+        self._carry = ext[-(ROLLING_WIN - 1):]
+        sd = np.where(sd < 1e-9, 1.0, sd)
+        return np.nan_to_num((raw - mu) / sd, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def push(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """(features (k, F) float32, labels (k,) int64) for the rows finalized by `df`."""
+        raw = np.stack([df[c].astype(float).to_numpy() for c in ORDERFLOW_FEATURES], axis=1)
+        self.rows_in += len(raw)
+        if len(raw):
+            self._feats = np.concatenate([self._feats, self._zscore(raw).astype(np.float32)])
+            self._drift = np.concatenate([self._drift, df["vwap_drift"].astype(float).to_numpy()])
+        h = self.horizon_sec
+        k = max(0, len(self._feats) - h - 1)
+        # fwd[j] = drift[j+1 : j+1+h].sum(), as a difference of prefix sums
+        csum = np.concatenate([[0.0], np.cumsum(self._drift[: k + h])])
+        fwd = csum[h + 1 : h + 1 + k] - csum[1 : 1 + k]
+        labels = np.full(k, 1, dtype=np.int64)
+        labels[fwd >= self.up_thresh] = 2
+        labels[fwd <= self.down_thresh] = 0
+        out = self._feats[:k]
+        self._feats, self._drift = self._feats[k:], self._drift[k:]
+        self.rows_out += k
+        return out, labels
+
+
+def read_tape(path: Path, chunk_rows: int = 100_000) -> Iterable[pd.DataFrame]:
+    """A per-second tape CSV (tools/fetch_orderflow.py output), block by block."""
+    yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+def write_shards(blocks: Iterable[pd.DataFrame], out_dir: Path, horizon_sec: int = 60,
+                 shard_rows: int = 1 << 20, symbol: str = "", **thresholds) -> dict:
+    """Featurize + label `blocks` into `out_dir`; returns the manifest.
+
+    Memory stays at one block plus one shard of rows, however long the tape.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for old in out_dir.glob("shard_*.npz"):
+        old.unlink()
+    chunker = OrderflowChunker(horizon_sec, **thresholds)
+    shards: list[dict] = []
+    feats: list[np.ndarray] = []
+    labels: list[np.ndarray] = []
+    pending = 0
+
+    def flush():
+        nonlocal pending
+        name = f"shard_{len(shards):05d}.npz"
+        np.savez(out_dir / name, features=np.concatenate(feats),
+                 labels=np.concatenate(labels).astype(np.int8))
+        shards.append({"file": name, "rows": pending})
+        feats.clear(); labels.clear()
+        pending = 0
+
+    for block in blocks:
+        f, y = chunker.push(block)
+        while len(f):
+            take = min(len(f), shard_rows - pending)
+            feats.append(f[:take]); labels.append(y[:take])
+            pending += take
+            f, y = f[take:], y[take:]
+            if pending == shard_rows:
+                flush()
+    if pending:
+        flush()
+
+    manifest = {
+        "symbol": symbol, "features": ORDERFLOW_FEATURES, "rolling_win": ROLLING_WIN,
+        "horizon_sec": horizon_sec,
+        "up_thresh": chunker.up_thresh, "down_thresh": chunker.down_thresh,
+        "tape_rows": chunker.rows_in, "rows": chunker.rows_out, "shards": shards,
+    }
+    (out_dir / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def load_shards(shard_dir: Path, seq_len: int = 600) -> tuple[np.ndarray, np.ndarray]:
+    """(X, y) like `windowize`, with X a strided view over the shard rows
+    (windows overlap in memory, so never write to it)."""
+    shard_dir = Path(shard_dir)
+    manifest = json.loads((shard_dir / MANIFEST).read_text())
+    n_feat = len(manifest["features"])
+    rows, labels = [], []
+    for s in manifest["shards"]:
+        with np.load(shard_dir / s["file"]) as z:
+            rows.append(z["features"]); labels.append(z["labels"])
+    rows = np.concatenate(rows) if rows else np.empty((0, n_feat), dtype=np.float32)
+    labels = np.concatenate(labels).astype(np.int64) if labels else np.empty(0, dtype=np.int64)
+    n = len(rows) - seq_len + 1
+    if n <= 0:
+        return np.empty((0, seq_len, n_feat), dtype=np.float32), np.empty((0,), dtype=np.int64)
+    X = np.lib.stride_tricks.as_strided(rows, (n, seq_len, n_feat),
+                                        (rows.strides[0], *rows.strides))
+    return X, labels[seq_len - 1:]
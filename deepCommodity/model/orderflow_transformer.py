@@ -6,6 +6,18 @@ Window = last 600 seconds (10 min). Predicts direction over the next H seconds.
 
 Same architecture family as `price_transformer.py` (transformer encoder + class
 head); the encoder is reusable as a head for the Phase 8 fused model.
+
+Tapes too long to window in memory go through orderflow_shards.py, which
+produces the same features and labels in bounded-memory blocks.
+
+Patch tokens (`OrderflowConfig(patch_size=10)`): instead of one token per
+second, the tape is cut into non-overlapping patch_size-second bins. Each
+bin is flattened and embedded by one learned linear layer, so a 600 s window
+is 60 tokens. That cuts attention pairs by patch_size^2 and the per-token
+layers by patch_size, roughly a 10x cut in forward FLOPs at patch_size=10.
+It also makes 30-60 minute lookbacks affordable. The oldest
+seq_len % patch_size seconds are dropped, so the last patch always ends at
+the newest second.
 """
 from __future__ import annotations
 
@@ -19,13 +31,15 @@ if TYPE_CHECKING:
     import torch  # noqa: F401
 
 ORDERFLOW_FEATURES = ["signed_volume", "trade_count", "mean_size", "vwap_drift"]
+ROLLING_WIN = 300          # seconds of context behind each standardized row
+FEATURE_LOOKBACK = ROLLING_WIN
 
 
 def make_features(df: pd.DataFrame) -> np.ndarray:
     """Robust z-scoring on rolling window so model isn't sensitive to absolute scale."""
     out = np.stack([df[c].astype(float).to_numpy() for c in ORDERFLOW_FEATURES], axis=1)
     # rolling 5-min standardization
-    win = 300
+    win = ROLLING_WIN
     if len(out) < win:
         return np.nan_to_num(out, nan=0.0, posinf=0.0, neginf=0.0)
     mu = pd.DataFrame(out).rolling(win, min_periods=1).mean().to_numpy()
@@ -40,8 +54,10 @@ def make_labels(df: pd.DataFrame, horizon_sec: int = 60,
     """Direction label = sign of cumulative vwap_drift over the next horizon_sec."""
     drift = df["vwap_drift"].astype(float).to_numpy()
     fwd = np.zeros(len(drift), dtype=float)
-    for i in range(len(drift) - horizon_sec):
-        fwd[i] = drift[i + 1 : i + 1 + horizon_sec].sum()
+    n = max(0, len(drift) - horizon_sec)
+    # fwd[i] = drift[i+1 : i+1+h].sum(), as a difference of prefix sums
+    csum = np.concatenate([[0.0], np.cumsum(drift)])
+    fwd[:n] = csum[horizon_sec + 1 : horizon_sec + 1 + n] - csum[1 : 1 + n]
     labels = np.full(len(drift), 1, dtype=np.int64)
     labels[fwd >= up_thresh] = 2
     labels[fwd <= down_thresh] = 0
@@ -71,6 +87,23 @@ class OrderflowConfig:
     dropout: float = 0.1
     n_classes: int = 3
     horizon: int = 60
+    causal: bool = False       # see price_transformer: windowed causal encoder with step()
+    attn_window: int = 0
+    patch_size: int = 1        # seconds per token; 1 = one token per second
+
+    @property
+    def n_tokens(self) -> int:
+        return self.seq_len // self.patch_size
+
+
+def forward_flops(cfg: OrderflowConfig) -> int:
+    """Analytic FLOPs (2 per multiply-add) of one window's forward pass."""
+    n, d = cfg.n_tokens, cfg.d_model
+    per_layer = n * (2 * 4 * d * d          # q, k, v, out projections
+                     + 2 * 2 * d * cfg.dim_ff   # feed-forward
+                     + 2 * 2 * n * d)       # scores + weighted sum over n keys
+    embed = n * 2 * cfg.patch_size * cfg.n_features * d
+    return embed + cfg.n_layers * per_layer + 2 * d * cfg.n_classes
 
 
 def _torch():
@@ -82,13 +115,21 @@ def _torch():
 def build_model(cfg: OrderflowConfig | None = None):
     torch, nn = _torch()
     cfg = cfg or OrderflowConfig()
+    if cfg.patch_size < 1 or cfg.patch_size > cfg.seq_len:
+        raise ValueError(f"patch_size must be in [1, seq_len={cfg.seq_len}], got {cfg.patch_size}")
+    if cfg.causal:
+        if cfg.patch_size != 1:
+            raise ValueError("causal orderflow models take one token per second (patch_size=1)")
+        from deepCommodity.model.price_transformer import build_causal
+        return build_causal(cfg, "CausalOrderflowTransformer")
 
     class OrderflowTransformer(nn.Module):
         def __init__(self, c: OrderflowConfig):
             super().__init__()
             self.c = c
-            self.input_proj = nn.Linear(c.n_features, c.d_model)
-            self.pos = nn.Parameter(torch.zeros(1, c.seq_len, c.d_model))
+            # a token is one second, or a flattened (patch_size, n_features) bin
+            self.input_proj = nn.Linear(c.patch_size * c.n_features, c.d_model)
+            self.pos = nn.Parameter(torch.zeros(1, c.n_tokens, c.d_model))
             enc_layer = nn.TransformerEncoderLayer(
                 d_model=c.d_model, nhead=c.n_heads, dim_feedforward=c.dim_ff,
                 dropout=c.dropout, batch_first=True, activation="gelu",
@@ -97,13 +138,24 @@ def build_model(cfg: OrderflowConfig | None = None):
             self.head = nn.Sequential(nn.LayerNorm(c.d_model),
                                       nn.Linear(c.d_model, c.n_classes))
 
+        def tokens(self, x):
+            # (B, T, F) -> (B, T // p, p * F), dropping the oldest T % p seconds
+            p = self.c.patch_size
+            if p == 1:
+                return x
+            B, T, F = x.shape
+            return x[:, T % p:].reshape(B, T // p, p * F)
+
         def encode(self, x):
-            h = self.input_proj(x) + self.pos[:, : x.size(1)]
+            t = self.tokens(x)
+            h = self.input_proj(t) + self.pos[:, : t.size(1)]
             return self.encoder(h)
 
+        def embed(self, x):
+            return self.encode(x)[:, -1]
+
         def forward(self, x):
-            h = self.encode(x)
-            return self.head(h[:, -1])
+            return self.head(self.embed(x))
 
     return OrderflowTransformer(cfg)
 
@@ -112,6 +164,7 @@ def build_model(cfg: OrderflowConfig | None = None):
 from deepCommodity.model.price_transformer import (  # noqa: E402
     TrainConfig,
     fit,
+    forecast_codes,
     predict_proba,
     proba_to_forecast,
 )
@@ -119,5 +172,5 @@ from deepCommodity.model.price_transformer import (  # noqa: E402
 __all__ = [
     "ORDERFLOW_FEATURES", "OrderflowConfig", "TrainConfig",
     "make_features", "make_labels", "windowize",
-    "build_model", "fit", "predict_proba", "proba_to_forecast",
+    "build_model", "forward_flops", "fit", "predict_proba", "proba_to_forecast", "forecast_codes",
 ]
@@ -1,7 +1,8 @@
 """Phase 5: price transformer (specialist).
 
-Trains on OHLCV bars across the universe. Per-symbol for v1; cross-asset
-attention is a v2 follow-up. Output is a 3-class direction softmax (down /
+Trains on OHLCV bars across the universe, either per symbol (`<SYM>.pt`) or
+as one global model over pooled windows (`TransformerConfig(n_assets=...)`,
+see below). Output is a 3-class direction softmax (down /
 flat / up) over the next H bars, so it slots cleanly into the agent's
 forecast.confidence ∈ [0, 1] interface.
 
@@ -16,6 +17,27 @@ Inputs (per symbol):
 Outputs:
     logits over {down, flat, up} per window.
     Inference returns (direction, confidence) compatible with backtest.engine.Forecast.
+
+Causal variant (`TransformerConfig(causal=True)`):
+    The default encoder attends bidirectionally over the whole window and reads
+    only the last step, so each new bar costs a full O(T^2) re-encode. With
+    causal=True each position attends only to itself and the `attn_window - 1`
+    positions before it, with an ALiBi recency bias instead of absolute
+    positions. A position's state therefore never changes once computed, and
+    the last step's receptive field, n_layers * (attn_window - 1) + 1, fits
+    inside seq_len. That makes
+        state = model.new_state(); model.prime(window, state)   # once
+        logits = model.step(new_bar, state)                     # per bar
+    exactly equal to re-running forward() on the latest seq_len bars, at
+    O(n_layers * attn_window) per bar. It trains through the same `fit`.
+
+Global variant (`TransformerConfig(n_assets=len(symbols) + 1)`):
+    One model over the whole universe, in the style of contextual_transformer:
+    a learned asset embedding is added to every input token. Slot 0 is the
+    UNKNOWN_ASSET embedding. During training asset ids are swapped for it with
+    probability `asset_dropout`, so a symbol the model never saw (a new listing)
+    gets a meaningful forecast. Train on `pool_windows` output with
+    `fit(..., asset_id=, n_val=)`, and predict with `predict_proba(..., asset_id=)`.
 """
 from __future__ import annotations
 
@@ -30,6 +52,9 @@ if TYPE_CHECKING:  # only for type hints, no runtime torch import
     from torch import nn
 
 FEATURE_COLS = ["pct_close", "log_vol_chg", "hl_spread", "oc_spread"]
+CLASSES = ["short", "flat", "long"]   # index 0,1,2 == down,flat,up
+FEATURE_LOOKBACK = 1       # each row's features need only the previous bar
+UNKNOWN_ASSET = 0          # global model: embedding slot for symbols it wasn't trained on
 
 
 # ---- featurization ---------------------------------------------------------
@@ -82,6 +107,10 @@ class TransformerConfig:
     dropout: float = 0.1
     n_classes: int = 3
     horizon: int = 24
+    causal: bool = False
+    attn_window: int = 0       # causal only; 0 = largest window whose receptive field fits seq_len
+    n_assets: int = 0          # global model: known symbols + 1 (UNKNOWN_ASSET); 0 = per-symbol
+    asset_dropout: float = 0.1
 
 
 def _torch_modules():
@@ -95,6 +124,10 @@ def build_model(cfg: TransformerConfig | None = None):
     """Build a torch.nn.Module. Raises ImportError if torch is missing."""
     torch, nn = _torch_modules()
     cfg = cfg or TransformerConfig()
+    if cfg.causal:
+        if cfg.n_assets:
+            raise ValueError("causal global models are not supported; use n_assets=0")
+        return build_causal(cfg, "CausalPriceTransformer")
 
     class PriceTransformer(nn.Module):
         def __init__(self, c: TransformerConfig):
@@ -112,18 +145,186 @@ def build_model(cfg: TransformerConfig | None = None):
                 nn.LayerNorm(c.d_model),
                 nn.Linear(c.d_model, c.n_classes),
             )
+            self.asset_emb = nn.Embedding(c.n_assets, c.d_model) if c.n_assets else None
 
-        def encode(self, x):
+        def encode(self, x, asset_id=None):
             # x: (B, T, F) -> (B, T, d_model)
             h = self.input_proj(x) + self.pos[:, : x.size(1)]
+            if self.asset_emb is not None:
+                if asset_id is None:
+                    asset_id = torch.full((x.size(0),), UNKNOWN_ASSET, dtype=torch.long,
+                                          device=x.device)
+                elif self.training and self.c.asset_dropout:
+                    drop = torch.rand(asset_id.shape, device=x.device) < self.c.asset_dropout
+                    asset_id = asset_id.masked_fill(drop, UNKNOWN_ASSET)
+                h = h + self.asset_emb(asset_id)[:, None]
             return self.encoder(h)
 
+        def embed(self, x, asset_id=None):
+            # last-step representation: the prediction summary (B, d_model)
+            return self.encode(x, asset_id)[:, -1]
+
+        def forward(self, x, asset_id=None):
+            return self.head(self.embed(x, asset_id))
+
+    return PriceTransformer(cfg)
+
+
+def asset_ids(symbols: list[str], wanted) -> np.ndarray:
+    """Global-model embedding ids for `wanted` given the trained `symbols`
+    (checkpoint meta); unseen symbols map to UNKNOWN_ASSET."""
+    index = {s: i + 1 for i, s in enumerate(symbols)}
+    return np.asarray([index.get(s, UNKNOWN_ASSET) for s in wanted], dtype=np.int64)
+
+
+def pool_windows(windows: dict[str, tuple[np.ndarray, np.ndarray]], val_frac: float = 0.2):
+    """Pool per-symbol (X, y) windows for the global model.
+
+    Returns (X, y, asset_id, symbols, n_val). Each symbol's last `val_frac` of
+    windows (the most recent ones) goes to the validation tail, so `fit(...,
+    n_val=n_val)` validates every asset out of time, as the per-symbol runs do.
+    """
+    symbols = sorted(windows)
+    ids = asset_ids(symbols, symbols)
+    tr, va = [], []
+    for sym, aid in zip(symbols, ids):
+        X, y = windows[sym]
+        cut = int(len(X) * (1 - val_frac))
+        a = np.full(len(X), aid, dtype=np.int64)
+        tr.append((X[:cut], y[:cut], a[:cut]))
+        va.append((X[cut:], y[cut:], a[cut:]))
+    parts = tr + va
+    X = np.concatenate([p[0] for p in parts]).astype(np.float32, copy=False)
+    y = np.concatenate([p[1] for p in parts])
+    aid = np.concatenate([p[2] for p in parts])
+    return X, y, aid, symbols, sum(len(p[0]) for p in va)
+
+
+def causal_window(cfg) -> int:
+    """Attention window of a causal model: explicit, or the largest that keeps the
+    last step's receptive field inside seq_len (so a full window is exact)."""
+    if cfg.attn_window:
+        return cfg.attn_window
+    return max(1, (cfg.seq_len - 1) // cfg.n_layers + 1)
+
+
+def build_causal(cfg, name: str = "CausalTransformer"):
+    """Causal, windowed, ALiBi-biased encoder + class head with a KV-cached `step()`.
+
+    `cfg` is any config with the TransformerConfig fields (OrderflowConfig too).
+    Each layer is post-norm like nn.TransformerEncoderLayer. The ALiBi slopes and
+    band mask are computed on the fly, not stored as buffers, so meta-device
+    construction and mmap loading work unchanged.
+    """
+    torch, nn = _torch_modules()
+    F = torch.nn.functional
+    window = causal_window(cfg)
+    if cfg.n_layers * (window - 1) + 1 > cfg.seq_len:
+        raise ValueError(f"attn_window={window} x n_layers={cfg.n_layers} "
+                         f"looks past seq_len={cfg.seq_len}")
+
+    def tail(t, n: int):
+        return t[:, :, max(0, t.size(2) - n):]
+
+    def slopes(h: int, device):
+        return torch.tensor([2.0 ** (-8.0 * (i + 1) / h) for i in range(h)], device=device)
+
+    class Block(nn.Module):
+        def __init__(self, c):
+            super().__init__()
+            self.h = c.n_heads
+            self.qkv = nn.Linear(c.d_model, 3 * c.d_model)
+            self.out = nn.Linear(c.d_model, c.d_model)
+            self.ff = nn.Sequential(nn.Linear(c.d_model, c.dim_ff), nn.GELU(),
+                                    nn.Dropout(c.dropout), nn.Linear(c.dim_ff, c.d_model))
+            self.norm1 = nn.LayerNorm(c.d_model)
+            self.norm2 = nn.LayerNorm(c.d_model)
+            self.drop1 = nn.Dropout(c.dropout)
+            self.drop2 = nn.Dropout(c.dropout)
+
+        def heads(self, h):
+            # (B, T, d) -> 3 x (B, H, T, d/H)
+            B, T, _ = h.shape
+            return self.qkv(h).view(B, T, 3, self.h, -1).permute(2, 0, 3, 1, 4)
+
+        def finish(self, h, attn):
+            B, _, T, _ = attn.shape
+            attn = attn.transpose(1, 2).reshape(B, T, -1)
+            h = self.norm1(h + self.drop1(self.out(attn)))
+            return self.norm2(h + self.drop2(self.ff(h)))
+
+    class CausalTransformer(nn.Module):
+        def __init__(self, c):
+            super().__init__()
+            self.c = c
+            self.window = window
+            self.input_proj = nn.Linear(c.n_features, c.d_model)
+            self.blocks = nn.ModuleList(Block(c) for _ in range(c.n_layers))
+            self.head = nn.Sequential(nn.LayerNorm(c.d_model),
+                                      nn.Linear(c.d_model, c.n_classes))
+
+        def _bias(self, n_q: int, n_k: int, device):
+            # queries are the last n_q of n_k positions; bias[h, i, j] = -slope_h * distance
+            q = torch.arange(n_k - n_q, n_k, device=device)[:, None]
+            dist = (q - torch.arange(n_k, device=device)[None, :]).float()
+            bias = -slopes(self.c.n_heads, device)[:, None, None] * dist
+            return bias.masked_fill((dist < 0) | (dist >= self.window), float("-inf"))
+
+        def encode(self, x, state: dict | None = None):
+            # x: (B, T, F) -> (B, T, d_model); fills `state` with each layer's last K/V
+            h = self.input_proj(x)
+            bias = self._bias(x.size(1), x.size(1), x.device)
+            for i, blk in enumerate(self.blocks):
+                q, k, v = blk.heads(h)
+                if state is not None:
+                    state["kv"][i] = (tail(k, self.window - 1), tail(v, self.window - 1))
+                drop = blk.drop1.p if self.training else 0.0
+                h = blk.finish(h, F.scaled_dot_product_attention(q, k, v, attn_mask=bias,
+                                                                 dropout_p=drop))
+            if state is not None:
+                state["seen"] += x.size(1)
+            return h
+
+        def embed(self, x):
+            return self.encode(x)[:, -1]
+
         def forward(self, x):
-            h = self.encode(x)
-            # use last-step representation as the prediction summary
+            return self.head(self.embed(x))
+
+        def new_state(self) -> dict:
+            """Empty per-layer K/V cache for `prime` / `step`."""
+            return {"kv": [None] * len(self.blocks), "seen": 0}
+
+        def prime(self, x, state: dict):
+            """Encode a (B, T, F) history into `state`; returns logits for its last step."""
+            return self.head(self.encode(x, state)[:, -1])
+
+        def step(self, bar, state: dict):
+            """Logits (B, n_classes) after appending one (B, F) bar to `state`.
+
+            Exact w.r.t. forward() on the latest seq_len bars once at least
+            `receptive_field` bars have been seen; approximate before that.
+            """
+            h = self.input_proj(bar)[:, None]
+            for i, blk in enumerate(self.blocks):
+                q, k, v = blk.heads(h)
+                if state["kv"][i] is not None:
+                    k0, v0 = state["kv"][i]
+                    k, v = torch.cat([k0, k], dim=2), torch.cat([v0, v], dim=2)
+                # the new bar's query may attend window - 1 predecessors; keep exactly those
+                k, v = tail(k, self.window), tail(v, self.window)
+                state["kv"][i] = (tail(k, self.window - 1), tail(v, self.window - 1))
+                h = blk.finish(h, F.scaled_dot_product_attention(
+                    q, k, v, attn_mask=self._bias(1, k.size(2), bar.device)))
+            state["seen"] += 1
             return self.head(h[:, -1])
 
-    return PriceTransformer(cfg)
+        @property
+        def receptive_field(self) -> int:
+            return self.c.n_layers * (self.window - 1) + 1
+
+    CausalTransformer.__name__ = CausalTransformer.__qualname__ = name
+    return CausalTransformer(cfg)
 
 
 # ---- training --------------------------------------------------------------
@@ -153,19 +354,25 @@ class TrainConfig:
     pin_memory: bool = False
 
 
-def fit(model, X: np.ndarray, y: np.ndarray, cfg: TrainConfig | None = None) -> dict:
-    """Train with early stopping on val cross-entropy. Returns history dict."""
+def fit(model, X: np.ndarray, y: np.ndarray, cfg: TrainConfig | None = None,
+        asset_id: np.ndarray | None = None, n_val: int | None = None) -> dict:
+    """Train with early stopping on val cross-entropy. Returns history dict.
+
+    asset_id: per-window ids for a global model. n_val: validation rows taken
+    from the end (default: cfg.val_frac of X).
+    """
     torch, nn = _torch_modules()
     cfg = cfg or TrainConfig()
     device = torch.device(cfg.device)
     model = model.to(device)
 
     n = len(X)
-    cut = int(n * (1 - cfg.val_frac))
+    cut = n - n_val if n_val is not None else int(n * (1 - cfg.val_frac))
     X_tr = torch.from_numpy(X[:cut]).float()
     y_tr = torch.from_numpy(y[:cut]).long()
     X_va = torch.from_numpy(X[cut:]).float()
     y_va = torch.from_numpy(y[cut:]).long()
+    a = torch.from_numpy(asset_id).long() if asset_id is not None else None
 
     opt = torch.optim.AdamW(model.parameters(), lr=cfg.lr, weight_decay=cfg.weight_decay)
     loss_fn = nn.CrossEntropyLoss()
@@ -182,18 +389,23 @@ def fit(model, X: np.ndarray, y: np.ndarray, cfg: TrainConfig | None = None) ->
         for i in range(0, len(X_tr), cfg.batch_size):
             idx = perm[i : i + cfg.batch_size]
             xb, yb = X_tr[idx].to(device), y_tr[idx].to(device)
-            logits = model(xb)
+            logits = model(xb) if a is None else model(xb, a[:cut][idx].to(device))
             loss = loss_fn(logits, yb)
             opt.zero_grad(); loss.backward(); opt.step()
             train_loss_sum += loss.item() * len(idx)
         train_loss = train_loss_sum / max(1, len(X_tr))
 
         model.eval()
+        val_loss_sum, val_hits = 0.0, 0
         with torch.no_grad():
-            xb, yb = X_va.to(device), y_va.to(device)
-            logits = model(xb)
-            val_loss = loss_fn(logits, yb).item()
-            val_acc = (logits.argmax(-1) == yb).float().mean().item()
+            # batch by batch: X may be a strided view (orderflow_shards.load_shards)
+            for i in range(0, len(X_va), cfg.batch_size):
+                xb, yb = X_va[i : i + cfg.batch_size].to(device), y_va[i : i + cfg.batch_size].to(device)
+                logits = model(xb) if a is None else model(xb, a[cut + i : cut + i + len(xb)].to(device))
+                val_loss_sum += loss_fn(logits, yb).item() * len(yb)
+                val_hits += int((logits.argmax(-1) == yb).sum().item())
+        val_loss = val_loss_sum / len(X_va) if len(X_va) else float("nan")
+        val_acc = val_hits / len(X_va) if len(X_va) else float("nan")
 
         history["train_loss"].append(train_loss)
         history["val_loss"].append(val_loss)
@@ -214,27 +426,46 @@ def fit(model, X: np.ndarray, y: np.ndarray, cfg: TrainConfig | None = None) ->
     return history
 
 
-def predict_proba(model, X: np.ndarray, batch_size: int = 256) -> np.ndarray:
+def predict_proba(model, X: np.ndarray, batch_size: int = 256,
+                  asset_id: np.ndarray | None = None, embeddings: bool = False):
+    """(N, 3) softmax. With embeddings=True returns (proba, (N, d_model) last-step
+    embeddings), the vectors the fused trunk consumes (eager models only)."""
     torch, nn = _torch_modules()
     model.eval()
-    out = []
+    out, embs = [], []
     with torch.no_grad():
         for i in range(0, len(X), batch_size):
             xb = torch.from_numpy(X[i : i + batch_size]).float()
-            logits = model(xb)
+            args = (xb,) if asset_id is None else (
+                xb, torch.from_numpy(asset_id[i : i + batch_size]).long())
+            if embeddings:
+                h = model.embed(*args)
+                logits = model.head(h)
+                embs.append(h.cpu().numpy())
+            else:
+                logits = model(*args)
             out.append(torch.softmax(logits, dim=-1).cpu().numpy())
-    return np.concatenate(out, axis=0) if out else np.empty((0, 3))
+    proba = np.concatenate(out, axis=0) if out else np.empty((0, 3))
+    if embeddings:
+        return proba, (np.concatenate(embs, axis=0) if embs
+                       else np.empty((0, getattr(model.c, "d_model", 0)), dtype=np.float32))
+    return proba
 
 
-def proba_to_forecast(proba: np.ndarray, min_conf: float = 0.0) -> tuple[str, float]:
-    """Map a single (3,) proba vector -> (direction, confidence).
+def forecast_codes(proba: np.ndarray, min_conf: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+    """(N, 3) proba -> (direction codes (N,), confidences (N,)) in one pass.
 
-    Confidence is the margin between the top class and uniform (1/3), scaled to [0,1].
+    Codes index CLASSES (0 short, 1 flat, 2 long), like the labels. Confidence
+    is the margin between the top class and uniform (1/3), scaled to [0,1];
+    rows under `min_conf` become flat and keep their confidence.
     """
-    classes = ["short", "flat", "long"]
-    top = int(np.argmax(proba))
-    conf = float((proba[top] - 1 / 3) / (2 / 3))
-    conf = max(0.0, min(1.0, conf))
-    if conf < min_conf:
-        return "flat", conf
-    return classes[top], conf
+    proba = np.asarray(proba, dtype=np.float64)     # same arithmetic for a row and a batch
+    top = proba.argmax(-1)
+    conf = np.clip((np.take_along_axis(proba, top[..., None], -1)[..., 0] - 1 / 3) / (2 / 3), 0.0, 1.0)
+    return np.where(conf < min_conf, 1, top), conf
+
+
+def proba_to_forecast(proba: np.ndarray, min_conf: float = 0.0) -> tuple[str, float]:
+    """Map a single (3,) proba vector -> (direction, confidence); see forecast_codes."""
+    code, conf = forecast_codes(proba, min_conf)
+    return CLASSES[int(code)], float(conf)
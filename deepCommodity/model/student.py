@@ -0,0 +1,154 @@
+"""Distilled NumPy-only student of the price transformer, for wide screening.
+
+The teacher needs torch and a full (seq_len, 4) attention pass per symbol. The
+student is a one-hidden-layer MLP (hidden=0: softmax regression) over a
+few dozen summary features of the same window. It is trained to match the
+teacher's class probabilities (soft-label cross-entropy), also in NumPy.
+Inference is two small matmuls for the whole symbol list, and neither
+training nor inference imports torch.
+
+Summary features, per lookback L (bars) that fits the window:
+    sum of pct_close (the L-bar return), std of pct_close (L >= 4),
+    mean log_vol_chg, mean hl_spread, mean oc_spread
+
+Saved as a single .npz: weights, the feature standardization, and a JSON
+`meta` entry (teacher checkpoint, lookbacks, agreement metrics).
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+LOOKBACKS = (1, 4, 24, 72, 168)
+
+
+def summary_features(X: np.ndarray, lookbacks: tuple[int, ...] = LOOKBACKS) -> np.ndarray:
+    """(N, T, 4) make_features windows -> (N, S) float32 summaries."""
+    X = np.asarray(X, dtype=np.float64)
+    T = X.shape[1]
+    # prefix sums over time (newest last): the mean over the last L rows is one subtraction
+    zero = np.zeros((len(X), 1, X.shape[2]))
+    cs = np.concatenate([zero, np.cumsum(X, axis=1)], axis=1)
+    cs2 = np.concatenate([zero[..., :1], np.cumsum(X[..., :1] ** 2, axis=1)], axis=1)
+    cols = []
+    for L in lookbacks:
+        if L > T:
+            continue
+        s = cs[:, T] - cs[:, T - L]                              # (N, 4) sums over the last L
+        cols.append(s[:, 0])
+        if L >= 4:
+            m = s[:, 0] / L
+            var = (cs2[:, T, 0] - cs2[:, T - L, 0]) / L - m * m
+            cols.append(np.sqrt(np.maximum(var, 0.0)))
+        cols.extend((s[:, 1:] / L).T)
+    return np.stack(cols, axis=1).astype(np.float32)
+
+
+@dataclass
+class Student:
+    mean: np.ndarray               # (S,) feature standardization
+    std: np.ndarray
+    w1: np.ndarray                 # (S, H), or (S, 3) when there's no hidden layer
+    b1: np.ndarray
+    w2: np.ndarray | None = None   # (H, 3)
+    b2: np.ndarray | None = None
+    lookbacks: tuple[int, ...] = LOOKBACKS
+    seq_len: int = 168
+    meta: dict = field(default_factory=dict)
+
+    def logits(self, F: np.ndarray) -> np.ndarray:
+        z = (F - self.mean) / self.std @ self.w1 + self.b1
+        if self.w2 is None:
+            return z
+        return np.maximum(z, 0.0) @ self.w2 + self.b2
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """(N, T>=seq_len, 4) windows -> (N, 3) softmax; uses the last seq_len rows."""
+        return _softmax(self.logits(summary_features(np.asarray(X)[:, -self.seq_len:], self.lookbacks)))
+
+    def save(self, path: Path) -> None:
+        arrays = {"mean": self.mean, "std": self.std, "w1": self.w1, "b1": self.b1}
+        if self.w2 is not None:
+            arrays.update(w2=self.w2, b2=self.b2)
+        meta = {**self.meta, "lookbacks": list(self.lookbacks), "seq_len": self.seq_len}
+        np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+
+
+def load_student(path: Path) -> Student:
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(str(z["meta"]))
+        a = {k: z[k] for k in z.files if k != "meta"}
+    return Student(a["mean"], a["std"], a["w1"], a["b1"], a.get("w2"), a.get("b2"),
+                   lookbacks=tuple(meta.pop("lookbacks")), seq_len=meta.pop("seq_len"), meta=meta)
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def distill(X: np.ndarray, teacher_proba: np.ndarray, hidden: int = 32, epochs: int = 200,
+            lr: float = 1e-2, l2: float = 1e-4, batch_size: int = 512, seed: int = 0,
+            lookbacks: tuple[int, ...] = LOOKBACKS) -> Student:
+    """Fit a Student to the teacher's (N, 3) probabilities on windows X (N, T, 4).
+
+    Mini-batch Adam on the soft-label cross-entropy, which has the same
+    gradient as KL(teacher || student).
+    """
+    rng = np.random.default_rng(seed)
+    F = summary_features(X, lookbacks).astype(np.float64)
+    P = np.asarray(teacher_proba, dtype=np.float64)
+    mean, std = F.mean(0), F.std(0) + 1e-8
+    Z = (F - mean) / std
+    s = Z.shape[1]
+    shapes = [(s, hidden), (hidden,), (hidden, 3), (3,)] if hidden else [(s, 3), (3,)]
+    params = [rng.normal(0, np.sqrt(2.0 / sh[0]), sh) if len(sh) == 2 else np.zeros(sh)
+              for sh in shapes]
+    m = [np.zeros_like(p) for p in params]
+    v = [np.zeros_like(p) for p in params]
+    step = 0
+    for _ in range(epochs):
+        order = rng.permutation(len(Z))
+        for i in range(0, len(Z), batch_size):
+            b = order[i:i + batch_size]
+            x, p = Z[b], P[b]
+            if hidden:
+                w1, b1, w2, b2 = params
+                h = np.maximum(x @ w1 + b1, 0.0)
+                g = (_softmax(h @ w2 + b2) - p) / len(b)         # dLoss/dlogits
+                gh = (g @ w2.T) * (h > 0)
+                grads = [x.T @ gh + l2 * w1, gh.sum(0), h.T @ g + l2 * w2, g.sum(0)]
+            else:
+                w1, b1 = params
+                g = (_softmax(x @ w1 + b1) - p) / len(b)
+                grads = [x.T @ g + l2 * w1, g.sum(0)]
+            step += 1
+            for j, gr in enumerate(grads):
+                m[j] = 0.9 * m[j] + 0.1 * gr
+                v[j] = 0.999 * v[j] + 0.001 * gr * gr
+                params[j] -= lr * (m[j] / (1 - 0.9 ** step)) / (np.sqrt(v[j] / (1 - 0.999 ** step)) + 1e-8)
+    f32 = [p.astype(np.float32) for p in params]
+    return Student(mean.astype(np.float32), std.astype(np.float32), f32[0], f32[1],
+                   *(f32[2:] if hidden else (None, None)),
+                   lookbacks=tuple(lookbacks), seq_len=int(X.shape[1]))
+
+
+def agreement(student_proba: np.ndarray, teacher_proba: np.ndarray,
+              min_conf: float = 0.0) -> dict:
+    """How closely the student tracks the teacher on the same windows."""
+    from deepCommodity.model.price_transformer import forecast_codes
+    sp, tp = np.asarray(student_proba), np.asarray(teacher_proba)
+    kl = (tp * (np.log(tp + 1e-12) - np.log(sp + 1e-12))).sum(1)
+    (s_dir, s_conf), (t_dir, t_conf) = forecast_codes(sp, min_conf), forecast_codes(tp, min_conf)
+    return {
+        "n": int(len(sp)),
+        "top1_agreement": round(float((sp.argmax(1) == tp.argmax(1)).mean()), 4),
+        "direction_agreement": round(float((s_dir == t_dir).mean()), 4),
+        "confidence_mae": round(float(np.abs(s_conf - t_conf).mean()), 4),
+        "proba_mae": round(float(np.abs(sp - tp).mean()), 4),
+        "mean_kl": round(float(kl.mean()), 4),
+    }
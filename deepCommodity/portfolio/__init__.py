@@ -54,8 +54,7 @@ def load_funding(symbols, funding_dir: Path, index: pd.DatetimeIndex) -> pd.Data
 
 def load_regime(macro_csv: Path, index: pd.DatetimeIndex) -> pd.Series:
     """Regime sign in {-1,0,+1} per date from the macro panel (causal)."""
-    from deepCommodity.model.contextual_transformer import regime_readout
-    from tools.fetch_macro_features import MACRO_FEATURE_COLS
+    from deepCommodity.model.contextual_transformer import MACRO_FEATURE_COLS, regime_readout
     if not Path(macro_csv).exists():
         return pd.Series(0, index=index)
     m = pd.read_csv(macro_csv, index_col="date", parse_dates=True)[MACRO_FEATURE_COLS]
@@ -2,8 +2,39 @@
 
 Endpoints
     GET  /health                     liveness + available models
+    GET  /ready                      200 once models are loaded and warmed, else 503
+    GET  /metrics                    Prometheus text exposition (serving/metrics.py)
     POST /forecast                   run a forecast (auth required)
+    POST /forecast/batch             many forecasts in one call (auth required)
     POST /reload                     reload models from disk (auth required)
+    POST /sessions                   open a streaming window session (auth required)
+    POST /sessions/{sid}/append      push new bars / flow seconds
+    POST /sessions/{sid}/forecast    forecast from the session's buffered window
+    DELETE /sessions/{sid}           close a session
+
+`model=contextual` runs the global macro-contextual model (contextual.pt) and
+needs `bars` + `macro`; its macro encoding is computed once per macro date and
+shared by every asset (serving/encodings.py). `model=fused` runs
+<SYM>.fused.pt when present and otherwise falls back to the ensemble vote.
+`model=price` uses <SYM>.pt when present and otherwise the cross-asset
+price.global.pt. That one model batches windows for every symbol into one
+forward pass and also serves symbols it was not trained on.
+
+Identical forecast requests (same body, same loaded models) are computed once:
+concurrent duplicates await the first, and results are reused for
+DC_RESPONSE_CACHE_TTL_SEC (serving/caching.py). /forecast answers with
+`X-Cache: hit|miss|coalesced`; batch items carry the same in `cache`.
+
+Every model gets synthetic warm-up passes before it counts as ready
+(serving/warmup.py). At startup they run in the background and /ready
+reports when they are done. On reload they run before the new model is
+swapped in. /health is liveness only.
+
+Forecast handlers are async: featurization + inference run on a bounded
+executor (serving/executor.py), which answers 503 + Retry-After when full so
+/health stays responsive under saturation. Model inference then goes through a
+micro-batcher (serving/batching.py) that coalesces concurrent windows for the
+same model into one forward pass (DC_BATCH_MAX / DC_BATCH_WAIT_MS).
 
 Run locally:
     uvicorn serving.app:app --host 0.0.0.0 --port 8080
@@ -13,45 +44,129 @@ Or via Docker:
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import sys
+import threading
 import time
 from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 
 # Repo root on path so we can import deepCommodity.*
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
 from serving.auth import require_api_key  # noqa: E402
-from serving.registry import ModelRegistry, get_models_dir  # noqa: E402
+from serving.batching import batcher_from_env  # noqa: E402
+from serving import metrics  # noqa: E402
+from serving.encodings import array_digest, encodings_from_env, window_key  # noqa: E402
+from serving.executor import (  # noqa: E402
+    BoundedExecutor,
+    ExecutorSaturated,
+    executor_from_env,
+    retry_after_sec,
+)
+from serving.caching import MISS, ResponseCache, body_key, response_cache_from_env  # noqa: E402
+from serving.memory import process_memory  # noqa: E402
+from serving.warmup import Warmup, warmup_from_env  # noqa: E402
+from serving.sessions import (  # noqa: E402
+    SessionLimit,
+    SessionStore,
+    WindowSession,
+    sessions_from_env,
+)
+from serving.registry import (  # noqa: E402
+    CONTEXTUAL_SYMBOL,
+    GLOBAL_SYMBOL,
+    ModelRegistry,
+    registry_from_env,
+    watch_interval_from_env,
+)
 from serving.schemas import (  # noqa: E402
+    BatchForecastItem,
+    BatchForecastRequest,
+    BatchForecastResponse,
     ForecastRequest,
     ForecastResponse,
     HealthResponse,
+    MacroWindow,
+    PackedWindow,
+    ReadyResponse,
     ReloadResponse,
+    SessionAppendRequest,
+    SessionOpenRequest,
+    SessionResponse,
 )
+from serving.wire import BAR_COLUMNS, ORDERFLOW_COLUMNS  # noqa: E402
 
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s %(levelname)s %(name)s | %(message)s")
 log = logging.getLogger("dc-serve")
 
 REGISTRY: ModelRegistry | None = None
+EXECUTOR: BoundedExecutor | None = None
+SESSIONS: SessionStore | None = None
+RESPONSES: ResponseCache | None = None
+WARMUP: Warmup | None = None
+CACHE_HEADER = "X-Cache"
+
+
+def _run_batch(loaded, X: np.ndarray, asset_id: np.ndarray | None = None) -> np.ndarray:
+    """Specialist forward; eager models also leave each window's embedding in
+    ENCODINGS for a fused forecast over the same window."""
+    from deepCommodity.model.price_transformer import predict_proba
+    sha = loaded.meta.get("encoder_sha")
+    if sha is None or not hasattr(loaded.handle, "embed"):      # exported backends
+        return predict_proba(loaded.handle, X, asset_id=asset_id)
+    proba, emb = predict_proba(loaded.handle, X, asset_id=asset_id, embeddings=True)
+    ids = asset_id if asset_id is not None else np.zeros(len(X), dtype=np.int64)
+    for window, aid, h in zip(X, ids, emb):
+        ENCODINGS.put(loaded.kind, window_key(sha, window, aid), h)
+    return proba
+
+
+def _observe_batch(key, size: int, seconds: float) -> None:
+    kind = key[0]
+    metrics.BATCH_SIZE.observe(size, kind)
+    metrics.INFERENCE_LATENCY.observe(seconds, kind)
+
+
+def _run_forward(forward, X) -> np.ndarray:
+    return forward(X)
+
+
+BATCHER = batcher_from_env(_run_batch, observe=_observe_batch)
+# contextual / fused: tuple inputs, handle is a bound forward function
+MULTI_BATCHER = batcher_from_env(_run_forward, observe=_observe_batch)
+ENCODINGS = encodings_from_env()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global REGISTRY
-    REGISTRY = ModelRegistry(get_models_dir())
+    global REGISTRY, EXECUTOR, SESSIONS, RESPONSES, WARMUP
+    REGISTRY = registry_from_env()
     REGISTRY.load_all()
+    WARMUP = warmup_from_env()
+    stop_warmup = threading.Event()
+    WARMUP.start(REGISTRY.resident(), stop_warmup)   # /ready flips when this finishes
+    REGISTRY.warm = WARMUP                             # later loads warm before swap-in
+    REGISTRY.start_watch(watch_interval_from_env())
+    EXECUTOR = executor_from_env()
+    SESSIONS = sessions_from_env()
+    RESPONSES = response_cache_from_env()
     if not os.getenv("DC_API_KEY"):
         log.warning("DC_API_KEY not set — API is in OPEN mode. Do not deploy publicly.")
     yield
+    stop_warmup.set()
+    REGISTRY.stop_watch()
+    EXECUTOR.shutdown()
 
 
 app = FastAPI(title="deepCommodity inference",
@@ -59,6 +174,27 @@ app = FastAPI(title="deepCommodity inference",
               lifespan=lifespan)
 
 
+app.add_middleware(metrics.MetricsMiddleware)
+
+metrics.Gauge("dc_executor_inflight", "Forecast calls queued or running on the executor",
+              lambda: EXECUTOR.inflight if EXECUTOR else None)
+metrics.Gauge("dc_registry_resident_models", "Models resident in memory",
+              lambda: REGISTRY.stats()["resident"] if REGISTRY else None)
+metrics.Gauge("dc_registry_resident_bytes", "Parameter + buffer bytes of resident models",
+              lambda: REGISTRY.resident_bytes() if REGISTRY else None)
+metrics.Gauge("dc_sessions_open", "Open streaming window sessions",
+              lambda: len(SESSIONS) if SESSIONS else None)
+metrics.Gauge("dc_sessions_bytes", "Ring-buffer bytes held by open sessions",
+              lambda: SESSIONS.nbytes() if SESSIONS else None)
+metrics.Gauge("dc_registry_indexed_models", "Checkpoints known to the registry",
+              lambda: REGISTRY.stats()["indexed"] if REGISTRY else None)
+metrics.Gauge("dc_response_cache_entries", "Forecast responses held in the response cache",
+              lambda: len(RESPONSES) if RESPONSES is not None else None)
+metrics.Gauge("dc_process_memory_bytes", "This worker's memory (rss, pss, shared, private, anon)",
+              lambda: {k[:-len("_bytes")]: v for k, v in (process_memory() or {}).items()
+                       if k.endswith("_bytes")}, label="kind")
+
+
 # ---- helpers ---------------------------------------------------------------
 
 def _torch_available() -> bool:
@@ -69,7 +205,16 @@ def _torch_available() -> bool:
         return False
 
 
+def _packed_to_df(w: PackedWindow, required: tuple[str, ...]) -> pd.DataFrame:
+    missing = [c for c in required if c not in w.columns]
+    if missing:
+        raise HTTPException(422, f"packed window missing columns {missing}")
+    return pd.DataFrame(w.array, columns=w.columns, copy=False)[list(required)]
+
+
 def _bars_to_df(b) -> pd.DataFrame:
+    if isinstance(b, PackedWindow):
+        return _packed_to_df(b, BAR_COLUMNS)
     n = min(len(b.open), len(b.high), len(b.low), len(b.close), len(b.volume))
     return pd.DataFrame({
         "open":   b.open[-n:],
@@ -81,6 +226,8 @@ def _bars_to_df(b) -> pd.DataFrame:
 
 
 def _orderflow_to_df(o) -> pd.DataFrame:
+    if isinstance(o, PackedWindow):
+        return _packed_to_df(o, ORDERFLOW_COLUMNS)
     return pd.DataFrame({
         "signed_volume": o.signed_volume,
         "trade_count":   o.trade_count,
@@ -91,48 +238,187 @@ def _orderflow_to_df(o) -> pd.DataFrame:
 
 # ---- prediction adapters --------------------------------------------------
 
-def _predict_price(symbol: str, bars_df: pd.DataFrame) -> tuple[str, float, list[float]]:
+def _specialist(symbol: str, kind: str):
+    """The symbol's own checkpoint; for price, else the cross-asset model."""
+    if REGISTRY is None:
+        return None
+    loaded = REGISTRY.get(symbol, kind)
+    if loaded is None and kind == "price":
+        loaded = REGISTRY.get(GLOBAL_SYMBOL, "price")
+    return loaded
+
+
+def _loaded(symbol: str, kind: str):
     if REGISTRY is None:
         raise HTTPException(503, "registry not initialized")
-    loaded = REGISTRY.get(symbol, "price")
+    loaded = _specialist(symbol, kind)
     if loaded is None:
-        raise HTTPException(404, f"no price model for {symbol}")
-    from deepCommodity.model.price_transformer import (
-        make_features, predict_proba, proba_to_forecast,
-    )
+        raise HTTPException(404, f"no {kind} model for {symbol}")
+    return loaded
+
+
+def _global_forward(loaded, X) -> np.ndarray:
+    """(price windows (B, T, F), asset ids (B,)) -> (B, 3) softmax."""
+    price_x, asset_id = X
+    return _run_batch(loaded, price_x, asset_id)
+
+
+def _infer_window(kind: str, loaded, feats: np.ndarray, unit: str,
+                  symbol: str) -> tuple[str, float, list[float]]:
+    from deepCommodity.model.price_transformer import asset_ids, proba_to_forecast
     seq_len = loaded.config["seq_len"]
-    feats = make_features(bars_df)
     if len(feats) < seq_len:
-        raise HTTPException(422, f"need {seq_len} bars, got {len(feats)}")
-    X = feats[-seq_len:][None, :, :].astype(np.float32)
-    proba = predict_proba(loaded.handle, X)[0]
+        raise HTTPException(422, f"need {seq_len} {unit}, got {len(feats)}")
+    if loaded.config.get("n_assets"):       # cross-asset: every symbol shares one batch
+        proba = MULTI_BATCHER.infer((kind, loaded.symbol, id(loaded.handle)),
+                                    partial(_global_forward, loaded),
+                                    (feats[-seq_len:].astype(np.float32),
+                                     asset_ids(loaded.meta["symbols"], [symbol])[0]))
+    else:
+        proba = BATCHER.infer((kind, loaded.symbol, id(loaded.handle)), loaded,
+                              feats[-seq_len:])
     direction, conf = proba_to_forecast(proba)
     return direction, conf, proba.tolist()
 
 
+def _predict_price(symbol: str, bars_df: pd.DataFrame) -> tuple[str, float, list[float]]:
+    loaded = _loaded(symbol, "price")
+    from deepCommodity.model.price_transformer import make_features
+    with metrics.FEATURIZE_LATENCY.time("price"):
+        feats = make_features(bars_df)
+    return _infer_window("price", loaded, feats, "bars", symbol)
+
+
 def _predict_orderflow(symbol: str, of_df: pd.DataFrame) -> tuple[str, float, list[float]]:
-    if REGISTRY is None:
-        raise HTTPException(503, "registry not initialized")
-    loaded = REGISTRY.get(symbol, "orderflow")
+    loaded = _loaded(symbol, "orderflow")
+    from deepCommodity.model.orderflow_transformer import make_features
+    with metrics.FEATURIZE_LATENCY.time("orderflow"):
+        feats = make_features(of_df)
+    return _infer_window("orderflow", loaded, feats, "flow bars", symbol)
+
+
+def _contextual_forward(model, macro_h, X) -> np.ndarray:
+    """(price windows (B, T, F), asset ids (B,)) -> (B, len(HORIZONS), 3) softmax."""
+    import torch
+    from deepCommodity.model.contextual_transformer import HORIZONS
+    price_x, asset_id = X
+    with torch.no_grad():
+        logits = model.forward_encoded(torch.from_numpy(price_x).float(), macro_h,
+                                       torch.from_numpy(asset_id).long())
+        return np.stack([torch.softmax(logits[h], -1).numpy() for h in HORIZONS], axis=1)
+
+
+def _encode_macro(model, macro_x: np.ndarray):
+    import torch
+    with torch.no_grad():
+        return model.encode_macro(torch.from_numpy(macro_x).float())
+
+
+def _predict_contextual(symbol: str, bars_df: pd.DataFrame, macro: MacroWindow):
+    """-> (direction, confidence, weekly proba, {horizon: proba}, regime label)."""
+    loaded = REGISTRY.get(CONTEXTUAL_SYMBOL, "contextual") if REGISTRY else None
     if loaded is None:
-        raise HTTPException(404, f"no orderflow model for {symbol}")
-    from deepCommodity.model.orderflow_transformer import (
-        make_features, predict_proba, proba_to_forecast,
+        raise HTTPException(404, "no contextual model")
+    assets = loaded.meta["symbols"]
+    if symbol not in assets:
+        raise HTTPException(404, f"contextual model does not cover {symbol}")
+    from deepCommodity.model.contextual_transformer import (
+        HORIZONS, MACRO_FEATURE_COLS, apply_norm, regime_readout,
     )
-    seq_len = loaded.config["seq_len"]
-    feats = make_features(of_df)
-    if len(feats) < seq_len:
-        raise HTTPException(422, f"need {seq_len} flow bars, got {len(feats)}")
-    X = feats[-seq_len:][None, :, :].astype(np.float32)
-    proba = predict_proba(loaded.handle, X)[0]
+    from deepCommodity.model.price_transformer import make_features, proba_to_forecast
+    cfg = loaded.config
+    with metrics.FEATURIZE_LATENCY.time("contextual"):
+        feats = make_features(bars_df)
+    if len(feats) < cfg["price_seq"]:
+        raise HTTPException(422, f"need {cfg['price_seq']} bars, got {len(feats)}")
+    macro_x = np.asarray(macro.rows, dtype=np.float64)
+    if macro_x.ndim != 2 or macro_x.shape[1] != cfg["macro_feats"] or len(macro_x) < cfg["macro_seq"]:
+        raise HTTPException(422, f"macro needs {cfg['macro_seq']} rows x {cfg['macro_feats']} "
+                                 f"columns, got {list(macro_x.shape)}")
+    price_n, macro_n = apply_norm(feats[-cfg["price_seq"]:][None], macro_x[-cfg["macro_seq"]:][None],
+                                  loaded.meta["norm"])
+    # keyed on the encoder weights (and backend: int8 artifacts encode differently),
+    # not the handle, so a reloaded checkpoint never reads the old model's encodings
+    macro_key = (loaded.meta["macro_encoder_sha"], loaded.backend, macro.date, array_digest(macro_n))
+    macro_h = ENCODINGS.get_or_compute("macro", macro_key,
+                                       lambda: _encode_macro(loaded.handle, macro_n))
+    out = MULTI_BATCHER.infer(("contextual", CONTEXTUAL_SYMBOL, id(loaded.handle), *macro_key),
+                              partial(_contextual_forward, loaded.handle, macro_h),
+                              (price_n[0], np.int64(assets.index(symbol))))
+    horizons = {h: out[i].tolist() for i, h in enumerate(HORIZONS)}
+    direction, conf = proba_to_forecast(out[0])
+    regime = regime_readout(dict(zip(MACRO_FEATURE_COLS, macro_x[-1])))["regime"]
+    return direction, conf, horizons[HORIZONS[0]], horizons, regime
+
+
+def _fused_forward(loaded, inputs: tuple[str, ...], X) -> np.ndarray:
+    """`inputs` name each array: "<kind>_x" windows, "<kind>_h" cached embeddings,
+    "news_x". Windows are embedded here and the embeddings cached as well."""
+    import torch
+    model = loaded.handle
+    kwargs = {}
+    with torch.no_grad():
+        for name, x in zip(inputs, X):
+            t = torch.from_numpy(x).float()
+            kind = name[:-2]
+            if name.endswith("_x") and kind in ("price", "orderflow"):
+                t = getattr(model, kind).embed(t)
+                sha = loaded.meta.get(f"{kind}_encoder_sha")
+                for window, h in zip(x, t.numpy()):
+                    ENCODINGS.put(kind, window_key(sha, window), h)
+                name = f"{kind}_h"
+            kwargs[name] = t
+        return torch.softmax(model(**kwargs), -1).numpy()
+
+
+def _predict_fused(loaded, req: ForecastRequest) -> tuple[str, float, list[float], list[str]]:
+    """Run a fused checkpoint on whichever of price / orderflow / news the request has."""
+    from deepCommodity.model.price_transformer import proba_to_forecast
+    inputs: dict[str, np.ndarray] = {}
+    for kind, window, to_df in (("price", req.bars, _bars_to_df),
+                                ("orderflow", req.orderflow, _orderflow_to_df)):
+        enc_cfg = loaded.meta.get(f"{kind}_config")
+        if window is None or not enc_cfg:
+            continue
+        if kind == "price":
+            from deepCommodity.model.price_transformer import make_features
+        else:
+            from deepCommodity.model.orderflow_transformer import make_features
+        with metrics.FEATURIZE_LATENCY.time("fused"):
+            feats = make_features(to_df(window))
+        if len(feats) < enc_cfg["seq_len"]:
+            raise HTTPException(422, f"fused {kind} needs {enc_cfg['seq_len']} rows, got {len(feats)}")
+        window = feats[-enc_cfg["seq_len"]:].astype(np.float32)
+        # the specialist may already have embedded this window with the same encoder
+        h = ENCODINGS.peek(kind, window_key(loaded.meta[f"{kind}_encoder_sha"], window))
+        inputs[f"{kind}_h" if h is not None else f"{kind}_x"] = window if h is None else h
+    if req.news_text:
+        from deepCommodity.model.news_model import get_sentiment_backend
+        s = get_sentiment_backend().score(req.news_text)
+        inputs["news_x"] = np.array([s.value, s.confidence], dtype=np.float32)
+    if not inputs:
+        raise HTTPException(422, "fused needs at least one of: bars, orderflow, news_text")
+    names = tuple(inputs)
+    # one forward pass per input pattern: missing modalities and cached embeddings must match
+    proba = MULTI_BATCHER.infer(("fused", loaded.symbol, id(loaded.handle), names),
+                                partial(_fused_forward, loaded, names),
+                                tuple(inputs.values()))
     direction, conf = proba_to_forecast(proba)
-    return direction, conf, proba.tolist()
+    return direction, conf, proba.tolist(), [n[:-2] for n in names]
+
+
+NEWS_MODELS = ("news", "fused", "ensemble")
+
+
+def _score_news(texts: list[str]) -> None:
+    """Batched scoring; the backend's memo then serves each item's score()."""
+    from deepCommodity.model.news_model import get_sentiment_backend
+    get_sentiment_backend().score_many(texts)
 
 
 def _predict_news(text: str) -> tuple[str, float, list[float] | None]:
     from deepCommodity.model.news_model import get_sentiment_backend
-    backend = get_sentiment_backend()
-    s = backend.score(text or "")
+    s = get_sentiment_backend().score(text or "")
     if s.value > 0.2 and s.confidence > 0.3:
         direction = "long"
     elif s.value < -0.2 and s.confidence > 0.3:
@@ -180,16 +466,43 @@ def _ensemble(predictions: list[tuple[str, str, float]]) -> tuple[str, float, st
 
 # ---- endpoints ------------------------------------------------------------
 
+async def _dispatch(calls: list[tuple]) -> list:
+    """Run blocking calls on the inference executor; 503 + Retry-After when full."""
+    if EXECUTOR is None:
+        raise HTTPException(503, "executor not initialized")
+    try:
+        futures = EXECUTOR.submit_many(calls)
+    except ExecutorSaturated:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "inference queue full; retry later",
+                            headers={"Retry-After": retry_after_sec()})
+    return await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+
+
 @app.get("/health", response_model=HealthResponse)
-def health() -> HealthResponse:
+async def health() -> HealthResponse:
     available = REGISTRY.list_available() if REGISTRY else {}
     return HealthResponse(
         ok=True,
         available_models=available,
         torch_available=_torch_available(),
+        registry=REGISTRY.stats() if REGISTRY else None,
+        process=process_memory(),
+        response_cache=RESPONSES.stats() if RESPONSES is not None else None,
     )
 
 
+@app.get("/ready", response_model=ReadyResponse, responses={503: {"model": ReadyResponse}})
+async def ready() -> JSONResponse:
+    """Readiness for load balancers / orchestrators: 503 until startup warm-up is done."""
+    body = ReadyResponse(**WARMUP.status()) if WARMUP else ReadyResponse(ready=False)
+    return JSONResponse(body.model_dump(), status_code=200 if body.ready else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/reload", response_model=ReloadResponse,
           dependencies=[Depends(require_api_key)])
 def reload_models() -> ReloadResponse:
@@ -197,12 +510,48 @@ def reload_models() -> ReloadResponse:
         raise HTTPException(503, "registry not initialized")
     t0 = time.time()
     loaded = REGISTRY.load_all()
-    return ReloadResponse(reloaded=loaded, elapsed_ms=int((time.time() - t0) * 1000))
+    return ReloadResponse(reloaded=loaded, elapsed_ms=int((time.time() - t0) * 1000),
+                          **REGISTRY.last_diff)
 
 
 @app.post("/forecast", response_model=ForecastResponse,
           dependencies=[Depends(require_api_key)])
-def forecast(req: ForecastRequest) -> ForecastResponse:
+async def forecast(req: ForecastRequest, response: Response) -> ForecastResponse:
+    (item,), (cache,) = await _cached_items([req])
+    if not item.ok:
+        raise HTTPException(item.status_code, item.error)
+    response.headers[CACHE_HEADER] = cache
+    return item.forecast
+
+
+def _request_key(req: ForecastRequest) -> str:
+    """Body hash + registry generation: a reload that changes a model changes every key."""
+    return body_key(req.model_dump_json(), REGISTRY.generation if REGISTRY else 0)
+
+
+async def _cached_items(reqs: list[ForecastRequest]) -> tuple[list[BatchForecastItem], list[str]]:
+    """Forecast items in request order, computing only what is neither cached nor
+    already in flight; failed items are shared with waiters but not cached."""
+    async def compute(idx: list[int]) -> list[BatchForecastItem]:
+        texts = list(dict.fromkeys(reqs[i].news_text for i in idx
+                                   if reqs[i].news_text and reqs[i].model in NEWS_MODELS))
+        if len(texts) > 1:          # score every distinct text in one backend pass first
+            await _dispatch([(_score_news, (texts,))])
+        return await _dispatch([(_forecast_item, (reqs[i],)) for i in idx])
+
+    if RESPONSES is None:
+        return await compute(list(range(len(reqs)))), [MISS] * len(reqs)
+    got = await RESPONSES.get_many([_request_key(r) for r in reqs], compute,
+                                   cacheable=lambda item: item.ok)
+    return [item for item, _ in got], [cache for _, cache in got]
+
+
+def _forecast_sync(req: ForecastRequest) -> ForecastResponse:
+    with metrics.FORECAST_LATENCY.time(req.model):
+        return _forecast_model(req)
+
+
+def _forecast_model(req: ForecastRequest) -> ForecastResponse:
     sym = req.symbol.upper()
     backends_used: list[str] = []
 
@@ -246,17 +595,40 @@ def forecast(req: ForecastRequest) -> ForecastResponse:
             backends_used=["rule-based"],
         )
 
+    if req.model == "contextual":
+        if not req.bars or not req.macro:
+            raise HTTPException(422, "model=contextual requires bars and macro")
+        direction, conf, proba, horizons, regime = _predict_contextual(
+            sym, _bars_to_df(req.bars), req.macro)
+        return ForecastResponse(
+            symbol=sym, model="contextual", direction=direction,
+            confidence=conf, proba=proba, horizons=horizons,
+            rationale=f"contextual:{regime} " + " ".join(
+                f"{h}=[{p[0]:.2f}/{p[1]:.2f}/{p[2]:.2f}]" for h, p in horizons.items()),
+            backends_used=["contextual"],
+        )
+
+    fused = REGISTRY.get(sym, "fused") if req.model == "fused" and REGISTRY else None
+    if fused is not None:
+        direction, conf, proba, used = _predict_fused(fused, req)
+        return ForecastResponse(
+            symbol=sym, model="fused", direction=direction,
+            confidence=conf, proba=proba,
+            rationale=f"fused({'+'.join(used)}) proba=[{proba[0]:.2f}/{proba[1]:.2f}/{proba[2]:.2f}]",
+            backends_used=used,
+        )
+
     if req.model in ("ensemble", "fused"):
         results = []
         rationales = []
-        if req.bars and REGISTRY and REGISTRY.get(sym, "price"):
+        if req.bars and _specialist(sym, "price"):
             try:
                 d, c, p = _predict_price(sym, _bars_to_df(req.bars))
                 results.append(("price", d, c)); rationales.append(f"price={d}@{c:.2f}")
                 backends_used.append("price")
             except HTTPException:
                 pass
-        if req.orderflow and REGISTRY and REGISTRY.get(sym, "orderflow"):
+        if req.orderflow and _specialist(sym, "orderflow"):
             try:
                 d, c, p = _predict_orderflow(sym, _orderflow_to_df(req.orderflow))
                 results.append(("orderflow", d, c)); rationales.append(f"orderflow={d}@{c:.2f}")
@@ -284,3 +656,127 @@ def forecast(req: ForecastRequest) -> ForecastResponse:
         )
 
     raise HTTPException(400, f"unsupported model {req.model}")
+
+
+def _forecast_item(req: ForecastRequest) -> BatchForecastItem:
+    try:
+        return BatchForecastItem(ok=True, status_code=200, forecast=_forecast_sync(req))
+    except HTTPException as e:
+        return BatchForecastItem(ok=False, status_code=e.status_code, error=str(e.detail))
+
+
+@app.post("/forecast/batch", response_model=BatchForecastResponse,
+          dependencies=[Depends(require_api_key)])
+async def forecast_batch(req: BatchForecastRequest) -> BatchForecastResponse:
+    """Per-item results in request order; one bad item never fails the batch.
+
+    Items run concurrently on the executor, so the micro-batcher coalesces those
+    that share a model into one forward pass.
+    """
+    t0 = time.time()
+    items, caches = await _cached_items(req.requests)
+    results = [item.model_copy(update={"cache": cache}) for item, cache in zip(items, caches)]
+    return BatchForecastResponse(results=results, elapsed_ms=int((time.time() - t0) * 1000))
+
+
+# ---- streaming sessions -----------------------------------------------------
+
+def _session_spec(kind: str):
+    """kind -> (raw columns, make_features, feature lookback in rows)."""
+    if kind == "price":
+        from deepCommodity.model.price_transformer import FEATURE_LOOKBACK, make_features
+        return BAR_COLUMNS, make_features, FEATURE_LOOKBACK
+    from deepCommodity.model.orderflow_transformer import FEATURE_LOOKBACK, make_features
+    return ORDERFLOW_COLUMNS, make_features, FEATURE_LOOKBACK
+
+
+def _session_rows(kind: str, req: SessionOpenRequest | SessionAppendRequest) -> np.ndarray | None:
+    window = req.bars if kind == "price" else req.orderflow
+    if window is None:
+        return None
+    df = _bars_to_df(window) if kind == "price" else _orderflow_to_df(window)
+    return df.to_numpy(dtype=np.float64)
+
+
+def _session_min_rows(sess: WindowSession) -> int:
+    loaded = _specialist(sess.symbol, sess.kind)
+    return (loaded.config["seq_len"] if loaded else 0) + sess.lookback
+
+
+def _session_response(sess: WindowSession, dropped: int = 0) -> SessionResponse:
+    return SessionResponse(session_id=sess.id, symbol=sess.symbol, model=sess.kind,
+                           rows=sess.rows, capacity=sess.capacity,
+                           min_rows=_session_min_rows(sess), nbytes=sess.nbytes,
+                           dropped=dropped, ttl_sec=SESSIONS.ttl_sec)
+
+
+def _get_session(sid: str) -> WindowSession:
+    sess = SESSIONS.get(sid) if SESSIONS else None
+    if sess is None:
+        raise HTTPException(404, "unknown or expired session")
+    return sess
+
+
+@app.post("/sessions", response_model=SessionResponse,
+          dependencies=[Depends(require_api_key)])
+def open_session(req: SessionOpenRequest) -> SessionResponse:
+    """Open a (symbol, model) stream; optionally seed it with history."""
+    if SESSIONS is None:
+        raise HTTPException(503, "sessions not initialized")
+    sym, kind = req.symbol.upper(), req.model
+    loaded = _loaded(sym, kind)
+    columns, featurize, lookback = _session_spec(kind)
+    rows = _session_rows(kind, req)
+    try:
+        sess = SESSIONS.open(sym, kind, columns, featurize, lookback,
+                             min_rows=loaded.config["seq_len"] + lookback)
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+    except SessionLimit as e:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, f"too many sessions ({e})",
+                            headers={"Retry-After": retry_after_sec()})
+    dropped = sess.append(rows) if rows is not None else 0
+    return _session_response(sess, dropped)
+
+
+@app.post("/sessions/{sid}/append", response_model=SessionResponse,
+          dependencies=[Depends(require_api_key)])
+def append_session(sid: str, req: SessionAppendRequest) -> SessionResponse:
+    """Plain def: the DataFrame conversion and feature append run on the threadpool."""
+    sess = _get_session(sid)
+    rows = _session_rows(sess.kind, req)
+    if rows is None:
+        field = "bars" if sess.kind == "price" else "orderflow"
+        raise HTTPException(422, f"{sess.kind} session expects `{field}`")
+    return _session_response(sess, sess.append(rows))
+
+
+def _session_forecast_sync(sess: WindowSession) -> ForecastResponse:
+    with metrics.FORECAST_LATENCY.time(sess.kind):
+        loaded = _loaded(sess.symbol, sess.kind)
+        with metrics.FEATURIZE_LATENCY.time(sess.kind):
+            feats = sess.features(loaded.config["seq_len"])
+        unit = "bars" if sess.kind == "price" else "flow bars"
+        direction, conf, proba = _infer_window(sess.kind, loaded, feats, unit, sess.symbol)
+    return ForecastResponse(
+        symbol=sess.symbol, model=sess.kind, direction=direction,
+        confidence=conf, proba=proba,
+        rationale=f"{sess.kind} proba=[{proba[0]:.2f}/{proba[1]:.2f}/{proba[2]:.2f}] "
+                  f"(session, {sess.rows} rows)",
+        backends_used=[sess.kind],
+    )
+
+
+@app.post("/sessions/{sid}/forecast", response_model=ForecastResponse,
+          dependencies=[Depends(require_api_key)])
+async def forecast_session(sid: str) -> ForecastResponse:
+    sess = _get_session(sid)
+    return (await _dispatch([(_session_forecast_sync, (sess,))]))[0]
+
+
+@app.delete("/sessions/{sid}", status_code=status.HTTP_204_NO_CONTENT,
+            dependencies=[Depends(require_api_key)])
+async def close_session(sid: str) -> Response:
+    if SESSIONS is None or not SESSIONS.close(sid):
+        raise HTTPException(404, "unknown or expired session")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
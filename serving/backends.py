@@ -0,0 +1,139 @@
+"""Exported inference backends (TorchScript / ONNX Runtime) for the registry.
+
+`tools/export_models.py` writes, next to each checkpoint, an artifact plus a
+JSON sidecar recording the source checkpoint's sha256, the parity check and
+the benchmark:
+
+    BTC.pt            -> BTC.ts | BTC.onnx            (+ .int8 before the extension)
+    BTC.orderflow.pt  -> BTC.orderflow.ts | .onnx
+    contextual.pt     -> contextual.ts + contextual.macro.ts   (head + macro encoder)
+
+With DC_REGISTRY_BACKEND=torchscript|onnx (and DC_REGISTRY_INT8=true for the
+quantized variant) the registry serves an artifact only when its sidecar
+matches the checkpoint's sha and passed parity; anything else — no artifact,
+stale, failed parity, onnxruntime missing, fused models — falls back to eager.
+
+The adapters duck-type the slice of nn.Module the serving code calls
+(`eval()`, `__call__` for price/orderflow; `encode_macro` / `forward_encoded`
+for contextual), so app.py and price_transformer.predict_proba need no branches.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+log = logging.getLogger("dc-serve.backends")
+
+BACKENDS = ("eager", "torchscript", "onnx")
+EXPORTABLE = ("price", "orderflow", "contextual")
+_EXT = {"torchscript": "ts", "onnx": "onnx"}
+
+
+def artifact_path(ckpt: Path, backend: str, int8: bool = False, part: str = "") -> Path:
+    stem = ckpt.name[:-len(".pt")] if ckpt.name.endswith(".pt") else ckpt.stem
+    parts = [stem] + ([part] if part else []) + (["int8"] if int8 else []) + [_EXT[backend]]
+    return ckpt.with_name(".".join(parts))
+
+
+def sidecar_path(artifact: Path) -> Path:
+    return artifact.with_name(artifact.name + ".json")
+
+
+def artifact_parts(kind: str) -> tuple[str, ...]:
+    return ("", "macro") if kind == "contextual" else ("",)
+
+
+def read_sidecar(ckpt: Path, backend: str, int8: bool = False) -> dict | None:
+    path = sidecar_path(artifact_path(ckpt, backend, int8))
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+# ---- adapters --------------------------------------------------------------
+
+class OnnxModel:
+    """ORT session callable like the price/orderflow nn.Module: (B, T, F) -> logits."""
+
+    def __init__(self, sess: Any):
+        self.sess = sess
+
+    def eval(self) -> "OnnxModel":
+        return self
+
+    def __call__(self, x):
+        import torch
+        return torch.from_numpy(self.sess.run(None, {"x": x.numpy().astype(np.float32)})[0])
+
+
+class ExportedContextual:
+    """Contextual head + macro encoder artifacts behind the Contextual methods app.py uses."""
+
+    def __init__(self, head: Any, macro: Any, onnx: bool):
+        self.head, self.macro, self.onnx = head, macro, onnx
+
+    def eval(self) -> "ExportedContextual":
+        return self
+
+    def encode_macro(self, macro_x):
+        import torch
+        if self.onnx:
+            return torch.from_numpy(self.macro.run(None, {"macro_x": macro_x.numpy()})[0])
+        return self.macro(macro_x)
+
+    def forward_encoded(self, price_x, macro_h, asset_id) -> dict:
+        import torch
+        from deepCommodity.model.contextual_transformer import HORIZONS
+        if self.onnx:
+            out = torch.from_numpy(self.head.run(None, {
+                "price_x": price_x.numpy(), "macro_h": macro_h.numpy(),
+                "asset_id": asset_id.numpy().astype(np.int64)})[0])
+        else:
+            out = self.head(price_x, macro_h, asset_id)
+        return {h: out[:, i] for i, h in enumerate(HORIZONS)}
+
+
+def _open(path: Path, backend: str):
+    if backend == "onnx":
+        import onnxruntime as ort
+        return ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+    import torch
+    return torch.jit.load(str(path), map_location="cpu").eval()
+
+
+def open_artifact(kind: str, ckpt: Path, backend: str, int8: bool = False) -> tuple[Any, int]:
+    """(handle, artifact bytes) for the exported files of `ckpt`, unchecked."""
+    paths = [artifact_path(ckpt, backend, int8, part) for part in artifact_parts(kind)]
+    opened = [_open(p, backend) for p in paths]
+    nbytes = sum(p.stat().st_size for p in paths)
+    if kind == "contextual":
+        return ExportedContextual(opened[0], opened[1], onnx=backend == "onnx"), nbytes
+    return (OnnxModel(opened[0]) if backend == "onnx" else opened[0]), nbytes
+
+
+def load_artifact(kind: str, ckpt: Path, backend: str, int8: bool = False,
+                  source_sha: str = "") -> tuple[Any, int] | None:
+    """open_artifact() if the sidecar says it is current and passed parity, else None (eager)."""
+    if backend == "eager" or kind not in EXPORTABLE:
+        return None
+    side = read_sidecar(ckpt, backend, int8)
+    if side is None:
+        log.info("%s: no %s%s artifact; serving eager", ckpt.name, backend, " int8" if int8 else "")
+        return None
+    if source_sha and side.get("source_sha") != source_sha:
+        log.warning("%s: %s artifact is stale (checkpoint changed); serving eager", ckpt.name, backend)
+        return None
+    if not side.get("parity_ok"):
+        log.warning("%s: %s artifact failed parity (max delta %s); serving eager",
+                    ckpt.name, backend, side.get("max_proba_delta"))
+        return None
+    try:
+        return open_artifact(kind, ckpt, backend, int8)
+    except Exception as e:  # noqa: BLE001 — missing runtime, corrupt file, ...
+        log.warning("%s: cannot open %s artifact (%s); serving eager", ckpt.name, backend, e)
+        return None
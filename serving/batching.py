@@ -0,0 +1,97 @@
+"""Micro-batching for model inference.
+
+Concurrent requests that hit the same loaded model are coalesced into a single
+`predict_proba` forward pass. The first request for a key becomes the batch
+leader: it waits up to `max_wait_ms` for company, then runs everything queued
+under that key. A batch that reaches `max_batch` is flushed immediately by the
+request that filled it.
+
+Price / orderflow checkpoints are per-symbol weights, so the coalescing key is
+the loaded model (kind, symbol, handle) rather than the bare architecture — two
+symbols never share a forward pass, but the router, the watch loop and every
+item of a /forecast/batch call for the same model do.
+
+Multi-input models (contextual, fused) pass `x` as a tuple of arrays. Each
+component is stacked separately and `handle` is typically a bound forward
+function; see serving/app.py.
+
+Tunables (env):
+    DC_BATCH_MAX       max windows per forward pass      (default 32)
+    DC_BATCH_WAIT_MS   how long a leader waits to fill    (default 5)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+import numpy as np
+
+log = logging.getLogger("dc-serve.batching")
+
+# run_batch(handle, X (B, T, F) or a tuple of stacked arrays) -> proba (B, ...)
+BatchFn = Callable[[Any, Any], np.ndarray]
+# observe(key, batch_size, seconds) — called after every forward pass
+ObserveFn = Callable[[Hashable, int, float], None]
+
+
+class MicroBatcher:
+    def __init__(self, run_batch: BatchFn, max_batch: int = 32, max_wait_ms: float = 5.0,
+                 observe: ObserveFn | None = None):
+        self.run_batch = run_batch
+        self.observe = observe
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self._lock = threading.Lock()
+        self._pending: dict[Hashable, list[tuple[np.ndarray, Future]]] = {}
+
+    def infer(self, key: Hashable, handle: Any, x: np.ndarray | tuple) -> np.ndarray:
+        """Run one (T, F) window (or tuple of inputs) through `handle`, batched
+        with concurrent callers."""
+        fut: Future = Future()
+        full = None
+        with self._lock:
+            queue = self._pending.setdefault(key, [])
+            queue.append((x, fut))
+            leader = len(queue) == 1
+            if len(queue) >= self.max_batch:
+                full = self._pending.pop(key)
+        if full is not None:
+            self._run(key, handle, full)
+        elif leader:
+            if self.max_wait_s:
+                time.sleep(self.max_wait_s)
+            with self._lock:
+                batch = self._pending.pop(key, None)
+            if batch:
+                self._run(key, handle, batch)
+        return fut.result()
+
+    def _run(self, key: Hashable, handle: Any, batch: list[tuple[np.ndarray, Future]]) -> None:
+        t0 = time.perf_counter()
+        try:
+            proba = self.run_batch(handle, _collate([x for x, _ in batch]))
+        except Exception as e:  # noqa: BLE001
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        if self.observe is not None:
+            self.observe(key, len(batch), time.perf_counter() - t0)
+        for i, (_, fut) in enumerate(batch):
+            fut.set_result(proba[i])
+
+
+def _collate(xs: list) -> np.ndarray | tuple[np.ndarray, ...]:
+    if isinstance(xs[0], tuple):       # multi-input: stack per component, keep dtypes
+        return tuple(np.stack(col) for col in zip(*xs))
+    return np.stack(xs).astype(np.float32)
+
+
+def batcher_from_env(run_batch: BatchFn, observe: ObserveFn | None = None) -> MicroBatcher:
+    return MicroBatcher(run_batch,
+                        max_batch=int(os.getenv("DC_BATCH_MAX", "32")),
+                        max_wait_ms=float(os.getenv("DC_BATCH_WAIT_MS", "5")),
+                        observe=observe)
@@ -0,0 +1,125 @@
+"""Single-flight request coalescing + TTL/LRU response cache for the forecast API.
+
+The router and the watch loop often post the same (symbol, model, window) at
+the same moment. Requests are keyed by a hash of their body plus the
+registry generation (bumped on every reload that changes a checkpoint, so a
+new model never serves an old answer):
+
+    hit        a cached response younger than the TTL
+    coalesced  an identical request is already computing; await its result
+    miss       computed here; successful results are cached for the others
+
+Everything runs on the event loop, so no locks are needed. The computation runs
+as its own task, so a client that disconnects doesn't cancel it for the
+requests waiting on it. Errors are shared with the waiters but never cached.
+
+Tunables (env):
+    DC_RESPONSE_CACHE_TTL_SEC   seconds a response is reused (default 30; 0 = coalesce only)
+    DC_RESPONSE_CACHE_MAX       cached responses, LRU-evicted (default 1024)
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Sequence
+
+from serving.metrics import RESPONSE_CACHE
+
+HIT, MISS, COALESCED = "hit", "miss", "coalesced"
+
+
+def body_key(body: str, generation: int = 0) -> str:
+    return hashlib.blake2b(f"{generation}:{body}".encode(), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, ttl_sec: float = 30.0, max_entries: int = 1024):
+        self.ttl_sec = max(0.0, float(ttl_sec))
+        self.max_entries = max(1, int(max_entries))
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.counts = {HIT: 0, MISS: 0, COALESCED: 0}
+
+    async def get_many(self, keys: Sequence[Hashable],
+                       compute: Callable[[list[int]], Awaitable[list]],
+                       cacheable: Callable[[Any], bool] = lambda v: True) -> list[tuple[Any, str]]:
+        """[(value, status)] per key. `compute(indices)` is called at most once,
+        with the first index of every key that is neither cached nor in flight,
+        and returns their values in that order."""
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        out: list[tuple[Any, str] | None] = [None] * len(keys)
+        waits: dict[int, tuple[asyncio.Future, str]] = {}
+        mine: dict[Hashable, asyncio.Future] = {}
+        lead: list[int] = []
+        for i, key in enumerate(keys):
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                out[i] = (entry[1], HIT)
+            elif key in mine:                               # duplicate inside this call
+                waits[i] = (mine[key], COALESCED)
+            elif key in self._inflight:
+                waits[i] = (self._inflight[key], COALESCED)
+            else:
+                fut = mine[key] = self._inflight[key] = loop.create_future()
+                waits[i] = (fut, MISS)
+                lead.append(i)
+        if lead:
+            task = asyncio.ensure_future(self._fill([keys[i] for i in lead], lead, compute, cacheable))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())  # consumed via futures
+        for i, (fut, status) in waits.items():
+            out[i] = (await asyncio.shield(fut), status)
+        for _, status in out:
+            self.counts[status] += 1
+            RESPONSE_CACHE.inc(status)
+        return out  # type: ignore[return-value]
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]],
+                  cacheable: Callable[[Any], bool] = lambda v: True) -> tuple[Any, str]:
+        async def one(_: list[int]) -> list:
+            return [await compute()]
+        return (await self.get_many([key], one, cacheable))[0]
+
+    async def _fill(self, keys: list[Hashable], lead: list[int], compute, cacheable) -> None:
+        futs = [self._inflight[k] for k in keys]
+        try:
+            values = await compute(lead)
+        except BaseException as e:
+            for f in futs:
+                if f.done():
+                    continue
+                if isinstance(e, asyncio.CancelledError):
+                    f.cancel()
+                else:
+                    f.set_exception(e)
+                    f.exception()                           # retrieved even with no waiter
+            raise
+        finally:
+            for k in keys:
+                self._inflight.pop(k, None)
+        expires = time.monotonic() + self.ttl_sec
+        for k, f, v in zip(keys, futs, values):
+            if self.ttl_sec and cacheable(v):
+                self._entries[k] = (expires, v)
+                self._entries.move_to_end(k)
+            f.set_result(v)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        served = sum(self.counts.values())
+        return {"entries": len(self._entries), "ttl_sec": self.ttl_sec, **self.counts,
+                "hit_rate": round((self.counts[HIT] + self.counts[COALESCED]) / served, 4)
+                if served else None}
+
+
+def response_cache_from_env() -> ResponseCache:
+    return ResponseCache(ttl_sec=float(os.getenv("DC_RESPONSE_CACHE_TTL_SEC", "30")),
+                         max_entries=int(os.getenv("DC_RESPONSE_CACHE_MAX", "1024")))
@@ -0,0 +1,112 @@
+"""Cache of encoder outputs shared across requests.
+
+The contextual model's macro encoder sees the same macro window for every
+asset on a given date. Its (1, d_model) output is computed once per
+(model, macro date, window digest) and reused by every request and batch item
+that carries that window. Concurrent misses on one key compute it once; the
+others wait for that result.
+
+Price / orderflow specialists also store the last-step embedding of every
+window they run, keyed by `window_key` = (encoder weight digest, window digest,
+asset id). A fused checkpoint whose encoder weights match the specialist's
+(encoders frozen when the trunk was trained) finds them there. A fused
+forecast after the specialists' pass over the same windows then only runs
+its trunk MLP. The window digest rather than a timestamp pins the exact
+input, since requests need not carry timestamps.
+
+Tunables (env):
+    DC_ENCODING_CACHE_MAX   cached encodings, LRU-evicted (default 4096)
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import numpy as np
+
+from serving.metrics import ENCODING_CACHE
+
+
+def array_digest(a: np.ndarray) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(a).tobytes(), digest_size=8).hexdigest()
+
+
+def module_digest(module, skip: tuple[str, ...] = ("head.",)) -> str:
+    """Digest of a module's weights, minus the `skip`-prefixed entries (the
+    class head), so equal digests mean equal encoders."""
+    h = hashlib.blake2b(digest_size=8)
+    for name, t in sorted(module.state_dict().items()):
+        if not name.startswith(skip):
+            h.update(name.encode())
+            h.update(t.detach().cpu().contiguous().numpy().tobytes())
+    return h.hexdigest()
+
+
+def window_key(encoder_sha: str, window: np.ndarray, asset_id: int = 0) -> tuple:
+    """Cache key of one (T, F) window's embedding under a given encoder."""
+    return encoder_sha, array_digest(np.asarray(window, dtype=np.float32)), int(asset_id)
+
+
+class EncodingCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, encoder: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """`encoder` names the series in dc_encoding_cache_total."""
+        key = (encoder, key)
+        with self._lock:
+            if key in self._entries:
+                return self._hit(encoder, key)
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    return self._hit(encoder, key)
+            value = compute()
+            with self._lock:
+                self._entries[key] = value
+                self._key_locks.pop(key, None)
+                self.misses += 1
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            ENCODING_CACHE.inc(encoder, "miss")
+            return value
+
+    def peek(self, encoder: str, key: Hashable) -> Any | None:
+        """The cached value, or None (counted as a miss); never computes."""
+        key = (encoder, key)
+        with self._lock:
+            if key in self._entries:
+                return self._hit(encoder, key)
+            self.misses += 1
+        ENCODING_CACHE.inc(encoder, "miss")
+        return None
+
+    def put(self, encoder: str, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[(encoder, key)] = value
+            self._entries.move_to_end((encoder, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _hit(self, encoder: str, key: Hashable) -> Any:
+        """Caller holds the lock."""
+        self._entries.move_to_end(key)
+        self.hits += 1
+        ENCODING_CACHE.inc(encoder, "hit")
+        return self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def encodings_from_env() -> EncodingCache:
+    return EncodingCache(int(os.getenv("DC_ENCODING_CACHE_MAX", "4096")))
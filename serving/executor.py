@@ -0,0 +1,77 @@
+"""Bounded inference executor with admission control.
+
+The forecast handlers are `async def` and hand their (blocking) featurization +
+torch work to this pool, so the event loop — and with it `/health` — never waits
+on a forward pass. Capacity is `max_workers` running + `max_queue` waiting; past
+that, `submit` raises `ExecutorSaturated` immediately and the app answers 503
+with Retry-After instead of letting latency grow without bound.
+
+Threads, not processes: torch releases the GIL during inference and the model
+registry lives in this process's memory.
+
+Tunables (env):
+    DC_INFER_WORKERS     concurrent inference threads   (default: cpu count)
+    DC_INFER_QUEUE       extra requests allowed to wait (default 64)
+    DC_RETRY_AFTER_SEC   Retry-After hint on a 503      (default 1)
+"""
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when a submission would exceed the executor's capacity."""
+
+
+class BoundedExecutor:
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max(1, int(max_workers))
+        self.capacity = self.max_workers + max(0, int(max_queue))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                        thread_name_prefix="dc-infer")
+        self._lock = threading.Lock()
+        self._inflight = 0
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        return self.submit_many([(fn, args)])[0]
+
+    def submit_many(self, calls: list[tuple[Callable[..., Any], tuple]]) -> list[Future]:
+        """All-or-nothing admission: either every call is queued or none is.
+
+        An idle executor always admits, so a batch larger than `capacity` is
+        served when the box is quiet instead of being refused forever.
+        """
+        with self._lock:
+            if self._inflight and self._inflight + len(calls) > self.capacity:
+                raise ExecutorSaturated(
+                    f"{self._inflight} in flight + {len(calls)} > capacity {self.capacity}")
+            self._inflight += len(calls)
+        futures = []
+        for fn, args in calls:
+            fut = self._pool.submit(fn, *args)
+            fut.add_done_callback(self._release)
+            futures.append(fut)
+        return futures
+
+    def _release(self, _fut: Future) -> None:
+        with self._lock:
+            self._inflight -= 1
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def executor_from_env() -> BoundedExecutor:
+    return BoundedExecutor(max_workers=int(os.getenv("DC_INFER_WORKERS", str(os.cpu_count() or 1))),
+                           max_queue=int(os.getenv("DC_INFER_QUEUE", "64")))
+
+
+def retry_after_sec() -> str:
+    return os.getenv("DC_RETRY_AFTER_SEC", "1")
@@ -0,0 +1,365 @@
+"""Load generator for the inference API: replay a forecast request mix, report latency.
+
+Builds a pool of `ForecastRequest` bodies per (symbol, model) from the bar /
+order-flow CSVs under --bars-dir / --orderflow-dir (the ones tools/forecast.py
+sends), or from synthetic random walks when a CSV is missing. Each body is a
+window of one of the --rows sizes, cut at a different offset, so the server
+sees realistic variety. Traffic is either
+
+    open loop    --rps R          requests start on a fixed schedule whatever the latency
+    closed loop  --concurrency N  N clients each send the next request when the last returns
+
+for --duration seconds after --warmup. The report has p50/p95/p99/max latency
+of successful requests, throughput, error rate and status counts, and X-Cache
+results, overall and per model. It is written to --out as JSON, with the git
+commit and run config, and --compare prints the deltas against an earlier run.
+
+Bodies repeat once the pool is used up, so the server's response cache
+(serving/caching.py) answers some of them. Raise --pool, or start the server
+with DC_RESPONSE_CACHE_TTL_SEC=0, to measure inference alone.
+
+    python -m serving.loadtest --start-local --models-dir data/models --rps 50 --duration 30
+    python -m serving.loadtest --url http://10.0.0.5:8080 --concurrency 16 \\
+        --mix price=0.6,orderflow=0.2,ensemble=0.2 --compare data/loadtest/last.json
+
+Needs httpx (pip install httpx); the server itself doesn't.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from serving.wire import BAR_COLUMNS, ORDERFLOW_COLUMNS, encode_window  # noqa: E402
+
+COMPARE_KEYS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "error_rate")
+
+
+@dataclass
+class Scenario:
+    mix: dict[str, float] = field(default_factory=lambda: {"price": 0.5, "orderflow": 0.3,
+                                                           "ensemble": 0.2})
+    symbols: tuple[str, ...] = ("BTC", "ETH")
+    rows: tuple[int, ...] = (256, 1024)
+    pool: int = 16                     # distinct bodies per (symbol, model)
+    encoding: str = "packed"           # packed | json
+    bars_dir: str | None = None
+    orderflow_dir: str | None = None
+    seed: int = 0
+
+
+@dataclass
+class Sample:
+    model: str
+    t: float                           # seconds since the run started
+    latency_ms: float
+    status: int                        # 0 = transport error / timeout
+    cache: str | None = None
+
+
+# ---- request bodies ---------------------------------------------------------
+
+def synthetic_bars(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    spread = np.abs(rng.normal(0, 0.004, n))
+    return pd.DataFrame({"open": close * (1 + rng.normal(0, 0.002, n)),
+                         "high": close * (1 + spread), "low": close * (1 - spread),
+                         "close": close, "volume": rng.lognormal(7, 0.5, n)})
+
+
+def synthetic_orderflow(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame({"signed_volume": rng.normal(0, 5, n),
+                         "trade_count": rng.poisson(20, n).astype(float) + 1,
+                         "mean_size": rng.lognormal(0, 0.3, n),
+                         "vwap_drift": rng.normal(0, 1e-4, n)})
+
+
+def _frame(directory: str | None, symbol: str, columns: tuple[str, ...]) -> pd.DataFrame | None:
+    if not directory:
+        return None
+    path = Path(directory) / f"{symbol}.csv"
+    if not path.exists():
+        return None
+    df = pd.read_csv(path)
+    return df[list(columns)].astype(float) if set(columns) <= set(df.columns) else None
+
+
+def _window(df: pd.DataFrame, columns: tuple[str, ...], encoding: str) -> dict:
+    if encoding == "packed":
+        return encode_window(df, columns)
+    return {c: df[c].astype(float).tolist() for c in columns}
+
+
+def build_bodies(scn: Scenario) -> dict[str, list[dict]]:
+    """model -> request bodies (all symbols). Windows are cut at staggered offsets
+    of the real series, or of a synthetic one long enough for every size."""
+    rng = np.random.default_rng(scn.seed)
+    longest = max(scn.rows)
+    out: dict[str, list[dict]] = {m: [] for m in scn.mix}
+    for sym in scn.symbols:
+        bars = _frame(scn.bars_dir, sym, BAR_COLUMNS)
+        flow = _frame(scn.orderflow_dir, sym, ORDERFLOW_COLUMNS)
+        if bars is None or len(bars) < 2:
+            bars = synthetic_bars(longest + scn.pool, rng)
+        if flow is None or len(flow) < 2:
+            flow = synthetic_orderflow(longest + scn.pool, rng)
+        for i in range(scn.pool):
+            n = scn.rows[i % len(scn.rows)]
+            end_b = len(bars) - (i * max(1, (len(bars) - n) // scn.pool) if len(bars) > n else 0)
+            end_f = len(flow) - (i * max(1, (len(flow) - n) // scn.pool) if len(flow) > n else 0)
+            b = bars.iloc[max(0, end_b - n):end_b]
+            f = flow.iloc[max(0, end_f - n):end_f]
+            for model in scn.mix:
+                body: dict = {"symbol": sym, "model": model}
+                if model in ("price", "ensemble", "fused", "contextual"):
+                    body["bars"] = _window(b, BAR_COLUMNS, scn.encoding)
+                if model in ("orderflow", "ensemble", "fused"):
+                    body["orderflow"] = _window(f, ORDERFLOW_COLUMNS, scn.encoding)
+                if model == "ensemble":
+                    c = b["close"].to_numpy()
+                    body["pct_change_24h"] = float(100 * (c[-1] / c[-min(len(c), 25)] - 1))
+                    body["pct_change_7d"] = float(100 * (c[-1] / c[0] - 1))
+                out[model].append(body)
+    return out
+
+
+# ---- traffic ------------------------------------------------------------------
+
+def _client(url: str, api_key: str | None, timeout: float, connections: int, transport=None):
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("serving.loadtest needs httpx: pip install httpx") from None
+    headers = {"X-API-Key": api_key} if api_key else {}
+    return httpx.AsyncClient(base_url=url, headers=headers, timeout=timeout, transport=transport,
+                             limits=httpx.Limits(max_connections=connections,
+                                                 max_keepalive_connections=connections))
+
+
+async def _send(client, model: str, body: dict, t0: float) -> Sample:
+    start = time.perf_counter()
+    try:
+        r = await client.post("/forecast", json=body)
+        status, cache = r.status_code, r.headers.get("x-cache")
+    except Exception:  # noqa: BLE001 — timeouts / refused connections count as errors
+        status, cache = 0, None
+    end = time.perf_counter()
+    return Sample(model, start - t0, (end - start) * 1000, status, cache)
+
+
+async def run(url: str, bodies: dict[str, list[dict]], mix: dict[str, float], *,
+              rps: float | None = None, concurrency: int = 8, duration: float = 10.0,
+              warmup: float = 2.0, api_key: str | None = None, timeout: float = 30.0,
+              seed: int = 0, transport=None) -> tuple[list[Sample], float]:
+    """(samples after warm-up, measured wall seconds)."""
+    rng = np.random.default_rng(seed)
+    models = [m for m in mix if bodies.get(m)]
+    if not models:
+        raise ValueError("no request bodies for the requested mix")
+    weights = np.array([mix[m] for m in models], dtype=float)
+    weights /= weights.sum()
+
+    def pick() -> tuple[str, dict]:
+        m = models[rng.choice(len(models), p=weights)]
+        return m, bodies[m][rng.integers(len(bodies[m]))]
+
+    end_at = warmup + duration
+    connections = max(concurrency, int((rps or 0) * 2) + 1)
+    async with _client(url, api_key, timeout, connections, transport) as client:
+        t0 = time.perf_counter()
+        if rps:
+            tasks, i = [], 0
+            while (due := i / rps) < end_at:
+                await asyncio.sleep(max(0.0, t0 + due - time.perf_counter()))
+                tasks.append(asyncio.ensure_future(_send(client, *pick(), t0)))
+                i += 1
+            samples = list(await asyncio.gather(*tasks))
+        else:
+            samples = []
+
+            async def worker():
+                while time.perf_counter() - t0 < end_at:
+                    samples.append(await _send(client, *pick(), t0))
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = max(1e-9, min(time.perf_counter() - t0, end_at) - warmup)
+    return [s for s in samples if s.t >= warmup], wall
+
+
+# ---- report -------------------------------------------------------------------
+
+def _stats(samples: list[Sample], wall: float) -> dict:
+    ok = np.array([s.latency_ms for s in samples if 200 <= s.status < 300])
+    n = len(samples)
+    pct = (lambda q: round(float(np.percentile(ok, q)), 2)) if len(ok) else (lambda q: None)
+    return {
+        "requests": n,
+        "ok": int(len(ok)),
+        "error_rate": round(1 - len(ok) / n, 4) if n else None,
+        "throughput_rps": round(len(ok) / wall, 2),
+        "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+        "max_ms": round(float(ok.max()), 2) if len(ok) else None,
+        "status": {str(k): v for k, v in sorted(Counter(s.status for s in samples).items())},
+        "cache": dict(Counter(s.cache for s in samples if s.cache)),
+    }
+
+
+def summarize(samples: list[Sample], wall: float) -> dict:
+    by_model = {m: _stats([s for s in samples if s.model == m], wall)
+                for m in sorted({s.model for s in samples})}
+    return {"overall": _stats(samples, wall), "by_model": by_model, "wall_sec": round(wall, 3)}
+
+
+def compare(cur: dict, prev: dict) -> dict:
+    """Per-metric {prev, cur, delta_pct} for the overall and per-model stats."""
+    def one(a: dict, b: dict) -> dict:
+        out = {}
+        for k in COMPARE_KEYS:
+            x, y = b.get(k), a.get(k)
+            if x is None or y is None:
+                continue
+            out[k] = {"prev": x, "cur": y, "delta_pct": round(100 * (y - x) / x, 1) if x else None}
+        return out
+    res = {"overall": one(cur["summary"]["overall"], prev["summary"]["overall"])}
+    for m, st in cur["summary"]["by_model"].items():
+        if m in prev["summary"].get("by_model", {}):
+            res[m] = one(st, prev["summary"]["by_model"][m])
+    return res
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                              capture_output=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save(result: dict, out_dir: Path, label: str = "") -> Path:
+    """Write the run as loadtest_<utc stamp>[_label].json and refresh last.json."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = out_dir / f"loadtest_{stamp}{'_' + label if label else ''}.json"
+    text = json.dumps(result, indent=2)
+    path.write_text(text)
+    (out_dir / "last.json").write_text(text)
+    return path
+
+
+# ---- local server ---------------------------------------------------------------
+
+def start_local(port: int, models_dir: str | None, wait_sec: float = 60.0) -> subprocess.Popen:
+    """uvicorn serving.app:app on 127.0.0.1:port, returned once /ready (models warm).
+    Server knobs (DC_BATCH_MAX, WEB_CONCURRENCY, ...) come from this environment."""
+    import httpx
+    env = {**os.environ, "DC_ALLOW_OPEN": os.getenv("DC_ALLOW_OPEN", "true")}
+    if models_dir:
+        env["MODELS_DIR"] = str(Path(models_dir).resolve())
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "serving.app:app",
+                             "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+                            cwd=ROOT, env=env)
+    deadline = time.time() + wait_sec
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"local server exited with {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    proc.terminate()
+    raise SystemExit(f"local server not ready after {wait_sec}s")
+
+
+def _parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, w = part.partition("=")
+        mix[name.strip()] = float(w or 1)
+    return mix
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("--url", default=os.getenv("DC_API_URL", "http://127.0.0.1:8080"))
+    p.add_argument("--api-key", default=os.getenv("DC_API_KEY"))
+    p.add_argument("--start-local", action="store_true", help="launch uvicorn on --port first")
+    p.add_argument("--port", type=int, default=8089)
+    p.add_argument("--models-dir", default=None, help="MODELS_DIR for --start-local")
+    p.add_argument("--mix", default="price=0.5,orderflow=0.3,ensemble=0.2")
+    p.add_argument("--symbols", default="BTC,ETH")
+    p.add_argument("--rows", default="256,1024", help="window sizes, cycled through the pool")
+    p.add_argument("--pool", type=int, default=16, help="distinct bodies per (symbol, model)")
+    p.add_argument("--encoding", choices=["packed", "json"], default="packed")
+    p.add_argument("--bars-dir", default=None)
+    p.add_argument("--orderflow-dir", default=None)
+    load = p.add_mutually_exclusive_group()
+    load.add_argument("--rps", type=float, default=None, help="open loop: requests per second")
+    load.add_argument("--concurrency", type=int, default=8, help="closed loop: parallel clients")
+    p.add_argument("--duration", type=float, default=10.0)
+    p.add_argument("--warmup", type=float, default=2.0)
+    p.add_argument("--timeout", type=float, default=30.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", default=str(ROOT / "data" / "loadtest"))
+    p.add_argument("--label", default="")
+    p.add_argument("--compare", default=None, help="earlier result JSON to diff against")
+    args = p.parse_args()
+
+    scn = Scenario(mix=_parse_mix(args.mix), symbols=tuple(s.strip().upper() for s in args.symbols.split(",")),
+                   rows=tuple(int(r) for r in args.rows.split(",")), pool=args.pool,
+                   encoding=args.encoding, bars_dir=args.bars_dir, orderflow_dir=args.orderflow_dir,
+                   seed=args.seed)
+    bodies = build_bodies(scn)
+    prev = json.loads(Path(args.compare).read_text()) if args.compare else None
+
+    url, proc = args.url, None
+    if args.start_local:
+        proc = start_local(args.port, args.models_dir)
+        url = f"http://127.0.0.1:{args.port}"
+    try:
+        samples, wall = asyncio.run(run(url, bodies, scn.mix, rps=args.rps, concurrency=args.concurrency,
+                                        duration=args.duration, warmup=args.warmup,
+                                        api_key=args.api_key, timeout=args.timeout, seed=args.seed))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    result = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "url": url,
+        "host": {"cpus": os.cpu_count(), "python": platform.python_version(),
+                 "machine": platform.machine()},
+        "load": {"rps": args.rps, "concurrency": None if args.rps else args.concurrency,
+                 "duration": args.duration, "warmup": args.warmup},
+        "scenario": asdict(scn),
+        "server_env": {k: v for k, v in os.environ.items() if k.startswith("DC_") and k != "DC_API_KEY"}
+        if args.start_local else None,
+        "summary": summarize(samples, wall),
+    }
+    path = save(result, Path(args.out), args.label)
+    report = {"saved": str(path), "summary": result["summary"]}
+    if prev is not None:
+        report["compare"] = compare(result, prev)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Per-process memory breakdown for /health and /metrics (Linux; None elsewhere).
+
+From /proc/self/smaps_rollup:
+    rss_bytes            resident pages mapped by this process
+    pss_bytes            RSS with shared pages divided among the processes sharing them
+    shared_bytes         resident pages also mapped by another process
+    private_bytes        resident pages only this process maps
+    anon_bytes           anonymous (heap) pages: what this worker alone costs.
+                         Copied weights land here; mmap-loaded weights are file
+                         pages instead, private while one worker maps them and
+                         shared (split in pss) once several do.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+SMAPS_ROLLUP = Path("/proc/self/smaps_rollup")
+
+
+def _parse(text: str) -> dict[str, int]:
+    kb: dict[str, int] = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        parts = rest.split()
+        if len(parts) == 2 and parts[1] == "kB":
+            kb[name] = int(parts[0]) * 1024
+    return kb
+
+
+def process_memory(path: Path = SMAPS_ROLLUP) -> dict | None:
+    try:
+        f = _parse(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if "Rss" not in f:
+        return None
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": f["Rss"],
+        "pss_bytes": f.get("Pss", 0),
+        "shared_bytes": f.get("Shared_Clean", 0) + f.get("Shared_Dirty", 0),
+        "private_bytes": f.get("Private_Clean", 0) + f.get("Private_Dirty", 0),
+        "anon_bytes": f.get("Anonymous", 0),
+    }
@@ -0,0 +1,200 @@
+"""Prometheus text-format metrics for the inference API, dependency-free.
+
+Hot-path cost is one bisect + one uncontended lock per observation; gauges that
+describe state elsewhere (registry, executor) are read lazily at scrape time via
+callbacks, so nothing is maintained for them between scrapes.
+
+Exposed at GET /metrics (text/plain; version=0.0.4):
+    dc_http_requests_total{endpoint,status}      counter
+    dc_http_request_seconds{endpoint}            histogram
+    dc_http_inflight_requests                    gauge
+    dc_forecast_seconds{model}                   histogram   whole forecast per model kind
+    dc_featurize_seconds{kind}                   histogram   make_features
+    dc_inference_seconds{kind}                   histogram   one batched forward pass
+    dc_batch_size{kind}                          histogram   windows per forward pass
+    dc_reload_seconds                            histogram
+    dc_encoding_cache_total{encoder,result}      counter     hit / miss
+    dc_executor_inflight / dc_registry_*         gauges (scrape-time callbacks)
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Callable
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+RELOAD_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+_METRICS: dict[str, object] = {}    # name -> metric, in registration order
+
+
+def _register(m) -> None:
+    # re-registering a name (e.g. serving.app re-imported) replaces the old metric
+    _METRICS[m.name] = m
+
+
+def _fmt_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help_, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for lv, v in sorted(self._values.items()):
+                out.append(f"{self.name}{_fmt_labels(self.labels, lv)} {v:g}")
+        return out
+
+
+class Histogram:
+    def __init__(self, name: str, help_: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_, labels, tuple(buckets)
+        self._series: dict[tuple, list] = {}    # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _register(self)
+
+    def observe(self, value: float, *label_values) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(label_values)
+            if s is None:
+                s = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def time(self, *label_values) -> "_Timer":
+        return _Timer(self, label_values)
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for lv, s in sorted(series.items()):
+            cum = 0
+            for b, c in zip(self.buckets + (float("inf"),), s[:-2]):
+                cum += c
+                le = 'le="+Inf"' if b == float("inf") else f'le="{b:g}"'
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, lv, le)} {cum}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, lv)} {s[-2]:.6g}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, lv)} {s[-1]}")
+        return out
+
+
+class _Timer:
+    __slots__ = ("hist", "labels", "t0")
+
+    def __init__(self, hist: Histogram, labels: tuple):
+        self.hist, self.labels = hist, labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc):
+        self.hist.observe(time.perf_counter() - self.t0, *self.labels)
+
+
+class Gauge:
+    """Value read at scrape time from `fn` (a number, or {label_value: number})."""
+
+    def __init__(self, name: str, help_: str, fn: Callable[[], float | dict] | None = None,
+                 label: str | None = None):
+        self.name, self.help, self.fn, self.label = name, help_, fn, label
+        self._value = 0.0
+        self._lock = threading.Lock()
+        _register(self)
+
+    def add(self, amount: float) -> None:
+        with self._lock:
+            self._value += amount
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            v = self.fn() if self.fn is not None else self._value
+        except Exception:  # noqa: BLE001 — a broken callback must not break the scrape
+            return out
+        if isinstance(v, dict):
+            for k, x in sorted(v.items()):
+                out.append(f'{self.name}{{{self.label}="{k}"}} {x:g}')
+        elif v is not None:
+            out.append(f"{self.name} {v:g}")
+        return out
+
+
+def render() -> str:
+    lines: list[str] = []
+    for m in list(_METRICS.values()):
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---- metric definitions -----------------------------------------------------
+
+HTTP_REQUESTS = Counter("dc_http_requests_total", "HTTP requests by endpoint and status",
+                        ("endpoint", "status"))
+HTTP_LATENCY = Histogram("dc_http_request_seconds", "HTTP request latency incl. JSON parsing",
+                         ("endpoint",))
+HTTP_INFLIGHT = Gauge("dc_http_inflight_requests", "HTTP requests currently being served")
+FORECAST_LATENCY = Histogram("dc_forecast_seconds", "Forecast latency per model kind (in executor)",
+                             ("model",))
+FEATURIZE_LATENCY = Histogram("dc_featurize_seconds", "make_features latency per model kind",
+                              ("kind",))
+INFERENCE_LATENCY = Histogram("dc_inference_seconds", "Batched forward-pass latency per model kind",
+                              ("kind",))
+BATCH_SIZE = Histogram("dc_batch_size", "Windows per forward pass", ("kind",), BATCH_BUCKETS)
+RELOAD_LATENCY = Histogram("dc_reload_seconds", "Registry reload duration", (), RELOAD_BUCKETS)
+ENCODING_CACHE = Counter("dc_encoding_cache_total", "Shared encoder-output cache lookups",
+                         ("encoder", "result"))
+RESPONSE_CACHE = Counter("dc_response_cache_total", "Forecast responses by cache result",
+                         ("result",))
+
+
+class MetricsMiddleware:
+    """Pure-ASGI request counter/timer (cheaper than BaseHTTPMiddleware).
+
+    The endpoint label is the matched route template (`/sessions/{sid}/append`),
+    which the router leaves in the shared scope; unmatched paths are `other`, so
+    a scanner can't blow up series cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_INFLIGHT.add(1)
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_INFLIGHT.add(-1)
+            endpoint = getattr(scope.get("route"), "path", None) or "other"
+            HTTP_LATENCY.observe(time.perf_counter() - t0, endpoint)
+            HTTP_REQUESTS.inc(endpoint, str(status["code"]))
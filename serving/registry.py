@@ -1,23 +1,71 @@
-"""Model registry: loads checkpoints from disk into memory at startup, supports
-hot-reload, and exposes typed accessors per modality.
+"""Model registry: loads checkpoints from disk into memory, supports hot-reload,
+and exposes typed accessors per modality.
 
 Layout convention:
     $MODELS_DIR/<SYMBOL>.pt              - price transformer
     $MODELS_DIR/<SYMBOL>.orderflow.pt    - order-flow transformer
-    $MODELS_DIR/fused/<SYMBOL>.pt        - fused multi-modal (optional)
+    $MODELS_DIR/<SYMBOL>.fused.pt        - fused multi-modal (optional)
+    $MODELS_DIR/contextual.pt            - global macro-contextual model, keyed
+                                           ("GLOBAL", "contextual") (optional)
+    $MODELS_DIR/price.global.pt          - cross-asset price model, keyed
+                                           ("GLOBAL", "price"); serves every symbol
+                                           without its own <SYMBOL>.pt (optional)
 
-Models are immutable in memory once loaded; reload swaps the entire registry
+Two modes:
+    eager (default)  every checkpoint is deserialized at startup / on reload.
+    lazy             startup only indexes checkpoints (path, kind, size, mtime);
+                     a model is loaded on its first request and the least-recently
+                     used ones are evicted once resident weights exceed the memory
+                     budget. Select with DC_REGISTRY_LAZY=true and
+                     DC_REGISTRY_BUDGET_MB (0 = unbounded).
+
+Reload is incremental: the directory is diffed by (size, mtime) and, where those
+moved on an already-hashed entry, by content hash (a checkpoint is hashed on its
+first load, never at index time); only new or changed checkpoints are deserialized, in
+parallel on a small pool (DC_RELOAD_WORKERS), and unchanged models stay the
+same objects. Set DC_RELOAD_WATCH_SEC > 0 to poll the directory and reload
+automatically when the training job drops a new `.pt`.
+
+Weights: with DC_REGISTRY_MMAP=true checkpoints are memory-mapped read-only
+(torch.load(mmap=True)) and the modules adopt those tensors in place instead
+of copying them, so every uvicorn worker on the box shares the same page-cache
+pages for the weights instead of holding a private copy each. The default
+copies weights into process memory, as before.
+
+Backends: DC_REGISTRY_BACKEND=torchscript|onnx serves the artifacts written
+by tools/export_models.py instead of the eager modules (DC_REGISTRY_INT8=true
+for the quantized ones). A checkpoint without an up-to-date, parity-checked
+artifact is served eager; see serving/backends.py. Re-exporting counts as a
+change, so /reload and the watcher pick up new artifacts.
+
+Offline tools (tools/export_models.py) read checkpoints the way the registry
+does through checkpoint_entry() and load_eager(); the rest is private.
+
+An optional `warm` hook (serving/warmup.py) runs on every model loaded by a
+reload or on demand, before it becomes visible, so it never serves cold.
+
+Models are immutable in memory once loaded; reload swaps the index/models
 atomically so in-flight requests see a consistent snapshot.
 """
 from __future__ import annotations
 
+import contextlib
+import dataclasses
+import hashlib
 import logging
 import os
 import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+
+from deepCommodity.util import envbool
+from serving.backends import BACKENDS, artifact_path, load_artifact, sidecar_path
+from serving.encodings import module_digest
+from serving.metrics import RELOAD_LATENCY
 
 log = logging.getLogger("dc-serve.registry")
 
@@ -25,88 +73,413 @@ log = logging.getLogger("dc-serve.registry")
 @dataclass
 class LoadedModel:
     symbol: str
-    kind: str                      # "price" | "orderflow" | "fused"
+    kind: str                      # "price" | "orderflow" | "fused" | "contextual"
     path: Path
     config: dict
-    handle: Any                    # torch.nn.Module
+    handle: Any                    # torch.nn.Module, or a serving.backends adapter
     loaded_at: float = field(default_factory=time.time)
+    nbytes: int = 0                # parameter + buffer bytes (artifact bytes if exported)
+    meta: dict = field(default_factory=dict)   # contextual: norm + asset symbols; global price:
+                                               # symbols; price/orderflow/fused: encoder digests
+    backend: str = "eager"
+
+
+@dataclass(frozen=True)
+class CheckpointEntry:
+    symbol: str
+    kind: str
+    path: Path
+    size: int
+    mtime: float
+    sha: str = ""                  # content hash, set on first load; equal sha == same weights
+    artifact: str = ""             # exported-artifact sidecar stamp, "" if none
+
+    @property
+    def version(self) -> tuple[str, str]:
+        return self.sha, self.artifact
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+GLOBAL_SYMBOL = "GLOBAL"              # key of models that cover many assets
+CONTEXTUAL_SYMBOL = GLOBAL_SYMBOL
+
+
+def _classify(f: Path) -> tuple[str, str]:
+    """File name -> (SYMBOL, kind)."""
+    if f.name == "contextual.pt":
+        return CONTEXTUAL_SYMBOL, "contextual"
+    if f.name == "price.global.pt":
+        return GLOBAL_SYMBOL, "price"
+    if ".orderflow" in f.name:
+        return f.name.replace(".orderflow.pt", "").upper(), "orderflow"
+    if f.name.endswith(".fused.pt"):
+        return f.name.replace(".fused.pt", "").upper(), "fused"
+    return f.stem.upper(), "price"
+
+
+def checkpoint_entry(f: Path, hashed: bool = True) -> CheckpointEntry:
+    """Index entry for one checkpoint file: (symbol, kind) from its name, stat,
+    and with `hashed` the content sha the registry records on first load."""
+    symbol, kind = _classify(f)
+    st = f.stat()
+    return CheckpointEntry(symbol, kind, f, st.st_size, st.st_mtime,
+                           _file_sha256(f) if hashed else "")
+
+
+def _module_nbytes(m) -> int:
+    return sum(t.numel() * t.element_size() for t in m.state_dict().values())
+
+
+def _artifact_stamp(f: Path, backend: str, int8: bool) -> str:
+    if backend == "eager":
+        return ""
+    try:
+        st = sidecar_path(artifact_path(f, backend, int8)).stat()
+    except OSError:
+        return ""
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _load_checkpoint(entry: CheckpointEntry, backend: str = "eager",
+                     int8: bool = False, mmap: bool = False) -> LoadedModel:
+    lm = load_eager(entry, mmap)
+    exported = load_artifact(entry.kind, entry.path, backend, int8, entry.sha)
+    if exported is not None:
+        lm.handle, lm.nbytes = exported
+        lm.backend = backend + ("-int8" if int8 else "")
+    return lm
+
+
+def load_eager(entry: CheckpointEntry, mmap: bool = False) -> LoadedModel:
+    """The eager (torch.nn.Module) model of a checkpoint, with the meta the app
+    reads. mmap: map the file and adopt its tensors (modules built on the meta
+    device, so no throwaway init weights are allocated); else copy them in."""
+    import torch
+    ckpt = torch.load(entry.path, map_location="cpu", mmap=mmap)
+    build = torch.device("meta") if mmap else contextlib.nullcontext()
+    if entry.kind == "fused":
+        from deepCommodity.model.fused_transformer import load_fused
+        with build:
+            m = load_fused(ckpt, assign=mmap)
+        return LoadedModel(symbol=entry.symbol, kind=entry.kind, path=entry.path,
+                           config=ckpt["config"], handle=m, nbytes=_module_nbytes(m),
+                           meta={"price_config": ckpt.get("price_config"),
+                                 "orderflow_config": ckpt.get("orderflow_config"),
+                                 **{f"{k}_encoder_sha": module_digest(getattr(m, k))
+                                    for k in ("price", "orderflow") if getattr(m, k) is not None}})
+    if entry.kind == "contextual":
+        from deepCommodity.model.contextual_transformer import ContextualConfig, build_model
+        with build:
+            m = build_model(ContextualConfig(**ckpt["config"]))
+        m.load_state_dict(ckpt["state_dict"], assign=mmap)
+        m.eval()
+        return LoadedModel(symbol=entry.symbol, kind=entry.kind, path=entry.path,
+                           config=ckpt["config"], handle=m, nbytes=_module_nbytes(m),
+                           meta={"norm": ckpt["norm"],
+                                 "symbols": list(ckpt.get("meta", {}).get("symbols", [])),
+                                 "macro_encoder_sha": module_digest(m.macro_enc)})
+    if entry.kind == "orderflow":
+        from deepCommodity.model.orderflow_transformer import (
+            OrderflowConfig as Cfg,
+            build_model,
+        )
+    else:
+        from deepCommodity.model.price_transformer import (
+            TransformerConfig as Cfg,
+            build_model,
+        )
+    with build:
+        m = build_model(Cfg(**ckpt["config"]))
+    m.load_state_dict(ckpt["state_dict"], assign=mmap)
+    m.eval()
+    meta = {"encoder_sha": module_digest(m)}     # shared-embedding key, see serving/encodings.py
+    if ckpt["config"].get("n_assets"):
+        meta["symbols"] = list(ckpt.get("meta", {}).get("symbols", []))
+    return LoadedModel(symbol=entry.symbol, kind=entry.kind, path=entry.path,
+                       config=ckpt["config"], handle=m, nbytes=_module_nbytes(m), meta=meta)
 
 
 class ModelRegistry:
-    def __init__(self, models_dir: Path):
+    def __init__(self, models_dir: Path, lazy: bool = False, budget_bytes: int = 0,
+                 reload_workers: int = 4, backend: str = "eager", int8: bool = False,
+                 mmap: bool = False):
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
         self.models_dir = Path(models_dir)
+        self.backend = backend
+        self.int8 = int8
+        self.mmap = mmap
+        self.warm: Callable[[LoadedModel], None] | None = None
+        self.lazy = lazy
+        self.budget_bytes = max(0, int(budget_bytes))   # 0 = unbounded
+        self.reload_workers = max(1, int(reload_workers))
+        self._reload_lock = threading.Lock()            # one reload at a time
+        self._watch_stop: threading.Event | None = None
         self._lock = threading.RLock()
-        self._models: dict[tuple[str, str], LoadedModel] = {}
+        self._index: dict[tuple[str, str], CheckpointEntry] = {}
+        # resident models, least-recently-used first
+        self._models: OrderedDict[tuple[str, str], LoadedModel] = OrderedDict()
+        self._load_locks: dict[tuple[str, str], threading.Lock] = {}
+        self.loads = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.last_reload_ms: int | None = None
+        self.generation = 0            # bumped whenever a reload changes what is on disk
+        self.last_diff: dict[str, list[str]] = {"changed": [], "removed": []}
+
+    def _scan(self) -> dict[tuple[str, str], CheckpointEntry]:
+        """Stat every checkpoint; hash only already-hashed files whose (size, mtime) moved."""
+        index: dict[tuple[str, str], CheckpointEntry] = {}
+        if not self.models_dir.exists():
+            log.warning("models dir %s does not exist; serving without models", self.models_dir)
+            return index
+        with self._lock:
+            old = dict(self._index)
+        for f in sorted(self.models_dir.glob("*.pt")):
+            sym, kind = _classify(f)
+            st = f.stat()
+            stamp = _artifact_stamp(f, self.backend, self.int8)
+            prev = old.get((sym, kind))
+            if prev and prev.path == f and (prev.size, prev.mtime) == (st.st_size, st.st_mtime):
+                index[(sym, kind)] = (prev if prev.artifact == stamp
+                                      else dataclasses.replace(prev, artifact=stamp))
+            else:
+                # the hash only tells a touched file from a rewritten one; new entries
+                # are hashed on first load so a lazy startup stays stat-only
+                sha = _file_sha256(f) if prev and prev.sha else ""
+                index[(sym, kind)] = CheckpointEntry(sym, kind, f, st.st_size, st.st_mtime,
+                                                     sha, stamp)
+        return index
 
     def load_all(self) -> dict[str, list[str]]:
-        """Load every checkpoint under models_dir. Returns {kind: [symbols]}."""
+        """Index (lazy) or load (eager) the checkpoints under models_dir, touching
+        only what changed since the last call. Returns {kind: [symbols]} servable."""
         try:
-            import torch
+            import torch  # noqa: F401
         except ImportError:
             log.warning("torch not installed; registry will only serve rule-based + news")
             return {}
 
-        from deepCommodity.model.price_transformer import (
-            TransformerConfig as PriceCfg,
-            build_model as build_price,
-        )
-        from deepCommodity.model.orderflow_transformer import (
-            OrderflowConfig as OFCfg,
-            build_model as build_of,
-        )
+        with self._reload_lock:
+            t0 = time.time()
+            before = self._versions()
+            summary = self._reload()
+            elapsed = time.time() - t0
+            with self._lock:
+                self.reloads += 1
+                self.last_reload_ms = int(elapsed * 1000)
+                if self._versions() != before:
+                    self.generation += 1
+            RELOAD_LATENCY.observe(elapsed)
+            return summary
 
-        new_models: dict[tuple[str, str], LoadedModel] = {}
+    def _versions(self) -> dict[tuple[str, str], tuple[str, str]]:
+        with self._lock:
+            return {k: e.version for k, e in self._index.items()}
 
-        if not self.models_dir.exists():
-            log.warning("models dir %s does not exist; serving without models", self.models_dir)
-        else:
-            for f in sorted(self.models_dir.glob("*.pt")):
-                try:
-                    if ".orderflow" in f.name:
-                        sym = f.name.replace(".orderflow.pt", "").upper()
-                        ckpt = torch.load(f, map_location="cpu")
-                        cfg = OFCfg(**ckpt["config"])
-                        m = build_of(cfg)
-                        m.load_state_dict(ckpt["state_dict"])
-                        m.eval()
-                        new_models[(sym, "orderflow")] = LoadedModel(
-                            symbol=sym, kind="orderflow", path=f,
-                            config=ckpt["config"], handle=m,
-                        )
-                    else:
-                        sym = f.stem.upper()
-                        ckpt = torch.load(f, map_location="cpu")
-                        cfg = PriceCfg(**ckpt["config"])
-                        m = build_price(cfg)
-                        m.load_state_dict(ckpt["state_dict"])
-                        m.eval()
-                        new_models[(sym, "price")] = LoadedModel(
-                            symbol=sym, kind="price", path=f,
-                            config=ckpt["config"], handle=m,
-                        )
-                except Exception as e:  # noqa: BLE001
-                    log.error("failed to load %s: %s", f, e)
+    def _reload(self) -> dict[str, list[str]]:
+        index = self._scan()
+        with self._lock:
+            old = dict(self._index)
+            resident = set(self._models)
+        removed = sorted(f"{k[1]}/{k[0]}" for k in old if k not in index)
+
+        if self.lazy:
+            with self._lock:
+                # drop resident models whose checkpoint vanished or changed content
+                stale = [k for k in self._models
+                         if k not in index or index[k].version != old.get(k, index[k]).version]
+                for key in stale:
+                    self._models.pop(key)
+                self._index = index
+                self.last_diff = {"changed": sorted(f"{k[1]}/{k[0]}" for k in stale if k in index),
+                                  "removed": removed}
+            summary = self._summary(index)
+            log.info("registry indexed (lazy, budget=%s bytes): %s", self.budget_bytes or "∞", summary)
+            return summary
+
+        todo = [e for k, e in index.items()
+                if k not in resident or k not in old or old[k].version != e.version]
+        loaded: dict[tuple[str, str], LoadedModel] = {}
+        if todo:
+            with ThreadPoolExecutor(max_workers=min(self.reload_workers, len(todo)),
+                                    thread_name_prefix="dc-reload") as ex:
+                for entry, res in ex.map(self._try_load, todo):
+                    if res is not None:
+                        loaded[(entry.symbol, entry.kind)] = res
+                        index[(entry.symbol, entry.kind)] = entry
 
         with self._lock:
+            new_models = OrderedDict((k, m) for k, m in self._models.items() if k in index)
+            new_models.update(loaded)   # a failed load keeps the previous version, if any
             self._models = new_models
+            # a failed change keeps the old entry so the next reload retries it
+            failed = {(e.symbol, e.kind) for e in todo} - set(loaded)
+            self._index = {k: (old[k] if k in failed and k in old else e)
+                           for k, e in index.items()}
+            self.loads += len(loaded)
+            self.last_diff = {"changed": sorted(f"{k[1]}/{k[0]}" for k in loaded),
+                              "removed": removed}
 
-        summary: dict[str, list[str]] = {}
-        for (sym, kind) in new_models:
-            summary.setdefault(kind, []).append(sym)
-        log.info("registry loaded: %s", summary)
+        summary = self._summary(self._models)
+        log.info("registry reloaded: %d changed, %d removed, %d unchanged -> %s",
+                 len(loaded), len(removed), len(new_models) - len(loaded), summary)
         return summary
 
+    def _try_load(self, entry: CheckpointEntry) -> tuple[CheckpointEntry, LoadedModel | None]:
+        """(entry with its content hash, model or None on failure)."""
+        try:
+            if not entry.sha:
+                entry = dataclasses.replace(entry, sha=_file_sha256(entry.path))
+            m = _load_checkpoint(entry, self.backend, self.int8, self.mmap)
+        except Exception as e:  # noqa: BLE001
+            log.error("failed to load %s: %s", entry.path, e)
+            return entry, None
+        if self.warm is not None:
+            self.warm(m)
+        return entry, m
+
+    # ---- filesystem watch ---------------------------------------------------
+
+    def _dir_signature(self) -> tuple:
+        if not self.models_dir.exists():
+            return ()
+        return tuple((f.name, f.stat().st_size, f.stat().st_mtime)
+                     for f in sorted(self.models_dir.glob("*")))   # .pt and exports
+
+    def start_watch(self, interval_sec: float) -> None:
+        """Poll models_dir every `interval_sec` and reload when its listing changes
+        (and has stopped changing)."""
+        if interval_sec <= 0 or self._watch_stop is not None:
+            return
+        stop = self._watch_stop = threading.Event()
+        initial = self._dir_signature()     # baseline now, not whenever the thread runs
+
+        def loop():
+            sig = pending = initial
+            while not stop.wait(interval_sec):
+                try:
+                    cur = self._dir_signature()
+                    # reload only once the listing held still for a poll, so a
+                    # checkpoint that is still being written isn't picked up half-done
+                    if cur != sig and cur == pending:
+                        log.info("models dir changed; reloading")
+                        self.load_all()
+                        sig = cur
+                    pending = cur
+                except Exception as e:  # noqa: BLE001
+                    log.error("watch reload failed: %s", e)
+
+        threading.Thread(target=loop, name="dc-registry-watch", daemon=True).start()
+
+    def stop_watch(self) -> None:
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+
     def get(self, symbol: str, kind: str) -> LoadedModel | None:
+        key = (symbol.upper(), kind)
+        with self._lock:
+            m = self._models.get(key)
+            if m is not None:
+                self._models.move_to_end(key)
+                return m
+            if not self.lazy:
+                return None
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:                # one deserialization per key, others wait for it
+            with self._lock:
+                m = self._models.get(key)
+                if m is not None:
+                    self._models.move_to_end(key)
+                    return m
+            entry, m = self._try_load(entry)
+            if m is None:
+                return None
+            with self._lock:
+                cur = self._index.get(key)
+                if cur is not None and not cur.sha and (cur.path, cur.size, cur.mtime) == (
+                        entry.path, entry.size, entry.mtime):
+                    self._index[key] = dataclasses.replace(cur, sha=entry.sha)
+                self._models[key] = m
+                self.loads += 1
+                self._evict(keep=key)
+            log.info("loaded %s/%s on demand (%d bytes)", kind, key[0], m.nbytes)
+            return m
+
+    def _evict(self, keep: tuple[str, str]) -> None:
+        """Drop least-recently-used models until under budget. Caller holds the lock."""
+        if not self.budget_bytes:
+            return
+        while self.resident_bytes() > self.budget_bytes and len(self._models) > 1:
+            key = next(iter(self._models))
+            if key == keep:
+                break
+            self._models.pop(key)
+            self.evictions += 1
+            log.info("evicted %s/%s (LRU, budget %d bytes)", key[1], key[0], self.budget_bytes)
+
+    def resident(self) -> list[LoadedModel]:
         with self._lock:
-            return self._models.get((symbol.upper(), kind))
+            return list(self._models.values())
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(m.nbytes for m in self._models.values())
 
     def list_available(self) -> dict[str, list[str]]:
         with self._lock:
-            out: dict[str, list[str]] = {}
-            for (sym, kind) in self._models:
-                out.setdefault(kind, []).append(sym)
-            return out
+            return self._summary(self._index if self.lazy else self._models)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": "lazy" if self.lazy else "eager",
+                "backend": self.backend + ("-int8" if self.int8 and self.backend != "eager" else ""),
+                "mmap": self.mmap,
+                "exported": sum(m.backend != "eager" for m in self._models.values()),
+                "indexed": len(self._index),
+                "resident": len(self._models),
+                "resident_bytes": self.resident_bytes(),
+                "budget_bytes": self.budget_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+                "last_reload_ms": self.last_reload_ms,
+            }
+
+    @staticmethod
+    def _summary(keys) -> dict[str, list[str]]:
+        out: dict[str, list[str]] = {}
+        for (sym, kind) in keys:
+            out.setdefault(kind, []).append(sym)
+        return out
 
 
 def get_models_dir() -> Path:
     return Path(os.getenv("MODELS_DIR", "/srv/models"))
+
+
+def registry_from_env(models_dir: Path | None = None) -> ModelRegistry:
+    return ModelRegistry(models_dir or get_models_dir(),
+                         lazy=envbool("DC_REGISTRY_LAZY", False),
+                         budget_bytes=int(float(os.getenv("DC_REGISTRY_BUDGET_MB", "0")) * 2**20),
+                         reload_workers=int(os.getenv("DC_RELOAD_WORKERS", "4")),
+                         backend=os.getenv("DC_REGISTRY_BACKEND", "eager").lower(),
+                         int8=envbool("DC_REGISTRY_INT8", False),
+                         mmap=envbool("DC_REGISTRY_MMAP", False))
+
+
+def watch_interval_from_env() -> float:
+    return float(os.getenv("DC_RELOAD_WATCH_SEC", "0"))
@@ -3,9 +3,12 @@ from __future__ import annotations
 
 from typing import Literal
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
-ModelKind = Literal["price", "orderflow", "news", "fused", "ensemble", "rule-based"]
+from serving.wire import ENCODING, decode_array
+
+ModelKind = Literal["price", "orderflow", "news", "fused", "ensemble", "rule-based", "contextual"]
 
 
 class OHLCVWindow(BaseModel):
@@ -23,34 +26,173 @@ class OrderflowWindow(BaseModel):
     vwap_drift: list[float] = Field(..., min_length=2)
 
 
+class PackedWindow(BaseModel):
+    """Binary alternative to the list-of-floats windows (see serving/wire.py)."""
+    encoding: Literal["f32le-b64"] = ENCODING
+    columns: list[str] = Field(..., min_length=1, max_length=16)
+    shape: tuple[int, int]
+    data: str = Field(..., max_length=16 * 2**20)
+    _array: np.ndarray = PrivateAttr()
+
+    @model_validator(mode="after")
+    def _decode(self) -> "PackedWindow":
+        rows, cols = self.shape
+        if rows < 1 or cols != len(self.columns):
+            raise ValueError(f"shape {list(self.shape)} does not fit {len(self.columns)} columns")
+        self._array = decode_array(self.data, self.shape)
+        return self
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._array
+
+
+class MacroWindow(BaseModel):
+    """Daily macro panel rows, oldest first, columns in MACRO_FEATURE_COLS order
+    (tools/fetch_macro_features.py). `date` is the last row's date; it keys the
+    server's macro-encoding cache."""
+    date: str = Field(..., min_length=1, max_length=32)
+    rows: list[list[float]] = Field(..., min_length=1, max_length=4096)
+
+
 class ForecastRequest(BaseModel):
     symbol: str
     model: ModelKind = "price"
-    bars: OHLCVWindow | None = None         # required for price / fused / ensemble
-    orderflow: OrderflowWindow | None = None  # required for orderflow / fused / ensemble
+    # required for price / contextual / fused / ensemble; PackedWindow is the compact form
+    bars: OHLCVWindow | PackedWindow | None = None
+    # required for orderflow / fused / ensemble
+    orderflow: OrderflowWindow | PackedWindow | None = None
     news_text: str | None = None              # required for news / fused / ensemble
+    macro: MacroWindow | None = None          # required for contextual
     pct_change_24h: float | None = None       # for rule-based fallback inside ensemble
     pct_change_7d: float | None = None
 
 
+class OHLCVRows(OHLCVWindow):
+    """OHLCVWindow for session appends, where a single new bar is fine."""
+    open: list[float] = Field(..., min_length=1)
+    high: list[float] = Field(..., min_length=1)
+    low: list[float] = Field(..., min_length=1)
+    close: list[float] = Field(..., min_length=1)
+    volume: list[float] = Field(..., min_length=1)
+
+
+class OrderflowRows(OrderflowWindow):
+    signed_volume: list[float] = Field(..., min_length=1)
+    trade_count: list[float] = Field(..., min_length=1)
+    mean_size: list[float] = Field(..., min_length=1)
+    vwap_drift: list[float] = Field(..., min_length=1)
+
+
+SessionKind = Literal["price", "orderflow"]
+
+
+class SessionOpenRequest(BaseModel):
+    symbol: str
+    model: SessionKind = "price"
+    bars: OHLCVRows | PackedWindow | None = None          # optional initial history
+    orderflow: OrderflowRows | PackedWindow | None = None
+
+
+class SessionAppendRequest(BaseModel):
+    bars: OHLCVRows | PackedWindow | None = None          # price sessions
+    orderflow: OrderflowRows | PackedWindow | None = None  # orderflow sessions
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+    symbol: str
+    model: SessionKind
+    rows: int                     # rows currently buffered
+    capacity: int                 # ring size; older rows fall off past this
+    min_rows: int                 # rows needed before /forecast can answer
+    nbytes: int
+    dropped: int = 0              # rows pushed out by this call
+    ttl_sec: float
+
+
 class ForecastResponse(BaseModel):
     symbol: str
     model: ModelKind
     direction: Literal["long", "short", "flat"]
     confidence: float
     proba: list[float] | None = None
+    horizons: dict[str, list[float]] | None = None   # contextual: proba per horizon
     rationale: str
     model_version: str | None = None
     backends_used: list[str] = []
 
 
+class BatchForecastRequest(BaseModel):
+    requests: list[ForecastRequest] = Field(..., min_length=1, max_length=256)
+
+
+class BatchForecastItem(BaseModel):
+    ok: bool
+    status_code: int
+    forecast: ForecastResponse | None = None
+    error: str | None = None
+    cache: Literal["hit", "miss", "coalesced"] | None = None
+
+
+class BatchForecastResponse(BaseModel):
+    results: list[BatchForecastItem]          # same order as the request
+    elapsed_ms: int
+
+
+class RegistryStats(BaseModel):
+    mode: Literal["eager", "lazy"]
+    indexed: int                  # checkpoints known on disk
+    resident: int                 # models currently in memory
+    resident_bytes: int
+    budget_bytes: int             # 0 = unbounded
+    loads: int
+    evictions: int
+    reloads: int = 0
+    last_reload_ms: int | None = None
+    backend: str = "eager"        # configured: eager | torchscript | onnx [-int8]
+    exported: int = 0             # resident models served from an exported artifact
+    mmap: bool = False            # weights memory-mapped from the checkpoints
+
+
+class ProcessMemory(BaseModel):
+    pid: int
+    rss_bytes: int
+    pss_bytes: int                # shared pages split among the processes mapping them
+    shared_bytes: int
+    private_bytes: int
+    anon_bytes: int               # heap: what this worker alone costs
+
+
+class ResponseCacheStats(BaseModel):
+    entries: int
+    ttl_sec: float
+    hit: int
+    miss: int
+    coalesced: int                # waited on an identical in-flight request
+    hit_rate: float | None = None # (hit + coalesced) / served
+
+
 class HealthResponse(BaseModel):
     ok: bool
     available_models: dict[str, list[str]]   # {"price": ["BTC", "ETH"], "orderflow": [...]}
     torch_available: bool
+    registry: RegistryStats | None = None
+    process: ProcessMemory | None = None      # Linux only
+    response_cache: ResponseCacheStats | None = None
     version: str = "1.0.0"
 
 
+class ReadyResponse(BaseModel):
+    ready: bool                   # models loaded and warmed; 503 until then
+    pending: int = 0              # models still warming at startup
+    startup_ms: int | None = None
+    models_ms: dict[str, int] = {}            # "kind/SYMBOL" -> last warm-up ms
+    errors: dict[str, str] = {}
+
+
 class ReloadResponse(BaseModel):
-    reloaded: dict[str, list[str]]
+    reloaded: dict[str, list[str]]            # everything servable after the reload
     elapsed_ms: int
+    changed: list[str] = []                   # "kind/SYMBOL" re-deserialized this time
+    removed: list[str] = []
@@ -0,0 +1,179 @@
+"""Streaming window sessions: clients post only new bars / flow seconds.
+
+A session is bound to one (symbol, model kind). It keeps a bounded ring buffer
+of raw rows and a parallel ring of features. Features are maintained
+incrementally: a row's features depend only on its `lookback` predecessors
+(1 bar for price, the 300 s rolling window for order flow). So on a forecast
+only the rows appended since the last one are featurized, from a tail slice of
+`new + lookback` raw rows, never the whole window. While the buffer is still
+shorter than that, the whole buffer is featurized, which is cheap at that size.
+
+Sessions expire after `ttl_sec` without use (checked lazily on every store
+call, no reaper thread). Each is capped at `max_rows` and `max_bytes` of
+buffer; once the cap is reached the oldest rows fall off.
+
+Tunables (env):
+    DC_SESSION_TTL_SEC    idle seconds before a session is dropped  (default 900)
+    DC_SESSION_MAX        max open sessions                         (default 1024)
+    DC_SESSION_MAX_ROWS   ring capacity in rows                     (default 4096)
+    DC_SESSION_MAX_KB     ring memory cap per session, raw+features (default 1024)
+"""
+from __future__ import annotations
+
+import os
+import secrets
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+# featurize(DataFrame of raw rows) -> (n', F) features aligned to the trailing rows
+FeaturizeFn = Callable[[pd.DataFrame], np.ndarray]
+
+
+class SessionLimit(RuntimeError):
+    """Raised when opening a session would exceed DC_SESSION_MAX."""
+
+
+class _Ring:
+    """Fixed-capacity row buffer; `tail(m)` returns the newest m rows in order."""
+
+    def __init__(self, capacity: int, width: int):
+        self.buf = np.empty((capacity, width), dtype=np.float64)
+        self.end = 0                      # rows ever written
+
+    def __len__(self) -> int:
+        return min(self.end, len(self.buf))
+
+    def extend(self, rows: np.ndarray) -> None:
+        cap = len(self.buf)
+        self.end += max(0, len(rows) - cap)      # rows that would be overwritten anyway
+        rows = rows[-cap:]
+        i, k = self.end % cap, len(rows)
+        first = min(k, cap - i)
+        self.buf[i:i + first] = rows[:first]
+        self.buf[:k - first] = rows[first:]
+        self.end += k
+
+    def tail(self, m: int) -> np.ndarray:
+        m = min(m, len(self))
+        cap, j = len(self.buf), self.end % len(self.buf)
+        if m <= j:
+            return self.buf[j - m:j]
+        return np.concatenate([self.buf[cap - (m - j):], self.buf[:j]])
+
+
+class WindowSession:
+    def __init__(self, sid: str, symbol: str, kind: str, columns: tuple[str, ...],
+                 capacity: int, featurize: FeaturizeFn, lookback: int):
+        self.id, self.symbol, self.kind, self.columns = sid, symbol, kind, tuple(columns)
+        self.capacity = capacity
+        self.featurize = featurize
+        self.lookback = max(1, int(lookback))
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.dropped = 0                  # rows pushed out of the ring so far
+        self._raw = _Ring(capacity, len(self.columns))
+        self._feat: _Ring | None = None
+        self._stale = 0                   # newest raw rows without features yet
+        self._settled = False             # last featurization had full lookback context
+
+    @property
+    def rows(self) -> int:
+        return len(self._raw)
+
+    @property
+    def nbytes(self) -> int:
+        return self._raw.buf.nbytes + (self._feat.buf.nbytes if self._feat is not None else 0)
+
+    def append(self, rows: np.ndarray) -> int:
+        """Push (k, len(columns)) rows; returns how many old rows fell off."""
+        with self.lock:
+            before = self._raw.end - len(self._raw)
+            self._raw.extend(np.asarray(rows, dtype=np.float64))
+            self._stale = min(self._stale + len(rows), self.capacity)
+            dropped = (self._raw.end - len(self._raw)) - before
+            self.dropped += dropped
+            self.last_used = time.monotonic()
+            return dropped
+
+    def features(self, m: int) -> np.ndarray:
+        """The newest m feature rows (fewer if the buffer is still short)."""
+        with self.lock:
+            self.last_used = time.monotonic()
+            n = len(self._raw)
+            if not self._settled or n < self._stale + self.lookback:
+                feats = self.featurize(self._frame(n))
+                self._feat = _Ring(self.capacity, feats.shape[1])
+                self._feat.extend(feats)
+                self._settled = n >= self.lookback
+            elif self._stale:
+                k = self._stale
+                self._feat.extend(self.featurize(self._frame(k + self.lookback))[-k:])
+            self._stale = 0
+            return self._feat.tail(m).copy()
+
+    def _frame(self, m: int) -> pd.DataFrame:
+        return pd.DataFrame(self._raw.tail(m), columns=list(self.columns))
+
+
+class SessionStore:
+    def __init__(self, ttl_sec: float = 900.0, max_sessions: int = 1024,
+                 max_rows: int = 4096, max_bytes: int = 1 << 20):
+        self.ttl_sec = float(ttl_sec)
+        self.max_sessions = max(1, int(max_sessions))
+        self.max_rows = max(2, int(max_rows))
+        self.max_bytes = max(1, int(max_bytes))
+        self._lock = threading.Lock()
+        self._sessions: dict[str, WindowSession] = {}
+        self.expired = 0
+
+    def capacity_for(self, width: int) -> int:
+        """Ring rows that fit the per-session cap (raw + same-width features, float64)."""
+        return min(self.max_rows, self.max_bytes // (2 * width * 8))
+
+    def open(self, symbol: str, kind: str, columns: tuple[str, ...],
+             featurize: FeaturizeFn, lookback: int, min_rows: int) -> WindowSession:
+        """Raises ValueError if the cap can't hold `min_rows`, SessionLimit if full."""
+        capacity = self.capacity_for(len(columns))
+        if capacity < min_rows:
+            raise ValueError(f"session cap holds {capacity} rows, model needs {min_rows}")
+        with self._lock:
+            self._sweep_locked()
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimit(f"{len(self._sessions)} sessions open")
+            sess = WindowSession(secrets.token_urlsafe(16), symbol, kind, columns,
+                                 capacity, featurize, lookback)
+            self._sessions[sess.id] = sess
+            return sess
+
+    def get(self, sid: str) -> WindowSession | None:
+        with self._lock:
+            self._sweep_locked()
+            return self._sessions.get(sid)
+
+    def close(self, sid: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(sid, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(s.nbytes for s in self._sessions.values())
+
+    def _sweep_locked(self) -> None:
+        cutoff = time.monotonic() - self.ttl_sec
+        for sid in [sid for sid, s in self._sessions.items() if s.last_used < cutoff]:
+            del self._sessions[sid]
+            self.expired += 1
+
+
+def sessions_from_env() -> SessionStore:
+    return SessionStore(ttl_sec=float(os.getenv("DC_SESSION_TTL_SEC", "900")),
+                        max_sessions=int(os.getenv("DC_SESSION_MAX", "1024")),
+                        max_rows=int(os.getenv("DC_SESSION_MAX_ROWS", "4096")),
+                        max_bytes=int(float(os.getenv("DC_SESSION_MAX_KB", "1024")) * 1024))
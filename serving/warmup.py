@@ -0,0 +1,133 @@
+"""Warm-up forward passes, so real requests never hit a cold model.
+
+The first forward pass of a freshly loaded model pays one-off costs: torch op
+dispatch and kernel selection, allocator growth to the working-set size, and
+graph optimization for exported backends. Each model gets `rounds` synthetic
+passes at the batch sizes the micro-batcher produces, before it takes traffic.
+
+    startup  models load as before, then warm in a background thread; /ready
+             answers 503 until every resident model is warm (/health is
+             liveness only and answers throughout)
+    reload   new or changed models warm in the reload pool *before* they are
+             swapped in, so the old version serves until the new one is warm
+    lazy     a model warms right after its on-demand load
+
+Tunables (env):
+    DC_WARMUP           run warm-up passes (default true)
+    DC_WARMUP_BATCHES   batch sizes, comma separated (default "1,$DC_BATCH_MAX")
+    DC_WARMUP_ROUNDS    passes per batch size (default 2)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Iterable
+
+import numpy as np
+
+from deepCommodity.util import envbool
+
+log = logging.getLogger("dc-serve.warmup")
+
+
+def _forward(loaded, batch: int, rng: np.random.Generator) -> None:
+    """One synthetic pass through the same surface the API calls for this kind."""
+    import torch
+    cfg = loaded.config
+    if loaded.kind in ("price", "orderflow"):
+        from deepCommodity.model.price_transformer import predict_proba
+        predict_proba(loaded.handle,
+                      rng.normal(size=(batch, cfg["seq_len"], cfg["n_features"])).astype(np.float32))
+        return
+    with torch.no_grad():
+        if loaded.kind == "contextual":
+            macro_h = loaded.handle.encode_macro(
+                torch.randn(1, cfg["macro_seq"], cfg["macro_feats"]))
+            loaded.handle.forward_encoded(
+                torch.randn(batch, cfg["price_seq"], cfg["price_feats"]), macro_h,
+                torch.from_numpy(rng.integers(0, cfg["n_assets"], batch)).long())
+        elif loaded.kind == "fused":
+            kwargs = {"news_x": torch.randn(batch, cfg["news_dim"])}
+            for kind in ("price", "orderflow"):
+                enc = loaded.meta.get(f"{kind}_config")
+                if enc:
+                    kwargs[f"{kind}_x"] = torch.randn(batch, enc["seq_len"], enc["n_features"])
+            loaded.handle(**kwargs)
+
+
+def warm_model(loaded, batch_sizes: Iterable[int], rounds: int = 2) -> float:
+    """Seconds spent warming `loaded`."""
+    rng = np.random.default_rng(0)
+    t0 = time.perf_counter()
+    for b in batch_sizes:
+        for _ in range(max(1, rounds)):
+            _forward(loaded, b, rng)
+    return time.perf_counter() - t0
+
+
+class Warmup:
+    """Warms models (callable as the registry's `warm` hook) and tracks startup readiness."""
+
+    def __init__(self, batch_sizes: tuple[int, ...] = (1, 32), rounds: int = 2, enabled: bool = True):
+        self.batch_sizes = tuple(sorted({max(1, int(b)) for b in batch_sizes}))
+        self.rounds = rounds
+        self.enabled = enabled
+        self.ready = threading.Event()
+        self.ms: dict[str, int] = {}          # "kind/SYMBOL" -> last warm-up duration
+        self.errors: dict[str, str] = {}
+        self.pending = 0
+        self.startup_ms: int | None = None
+        self._lock = threading.Lock()
+
+    def __call__(self, loaded) -> None:
+        if not self.enabled:
+            return
+        name = f"{loaded.kind}/{loaded.symbol}"
+        try:
+            sec = warm_model(loaded, self.batch_sizes, self.rounds)
+        except Exception as e:  # noqa: BLE001 — a model that can't warm still gets served
+            log.error("warm-up of %s failed: %s", name, e)
+            with self._lock:
+                self.errors[name] = f"{type(e).__name__}: {e}"
+            return
+        with self._lock:
+            self.ms[name] = int(sec * 1000)
+            self.errors.pop(name, None)
+        log.info("warmed %s in %.0f ms (batches %s x%d)", name, sec * 1000,
+                 list(self.batch_sizes), self.rounds)
+
+    def start(self, models: list, stop: threading.Event | None = None) -> threading.Thread:
+        """Warm `models` in a background thread; `ready` is set when all are done."""
+        self.pending = len(models)
+
+        def run():
+            t0 = time.perf_counter()
+            for m in models:
+                if stop is not None and stop.is_set():
+                    return
+                self(m)
+                with self._lock:
+                    self.pending -= 1
+            self.startup_ms = int((time.perf_counter() - t0) * 1000)
+            if models and self.enabled:
+                log.info("startup warm-up done: %d models in %d ms", len(models), self.startup_ms)
+            self.ready.set()
+
+        t = threading.Thread(target=run, name="dc-warmup", daemon=True)
+        t.start()
+        return t
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"ready": self.ready.is_set(), "pending": self.pending,
+                    "startup_ms": self.startup_ms, "models_ms": dict(self.ms),
+                    "errors": dict(self.errors)}
+
+
+def warmup_from_env() -> Warmup:
+    default = f"1,{os.getenv('DC_BATCH_MAX', '32')}"
+    return Warmup(batch_sizes=tuple(int(b) for b in os.getenv("DC_WARMUP_BATCHES", default).split(",")),
+                  rounds=int(os.getenv("DC_WARMUP_ROUNDS", "2")),
+                  enabled=envbool("DC_WARMUP", True))
@@ -0,0 +1,43 @@
+"""Compact binary encoding for bar / order-flow windows.
+
+A JSON list of floats costs ~20 bytes per value and is validated element by
+element; a 600-bar order-flow window is 2,400 of them. The packed form ships the
+same window as one base64 string of little-endian float32, row-major
+(rows, columns), with the column names alongside:
+
+    {"encoding": "f32le-b64", "columns": ["open", ..., "volume"],
+     "shape": [rows, 5], "data": "<base64>"}
+
+The server decodes it with `np.frombuffer` straight into a DataFrame. numpy only,
+so the forecast router can import it without the serving stack.
+"""
+from __future__ import annotations
+
+import base64
+
+import numpy as np
+
+ENCODING = "f32le-b64"
+BAR_COLUMNS = ("open", "high", "low", "close", "volume")
+ORDERFLOW_COLUMNS = ("signed_volume", "trade_count", "mean_size", "vwap_drift")
+
+
+def encode_window(df, columns: tuple[str, ...] | list[str], max_rows: int | None = None) -> dict:
+    """DataFrame -> packed window dict (last `max_rows` rows of `columns`)."""
+    arr = np.ascontiguousarray(df[list(columns)].to_numpy(dtype="<f4"))
+    if max_rows is not None:
+        arr = np.ascontiguousarray(arr[-max_rows:])
+    return {"encoding": ENCODING, "columns": list(columns), "shape": list(arr.shape),
+            "data": base64.b64encode(arr.tobytes()).decode("ascii")}
+
+
+def decode_array(data: str, shape: tuple[int, int]) -> np.ndarray:
+    """base64 float32 block -> (rows, cols) array. Raises ValueError on a size mismatch."""
+    try:
+        raw = base64.b64decode(data, validate=True)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"data is not valid base64: {e}") from None
+    rows, cols = shape
+    if len(raw) != rows * cols * 4:
+        raise ValueError(f"data is {len(raw)} bytes, shape {list(shape)} needs {rows * cols * 4}")
+    return np.frombuffer(raw, dtype="<f4").reshape(rows, cols)
@@ -0,0 +1,159 @@
+"""deepCommodity/model/analog.py — IVF index, persisted build, analog forecasts."""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from deepCommodity.backtest.engine import Bar  # noqa: E402
+from deepCommodity.model.analog import (  # noqa: E402
+    CLOSE_VOLUME, IVFIndex, build_analog_index, load_analog,
+)
+from deepCommodity.model.contextual_transformer import MACRO_FEATURE_COLS  # noqa: E402
+
+PRICE_SEQ, MACRO_SEQ = 20, 10
+DAY0 = datetime(2022, 1, 1).toordinal()
+
+
+def _clusters(n=4000, d=16, k=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0, 4, (k, d))
+    return (centers[rng.integers(0, k, n)] + rng.normal(0, 1, (n, d))).astype(np.float32)
+
+
+def _brute(x, q, k):
+    d = ((x[None] - q[:, None]) ** 2).sum(-1)
+    return np.argsort(d, 1)[:, :k]
+
+
+def test_ivf_search_is_exact_when_probing_every_list_and_close_otherwise():
+    x = _clusters()
+    index, order = IVFIndex.build(x, np.zeros(len(x), np.int64), n_lists=32)
+    q = x[:50] + np.random.default_rng(1).normal(0, 0.2, (50, 16)).astype(np.float32)
+    truth = _brute(x, q, 10)
+
+    idx, dist = index.search(q, k=10, nprobe=32)
+    assert (order[idx] == truth).all()
+    assert np.all(np.diff(dist, axis=1) >= 0)
+
+    idx, _ = index.search(q, k=10, nprobe=4)
+    recall = np.mean([len(set(order[i]) & set(t)) / 10 for i, t in zip(idx, truth)])
+    assert recall > 0.9
+
+
+def test_ivf_max_date_widens_the_probe_until_k_qualify():
+    x = _clusters(n=2000)
+    dates = np.arange(len(x))
+    index, order = IVFIndex.build(x, dates, n_lists=16)
+    idx, dist = index.search(x[1900], k=20, nprobe=1, max_date=100)
+    assert (idx >= 0).all() and (dates[order[idx]] <= 100).all()
+    idx, dist = index.search(x[:2], k=5, max_date=[-1, 3])          # per-query cut-offs
+    assert (idx[0] == -1).all() and np.isinf(dist[0]).all()
+    assert sorted(order[idx[1][idx[1] >= 0]]) == [0, 1, 2, 3]
+
+
+def _dataset(path: Path, n=1500, seed=0):
+    """Up-trending windows were followed by gains, down-trending ones by losses."""
+    rng = np.random.default_rng(seed)
+    trend = rng.choice([-1.0, 1.0], n)
+    price_X = rng.normal(0, 0.01, (n, PRICE_SEQ, 4)).astype(np.float32)
+    price_X[:, :, 0] += 0.02 * trend[:, None]
+    macro_X = rng.normal(0, 1, (n, MACRO_SEQ, len(MACRO_FEATURE_COLS))).astype(np.float32)
+    y = np.where(trend > 0, 2, 0).astype(np.int64)
+    np.savez_compressed(path, price_X=price_X, macro_X=macro_X, y_weekly=y, y_daily=y,
+                        r_weekly=(0.05 * trend).astype(np.float32),
+                        r_daily=(0.01 * trend).astype(np.float32),
+                        dates=DAY0 + np.arange(n) // 3, realized=DAY0 + 14 + np.arange(n) // 3,
+                        asset_id=np.arange(n) % 3)
+    path.with_suffix(".meta.json").write_text(json.dumps({"weekly_h": 10, "daily_h": 2}))
+    return price_X, macro_X, trend
+
+
+def test_analog_index_round_trip_and_forecasts_from_outcomes(tmp_path):
+    price_X, macro_X, trend = _dataset(tmp_path / "dataset.npz")
+    meta = build_analog_index(tmp_path / "dataset.npz", tmp_path / "analog", dim=32)
+    assert meta["n"] == len(price_X) and meta["weekly_h"] == 10
+
+    analog = load_analog(tmp_path / "analog")
+    assert isinstance(analog.index.vectors, np.memmap)
+    idx, _ = analog.neighbours(price_X[:5], macro_X[:5], k=1, nprobe=meta["n_lists"])
+    assert (analog.outcomes["rows"][idx[:, 0]] == np.arange(5)).all()     # finds itself
+
+    rng = np.random.default_rng(9)
+    px = rng.normal(0, 0.01, (2, PRICE_SEQ, 4)).astype(np.float32)
+    px[0, :, 0] += 0.02; px[1, :, 0] -= 0.02
+    mx = rng.normal(0, 1, (2, MACRO_SEQ, len(MACRO_FEATURE_COLS))).astype(np.float32)
+    out = analog.predict(px, mx, k=16)
+    assert out["weekly"].argmax(1).tolist() == [2, 0]
+    assert out["r_weekly"][0] > 0 > out["r_weekly"][1]
+    np.testing.assert_allclose(out["weekly"].sum(1), 1.0, atol=1e-6)
+    mem = load_analog(tmp_path / "analog", mmap=False).predict(px, mx, k=16)
+    np.testing.assert_allclose(mem["weekly"], out["weekly"])
+
+    none = analog.predict(px, mx, max_date=DAY0 + 13)         # nothing realized yet
+    assert (none["n"] == 0).all() and np.allclose(none["weekly"], 1 / 3)
+    # the cut-off is the outcome's date, not the window's: windows dated up to
+    # DAY0 + 6 are realized by DAY0 + 20
+    idx, _ = analog.neighbours(px, mx, k=64, max_date=DAY0 + 20)
+    rows = analog.outcomes["rows"][idx[idx >= 0]]
+    assert len(rows) and (DAY0 + rows // 3).max() <= DAY0 + 6
+
+
+def test_backtest_adapter_only_uses_realized_analogs(tmp_path):
+    from deepCommodity.backtest.analog_forecaster import AnalogForecaster
+    price_X, macro_X, _ = _dataset(tmp_path / "dataset.npz")
+    build_analog_index(tmp_path / "dataset.npz", tmp_path / "full", dim=32)
+    with pytest.raises(ValueError, match="close-volume-only"):
+        AnalogForecaster(load_analog(tmp_path / "full"), None)
+    build_analog_index(tmp_path / "dataset.npz", tmp_path / "analog", dim=32, price_feats=CLOSE_VOLUME)
+    analog = load_analog(tmp_path / "analog")
+    assert analog.meta["price_feats"] == [0, 1] and analog.meta["price_shape"] == [PRICE_SEQ, 4]
+    px, mx = price_X[:3].copy(), macro_X[:3]
+    before = analog.neighbours(px, mx, k=4)[0]
+    px[..., 2:] = 0.0                                  # what the adapter's close-only bars give
+    assert (analog.neighbours(px, mx, k=4)[0] == before).all()
+    seen = []
+    real = analog.predict
+    analog.predict = lambda *a, **kw: (seen.append(kw["max_date"]), real(*a, **kw))[1]
+
+    idx = pd.date_range("2021-12-01", periods=200, freq="D")
+    macro = pd.DataFrame(np.random.default_rng(0).normal(0, 1, (len(idx), len(MACRO_FEATURE_COLS))),
+                         index=idx, columns=MACRO_FEATURE_COLS)
+    base = datetime(2022, 2, 1)
+    bars = [Bar(ts=base + timedelta(days=i), close=100 * 1.01 ** i) for i in range(30)]
+    f = AnalogForecaster(analog, macro, k=8, min_confidence=0.0)
+    out = f({"BTC": bars, "SHORT": bars[:5]})
+    assert [x.symbol for x in out] == ["BTC"]
+    assert seen[0].tolist() == [bars[-1].ts.toordinal()]
+
+
+def test_forecast_router_analog(tmp_path):
+    _dataset(tmp_path / "dataset.npz")
+    build_analog_index(tmp_path / "dataset.npz", tmp_path / "analog", dim=32)
+    bars = tmp_path / "bars"; bars.mkdir()
+    close = 100 * np.cumprod(np.full(40, 1.02))
+    pd.DataFrame({"open": close, "high": close, "low": close, "close": close,
+                  "volume": 1.0}).to_csv(bars / "BTC.csv", index=False)
+    idx = pd.date_range("2024-01-01", periods=30, freq="D")
+    macro = pd.DataFrame(0.0, index=idx, columns=MACRO_FEATURE_COLS)
+    macro.index.name = "date"
+    macro.to_csv(tmp_path / "macro.csv")
+    r = subprocess.run([sys.executable, str(ROOT / "tools" / "forecast.py"), "--model", "analog",
+                        "--symbols", "BTC,ETH", "--bars-dir", str(bars),
+                        "--macro", str(tmp_path / "macro.csv"),
+                        "--analog-index", str(tmp_path / "analog")],
+                       capture_output=True, text=True)
+    assert r.returncode == 0, r.stderr
+    out = json.loads(r.stdout)
+    assert out["model"] == "analog" and [f["symbol"] for f in out["forecasts"]] == ["BTC"]
+    btc = out["forecasts"][0]
+    assert btc["direction"] == "long" and btc["horizons"]["weekly"]["expected_return"] > 0
@@ -21,7 +21,8 @@ sys.path.insert(0, str(ROOT))
 torch = pytest.importorskip("torch")
 
 from deepCommodity.model.contextual_transformer import (  # noqa: E402
-    ContextualConfig, apply_norm, build_model, fit_norm, predict, proba_to_forecast)
+    ContextualConfig, apply_norm, build_model, fit_norm, predict)
+from deepCommodity.model.price_transformer import proba_to_forecast  # noqa: E402
 
 TINY = ContextualConfig(price_seq=8, price_feats=4, macro_seq=6, macro_feats=7,
                         n_assets=2, d_model=16, n_heads=2, n_layers=1, dim_ff=32)
@@ -40,6 +41,18 @@ def test_forward_shapes_and_missing_macro():
     assert out2["daily"].shape == (5, 3)
 
 
+def test_forward_encoded_matches_forward_with_shared_macro():
+    model = build_model(TINY).eval()
+    px = torch.randn(4, TINY.price_seq, TINY.price_feats)
+    mx = torch.randn(1, TINY.macro_seq, TINY.macro_feats)
+    aid = torch.tensor([0, 1, 0, 1])
+    with torch.no_grad():
+        full = model(px, mx.expand(4, -1, -1), aid)
+        cached = model.forward_encoded(px, model.encode_macro(mx), aid)
+    for h in full:
+        assert torch.allclose(full[h], cached[h], atol=1e-5)
+
+
 def test_norm_roundtrip_and_predict():
     px = np.random.randn(20, TINY.price_seq, TINY.price_feats).astype(np.float32)
     mx = np.random.randn(20, TINY.macro_seq, TINY.macro_feats).astype(np.float32)
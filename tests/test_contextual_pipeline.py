@@ -74,3 +74,12 @@ def test_build_one_shapes_and_no_lookahead(tmp_path):
         window_last = part["macro_X"][k][-1]
         expected_last = macro.loc[macro_idx <= as_of].iloc[-1].to_numpy()
         assert np.allclose(window_last, expected_last), "macro window leaked future data"
+
+
+def test_build_one_realized_date_counts_bars_not_days(tmp_path):
+    bars = _synthetic_bars(400)
+    bars["ts"] = pd.bdate_range("2020-01-01", periods=400).astype("int64") // 10**6   # no weekends
+    bars.to_csv(tmp_path / "BTC.csv", index=False)
+    part = _build_one("BTC", 0, tmp_path / "BTC.csv", _synthetic_macro(600), 90, 60, 10, 2, 0.02, -0.02)
+    gap = part["realized"] - part["dates"]
+    assert (gap == 14).all()                    # 10 business days later
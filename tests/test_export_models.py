@@ -0,0 +1,95 @@
+"""tools/export_models.py + serving/backends.py — exported artifacts served by the registry."""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+torch = pytest.importorskip("torch")
+pytestmark = pytest.mark.filterwarnings("ignore::FutureWarning", "ignore::DeprecationWarning",
+                                        "ignore::UserWarning", "ignore::torch.jit.TracerWarning")
+
+from serving.backends import artifact_path, sidecar_path  # noqa: E402
+from serving.registry import ModelRegistry, checkpoint_entry  # noqa: E402
+from tests.test_serving import _bars, _tiny_price_checkpoint  # noqa: E402
+from tests.test_serving_models import _app_factory, _contextual_checkpoint, _macro  # noqa: E402
+from tools.export_models import export_checkpoint, select  # noqa: E402
+
+
+def test_artifact_naming():
+    assert artifact_path(Path("m/BTC.pt"), "onnx").name == "BTC.onnx"
+    assert artifact_path(Path("m/BTC.orderflow.pt"), "torchscript", int8=True).name == "BTC.orderflow.int8.ts"
+    assert artifact_path(Path("m/contextual.pt"), "onnx", part="macro").name == "contextual.macro.onnx"
+
+
+def test_select_reports_the_global_price_model_as_skipped(tmp_path):
+    for name in ("BTC.pt", "ETH.pt", "price.global.pt", "BTC.fused.pt"):
+        (tmp_path / name).write_bytes(name.encode())
+    todo, skipped = select(tmp_path, {"BTC"})
+    assert [(e.symbol, e.kind) for e in todo] == [("BTC", "price")] and todo[0].sha
+    assert {s["source"] for s in skipped} == {"BTC.fused.pt", "price.global.pt"}
+
+
+def test_torchscript_export_is_served_and_reload_tracks_it(tmp_path):
+    from deepCommodity.model.price_transformer import predict_proba
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    reg = ModelRegistry(tmp_path, backend="torchscript")
+    reg.load_all()
+    assert reg.get("BTC", "price").backend == "eager"            # nothing exported yet
+
+    rep = export_checkpoint(checkpoint_entry(tmp_path / "BTC.pt"), "torchscript", bench_iters=2)
+    assert rep["parity_ok"] and rep["max_proba_delta"] <= 1e-4
+    assert set(rep["bench"]) == {"1", "32"}
+
+    reg.load_all()                                                # the export counts as a change
+    assert reg.last_diff["changed"] == ["price/BTC"]
+    m = reg.get("BTC", "price")
+    assert m.backend == "torchscript" and reg.stats()["exported"] == 1
+    X = np.random.default_rng(0).normal(size=(5, 16, 4)).astype(np.float32)
+    eager = ModelRegistry(tmp_path)
+    eager.load_all()
+    np.testing.assert_allclose(predict_proba(m.handle, X),
+                               predict_proba(eager.get("BTC", "price").handle, X), atol=1e-5)
+
+
+def test_stale_or_failed_artifact_falls_back_to_eager(tmp_path):
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    entry = checkpoint_entry(tmp_path / "BTC.pt")
+    export_checkpoint(entry, "torchscript", bench_iters=2)
+    side = sidecar_path(artifact_path(entry.path, "torchscript"))
+    rep = json.loads(side.read_text())
+    side.write_text(json.dumps({**rep, "parity_ok": False}))
+    reg = ModelRegistry(tmp_path, backend="torchscript")
+    reg.load_all()
+    assert reg.get("BTC", "price").backend == "eager"
+
+    side.write_text(json.dumps(rep))
+    _tiny_price_checkpoint(tmp_path, "BTC")                      # retrained: sha no longer matches
+    reg.load_all()
+    assert reg.get("BTC", "price").backend == "eager"
+
+
+def test_onnx_int8_contextual_serves_forecasts(tmp_path, monkeypatch):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    _contextual_checkpoint(tmp_path)
+    rep = export_checkpoint(checkpoint_entry(tmp_path / "contextual.pt"),
+                            "onnx", int8=True, bench_iters=2)
+    assert rep["parity_ok"] and rep["artifacts"] == ["contextual.int8.onnx",
+                                                     "contextual.macro.int8.onnx"]
+    monkeypatch.setenv("DC_REGISTRY_BACKEND", "onnx")
+    monkeypatch.setenv("DC_REGISTRY_INT8", "true")
+    _, client = _app_factory(monkeypatch, tmp_path)()
+    with client as c:
+        reg = c.get("/health").json()["registry"]
+        assert reg["backend"] == "onnx-int8" and reg["exported"] == 1
+        r = c.post("/forecast", json={"symbol": "ETH", "model": "contextual",
+                                      "bars": _bars(seed=1), "macro": _macro()})
+        assert r.status_code == 200, r.text
+        assert sum(r.json()["horizons"]["weekly"]) == pytest.approx(1.0, abs=1e-5)
@@ -0,0 +1,178 @@
+"""Forecast router on-disk cache: TTL, LRU cap, key invalidation, cache_hit flag."""
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+forecast = importlib.import_module("tools.forecast")
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOL = ROOT / "tools" / "forecast.py"
+
+
+def test_cache_roundtrip_persists_to_disk(tmp_path):
+    path = tmp_path / "cache.json"
+    c = forecast.ForecastCache(path)
+    c.put("k", {"symbol": "BTC", "direction": "long", "confidence": 0.7})
+    c.flush()
+    again = forecast.ForecastCache(path)
+    assert again.get("k")["direction"] == "long"
+    assert again.get("missing") is None
+
+
+def test_cache_ttl_expires(tmp_path, monkeypatch):
+    c = forecast.ForecastCache(tmp_path / "c.json", ttl_sec=10)
+    c.put("k", {"direction": "flat"})
+    real = time.time()
+    monkeypatch.setattr(forecast.time, "time", lambda: real + 11)
+    assert c.get("k") is None
+
+
+def test_cache_lru_evicts_least_recently_used(tmp_path):
+    c = forecast.ForecastCache(tmp_path / "c.json", max_entries=2)
+    c.put("a", {"n": 1}); c.put("b", {"n": 2})
+    assert c.get("a") is not None          # a becomes most-recent
+    c.put("c", {"n": 3})                   # evicts b, not a
+    assert c.get("b") is None
+    assert c.get("a") is not None and c.get("c") is not None
+
+
+def test_corrupt_cache_file_is_ignored(tmp_path):
+    path = tmp_path / "c.json"; path.write_text("{not json")
+    c = forecast.ForecastCache(path)
+    assert c.get("anything") is None
+
+
+def test_malformed_entries_are_misses(tmp_path):
+    path = tmp_path / "c.json"
+    good = {"stored_at": time.time(), "forecast": {"symbol": "BTC"}}
+    path.write_text(json.dumps({"list": [], "str_ts": {"stored_at": "x", "forecast": {}},
+                                "no_fc": {"stored_at": time.time()}, "ok": good}))
+    c = forecast.ForecastCache(path)
+    assert [c.get(k) for k in ("list", "str_ts", "no_fc")] == [None, None, None]
+    assert c.get("ok") == {"symbol": "BTC"}
+    c._entries["late"] = {"stored_at": None, "forecast": 1}      # never raises from get()
+    assert c.get("late") is None and "late" not in c._entries
+
+
+def test_checkpoint_hash_is_memoized_per_stat(tmp_path, monkeypatch):
+    ckpt = tmp_path / "g.pt"; ckpt.write_bytes(b"weights")
+    c = forecast.ForecastCache(tmp_path / "c.json")
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda f, *a, **k: opened.append(f) or real_open(f, *a, **k))
+    keys = {forecast._cache_key(c, s, "price", ckpt=ckpt, last_bar="1") for s in ("BTC", "ETH")}
+    assert len(keys) == 2 and opened.count(ckpt) == 1
+
+
+def test_key_changes_with_last_bar_and_checkpoint(tmp_path):
+    c = forecast.ForecastCache(tmp_path / "c.json")
+    ckpt = tmp_path / "BTC.pt"; ckpt.write_bytes(b"v1")
+    k1 = forecast._cache_key(c, "BTC", "price", ckpt=ckpt, last_bar="100")
+    k2 = forecast._cache_key(c, "BTC", "price", ckpt=ckpt, last_bar="101")
+    ckpt.write_bytes(b"v2")
+    # the hash is memoized per (path, size, mtime); don't rely on the clock ticking
+    st = ckpt.stat(); os.utime(ckpt, ns=(st.st_atime_ns, st.st_mtime_ns + 10**6))
+    k3 = forecast._cache_key(c, "BTC", "price", ckpt=ckpt, last_bar="100")
+    assert len({k1, k2, k3}) == 3
+    # no timestamp column -> can't pin the input -> no caching
+    assert forecast._cache_key(c, "BTC", "price", ckpt=ckpt, last_bar=None) is None
+    assert forecast._cache_key(None, "BTC", "price", ckpt=ckpt, last_bar="100") is None
+
+
+def test_news_key_carries_the_scorer_version(tmp_path, monkeypatch):
+    import deepCommodity.model.news_model as nm
+    c = forecast.ForecastCache(tmp_path / "c.json")
+    keys = []
+    monkeypatch.setattr(forecast, "_cached", lambda cache, key, compute: keys.append(key))
+    monkeypatch.delenv("SENTIMENT_BACKEND", raising=False)
+    forecast._news_predict("BTC", "ETF approval", c)
+    monkeypatch.setattr(nm, "LEXICON_VERSION", "edited")           # lexicon/tokenizer change
+    forecast._news_predict("BTC", "ETF approval", c)
+    model = tmp_path / "sent.pkl"; model.write_bytes(b"v1")
+    monkeypatch.setenv("SENTIMENT_BACKEND", "sklearn")
+    monkeypatch.setenv("SENTIMENT_MODEL_PATH", str(model))
+    forecast._news_predict("BTC", "ETF approval", c)
+    model.write_bytes(b"v2")                                          # retrained model
+    st = model.stat(); os.utime(model, ns=(st.st_atime_ns, st.st_mtime_ns + 10**6))
+    forecast._news_predict("BTC", "ETF approval", c)
+    assert len(set(keys)) == 4 and None not in keys
+
+def test_price_predict_served_from_cache(tmp_path, monkeypatch):
+    torch = pytest.importorskip("torch")
+    from deepCommodity.model.price_transformer import TransformerConfig, build_model
+
+    cfg = TransformerConfig(seq_len=16, d_model=16, n_heads=2, n_layers=1, dim_ff=32)
+    torch.save({"state_dict": build_model(cfg).state_dict(), "config": cfg.__dict__},
+               tmp_path / "BTC.pt")
+    rng = np.random.default_rng(0)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, 40))
+    bars = tmp_path / "BTC.csv"
+    pd.DataFrame({"ts": np.arange(40), "open": close, "high": close * 1.01,
+                  "low": close * 0.99, "close": close, "volume": 1000.0}).to_csv(bars, index=False)
+    monkeypatch.setattr(forecast, "DATA_MODELS", tmp_path)
+
+    loads = []
+    real_load = forecast._load_price_model
+    monkeypatch.setattr(forecast, "_load_price_model",
+                        lambda s: loads.append(s) or real_load(s))
+    cache = forecast.ForecastCache(tmp_path / "c.json")
+    first = forecast._price_predict("BTC", bars, cache)
+    second = forecast._price_predict("BTC", bars, cache)
+    assert first["cache_hit"] is False and second["cache_hit"] is True
+    assert first["direction"] == second["direction"]
+    assert loads == ["BTC"]                # the model ran exactly once
+
+
+def test_global_price_model_loads_once_and_batches_symbols(tmp_path, monkeypatch):
+    torch = pytest.importorskip("torch")
+    import deepCommodity.model.price_transformer as pt
+
+    cfg = pt.TransformerConfig(seq_len=16, d_model=16, n_heads=2, n_layers=1, dim_ff=32, n_assets=3)
+    torch.save({"state_dict": pt.build_model(cfg).state_dict(), "config": cfg.__dict__,
+                "meta": {"symbols": ["BTC", "ETH"]}}, tmp_path / "price.global.pt")
+    rng = np.random.default_rng(0)
+    for sym in ("BTC", "ETH", "DOGE"):
+        close = 100 * np.cumprod(1 + rng.normal(0, 0.01, 40))
+        pd.DataFrame({"ts": np.arange(40), "open": close, "high": close * 1.01, "low": close * 0.99,
+                      "close": close, "volume": 1000.0}).to_csv(tmp_path / f"{sym}.csv", index=False)
+    monkeypatch.setattr(forecast, "DATA_MODELS", tmp_path)
+    loads, calls = [], []
+    real_load, real_predict = torch.load, pt.predict_proba
+    monkeypatch.setattr(torch, "load", lambda *a, **k: loads.append(a[0]) or real_load(*a, **k))
+    monkeypatch.setattr(pt, "predict_proba",
+                        lambda m, X, **k: calls.append(k["asset_id"].tolist()) or real_predict(m, X, **k))
+
+    cache = forecast.ForecastCache(tmp_path / "c.json")
+    out = forecast._price_predict_global(["BTC", "ETH", "DOGE"], tmp_path, cache)
+    assert loads == [tmp_path / "price.global.pt"] and calls == [[1, 2, 0]]   # DOGE: unknown asset
+    for sym in ("BTC", "ETH", "DOGE"):
+        single = forecast._price_infer(sym, pd.read_csv(tmp_path / f"{sym}.csv"))
+        assert {**out[sym], "cache_hit": False} == {**single, "cache_hit": False}
+    again = forecast._price_predict_global(["BTC", "ETH", "DOGE"], tmp_path, cache)
+    assert all(f["cache_hit"] for f in again.values()) and len(loads) == 1
+
+
+def test_router_news_marks_cache_hit_on_repeat(tmp_path):
+    fx = tmp_path / "fx.json"
+    fx.write_text(json.dumps({"symbols": {"BTC": {"pct_change_24h": 1.0, "pct_change_7d": 3.0}}}))
+    n = tmp_path / "n.json"; n.write_text(json.dumps({"digest": "ETF inflows surge; bullish."}))
+    args = [sys.executable, str(TOOL), "--input", str(fx), "--model", "news",
+            "--news-input", str(n), "--cache-path", str(tmp_path / "cache.json")]
+    out1 = json.loads(subprocess.run(args, capture_output=True, text=True).stdout)
+    out2 = json.loads(subprocess.run(args, capture_output=True, text=True).stdout)
+    assert out1["forecasts"][0]["cache_hit"] is False
+    assert out2["forecasts"][0]["cache_hit"] is True
+    assert out1["forecasts"][0]["direction"] == out2["forecasts"][0]["direction"]
+    # --no-cache bypasses the memo entirely
+    out3 = json.loads(subprocess.run(args + ["--no-cache"], capture_output=True, text=True).stdout)
+    assert "cache_hit" not in out3["forecasts"][0]
@@ -0,0 +1,95 @@
+"""Parallel ensemble pass: backend x symbol fan-out and per-backend deadlines."""
+from __future__ import annotations
+
+import importlib
+import time
+
+import pytest
+
+forecast = importlib.import_module("tools.forecast")
+
+DATA = {"BTC": {"pct_change_24h": 1.2, "pct_change_7d": 5.0},
+        "ETH": {"pct_change_24h": 1.0, "pct_change_7d": 4.0},
+        "SOL": {"pct_change_24h": -2.0, "pct_change_7d": -8.0}}
+
+
+def _fake(tag: str, delay: float, direction: str = "long"):
+    def predict(sym, *_a, **_k):
+        time.sleep(delay)
+        return {"symbol": sym, "direction": direction, "confidence": 0.8,
+                "rationale": f"[{tag}] fake"}
+    return predict
+
+
+def test_backends_run_concurrently(monkeypatch, tmp_path):
+    monkeypatch.setattr(forecast, "_price_predict", _fake("price", 0.3))
+    monkeypatch.setattr(forecast, "_orderflow_predict", _fake("orderflow", 0.3))
+    t0 = time.monotonic()
+    out = forecast._ensemble_pass(list(DATA), DATA, tmp_path, tmp_path, "", workers=6)
+    elapsed = time.monotonic() - t0
+    # 3 symbols x 2 backends x 0.3s = 1.8s serially; in parallel ~ one backend call
+    assert elapsed < 1.0
+    assert [f["symbol"] for f in out] == ["BTC", "ETH", "SOL"]
+    assert all("[price]" in f["rationale"] and "[orderflow]" in f["rationale"] for f in out)
+
+
+def test_backend_past_deadline_is_dropped_and_noted(monkeypatch, tmp_path):
+    monkeypatch.setattr(forecast, "_price_predict", _fake("price", 2.0, "short"))
+    monkeypatch.setattr(forecast, "_orderflow_predict", _fake("orderflow", 0.0))
+    t0 = time.monotonic()
+    out = forecast._ensemble_pass(["BTC"], DATA, tmp_path, tmp_path, "",
+                                  deadlines={"price": 0.2})
+    assert time.monotonic() - t0 < 1.5
+    btc = out[0]
+    assert "[price]" not in btc["rationale"]
+    assert "dropped: price(>0.2s)" in btc["rationale"]
+    assert "[orderflow]" in btc["rationale"] and "[rule-based]" in btc["rationale"]
+
+
+def test_backend_exception_is_dropped_not_fatal(monkeypatch, tmp_path):
+    def boom(*_a, **_k):
+        raise RuntimeError("bad checkpoint")
+    monkeypatch.setattr(forecast, "_price_predict", boom)
+    monkeypatch.setattr(forecast, "_orderflow_predict", lambda *a, **k: None)
+    out = forecast._ensemble_pass(["BTC"], DATA, tmp_path, tmp_path, "")
+    assert "price(error: bad checkpoint)" in out[0]["rationale"]
+    assert out[0]["direction"] in ("long", "short", "flat")
+
+
+def test_global_price_symbols_share_one_batched_job(monkeypatch, tmp_path):
+    batches = []
+
+    def batch(symbols, *_a):
+        batches.append(list(symbols))
+        return {s: _fake("price", 0.0)(s) for s in symbols if s != "SOL"}
+    monkeypatch.setattr(forecast, "_uses_global_price", lambda sym: sym != "ETH")
+    monkeypatch.setattr(forecast, "_price_predict_global", batch)
+    monkeypatch.setattr(forecast, "_price_predict", _fake("price", 0.0))
+    monkeypatch.setattr(forecast, "_orderflow_predict", lambda *a, **k: None)
+    out = forecast._ensemble_pass(list(DATA), DATA, tmp_path, tmp_path, "")
+    assert batches == [["BTC", "SOL"]]
+    assert ["[price]" in f["rationale"] for f in out] == [True, True, False]
+
+
+def test_parse_deadlines():
+    assert forecast._parse_deadlines(["price=5", "news=2.5"]) == {"price": 5.0, "news": 2.5}
+    with pytest.raises(SystemExit):
+        forecast._parse_deadlines(["magic=1"])
+
+
+def test_late_backend_does_not_hold_the_process_open(tmp_path):
+    import subprocess
+    import sys
+    from pathlib import Path
+    root = Path(__file__).resolve().parents[1]
+    code = ("import sys, time; sys.path.insert(0, sys.argv[1]); import tools.forecast as f; "
+            "f._price_predict = lambda *a, **k: time.sleep(30); "
+            "f._orderflow_predict = lambda *a, **k: None; "
+            "out = f._ensemble_pass(['BTC'], {}, f.Path('.'), f.Path('.'), '', deadlines={'price': 0.2}); "
+            "print(out[0]['rationale'])")
+    t0 = time.monotonic()
+    r = subprocess.run([sys.executable, "-c", code, str(root)], capture_output=True, text=True,
+                       timeout=25)
+    assert r.returncode == 0, r.stderr
+    assert "price(>0.2s)" in r.stdout
+    assert time.monotonic() - t0 < 10
@@ -44,6 +44,41 @@ def test_rulebased_neutral_when_balanced():
     assert abs(s.value) < 0.5
 
 
+def test_rulebased_matches_phrases_and_hyphenated_words():
+    from deepCommodity.model.news_model import _scan, _tokenize
+    assert _scan(_tokenize("ETF approval sends BTC to an all-time high")) == (2, 0, 1.0)
+    assert _scan(_tokenize("all time high")) == (1, 0, 1.0)
+    assert _scan(_tokenize("ETF flows flat")) == (0, 0, 1.0)         # a phrase prefix alone
+    assert _scan(_tokenize("slight sell-off, then a sharp rally")) == (1, 1, 1.3)
+    assert RuleBasedSentiment().score("Massive crash").value == -1.0
+
+
+def test_rulebased_hyphenated_compounds_count_through_their_words():
+    # hyphens split on purpose: "sell-off" is a bear hit via "sell", and
+    # "all-time high" is the same phrase as "all time high"
+    from deepCommodity.model.news_model import _scan, _tokenize
+    assert _tokenize("Sell-off") == ["sell", "off"]
+    assert _scan(_tokenize("a sell-off")) == _scan(_tokenize("a sell off")) == (0, 1, 1.0)
+    assert RuleBasedSentiment().score("Sharp sell-off").value < 0
+    assert _scan(_tokenize("all-time high")) == _scan(_tokenize("all time high")) == (1, 0, 1.0)
+
+
+def test_sentiment_bench_tool_runs(tmp_path):
+    import json
+    import subprocess
+    import sys
+    from pathlib import Path
+    tool = Path(__file__).resolve().parents[1] / "tools" / "bench_sentiment.py"
+    r = subprocess.run([sys.executable, str(tool), "--words", "2000", "--items", "10",
+                        "--item-words", "50", "--repeat", "1"], capture_output=True, text=True)
+    assert r.returncode == 0, r.stderr
+    out = json.loads(r.stdout)
+    assert out["digest"]["trie_ms"] >= 0 and out["items"]["n"] == 10
+    # phrases and split hyphens only ever add hits over the per-token reference
+    trie, ref = out["digest"]["hits"]["trie"], out["digest"]["hits"]["reference"]
+    assert trie[1] >= ref[1]
+
+
 def test_factory_returns_rulebased_by_default(monkeypatch):
     monkeypatch.delenv("SENTIMENT_BACKEND", raising=False)
     assert get_sentiment_backend().name == "rule-based"
@@ -68,3 +103,30 @@ def test_sklearn_backend_trains_and_scores():
     bear = sm.score("crash plunge bear sell")
     assert bull.value > 0.0
     assert bear.value < 0.0
+    batch = sm.score_many(["massive rally surge bull buy", "", "crash plunge bear sell"])
+    assert batch == [bull, SentimentScore(0.0, 0.0), bear]
+
+
+def test_factory_returns_one_instance_per_process(monkeypatch):
+    monkeypatch.delenv("SENTIMENT_BACKEND", raising=False)
+    assert get_sentiment_backend() is get_sentiment_backend("rule-based")
+
+
+def test_cached_backend_scores_each_distinct_text_once():
+    from deepCommodity.model.news_model import CachedSentiment
+    calls = []
+
+    class Counting(RuleBasedSentiment):
+        def score_many(self, texts):
+            calls.append(list(texts))
+            return super().score_many(texts)
+
+    cached = CachedSentiment(Counting(), max_entries=2)
+    digest = "ETF inflows surge; exchange hack fears fade"
+    first = cached.score_many([digest, digest, "crash"])
+    assert calls == [[digest, "crash"]]
+    assert first[0] == first[1] == RuleBasedSentiment().score(digest)
+    assert cached.score(digest) == first[0] and len(calls) == 1
+    cached.score("rally")                       # evicts "crash" (least recently used)
+    cached.score("crash")
+    assert calls[-1] == ["crash"] and (cached.hits, cached.misses) == (2, 4)
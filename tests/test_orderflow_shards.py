@@ -0,0 +1,72 @@
+"""Chunked order-flow pipeline: block boundaries must not change features or labels."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from deepCommodity.model.orderflow_shards import OrderflowChunker, load_shards, write_shards
+from deepCommodity.model.orderflow_transformer import make_features, make_labels, windowize
+
+
+def _tape(n: int = 2500, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ts": np.arange(n),
+        "signed_volume": rng.normal(0, 5, n),
+        "trade_count": rng.poisson(20, n),
+        "mean_size": np.abs(rng.normal(0.5, 0.2, n)),
+        "vwap_drift": rng.normal(0, 0.0005, n),
+    })
+
+
+def test_cumsum_labels_match_the_windowed_sum():
+    df = _tape(800, seed=4)
+    drift = df["vwap_drift"].to_numpy()
+    fwd = np.array([drift[i + 1 : i + 31].sum() if i < len(drift) - 30 else 0.0
+                    for i in range(len(drift))])
+    want = np.where(fwd >= 0.0008, 2, np.where(fwd <= -0.0008, 0, 1))
+    np.testing.assert_array_equal(make_labels(df, horizon_sec=30), want)
+
+
+@pytest.mark.parametrize("block", [1, 299, 1000, 5000])
+def test_chunked_shards_match_whole_tape_windows(tmp_path, block):
+    df = _tape()
+    X, y = windowize(make_features(df), make_labels(df, horizon_sec=60), seq_len=400, horizon=60)
+    blocks = (df.iloc[i : i + block] for i in range(0, len(df), block))
+    manifest = write_shards(blocks, tmp_path, horizon_sec=60, shard_rows=700)
+    assert manifest["rows"] == len(df) - 61 and len(manifest["shards"]) == 4
+    Xs, ys = load_shards(tmp_path, seq_len=400)
+    assert Xs.shape == X.shape
+    np.testing.assert_allclose(Xs, X, atol=1e-5)
+    np.testing.assert_array_equal(ys, y)
+
+
+def test_load_shards_windows_are_a_view_over_the_rows(tmp_path):
+    write_shards([_tape(1200)], tmp_path, horizon_sec=60)
+    X, _ = load_shards(tmp_path, seq_len=600)
+    assert X.base is not None and X.strides[0] == X.strides[1]     # consecutive windows overlap
+    np.testing.assert_array_equal(X[1, :-1], X[0, 1:])
+
+
+def test_chunker_holds_back_rows_until_their_horizon_is_seen():
+    ch = OrderflowChunker(horizon_sec=10)
+    f, y = ch.push(_tape(5))
+    assert len(f) == len(y) == 0
+    f, _ = ch.push(_tape(20, seed=1))
+    assert len(f) == 25 - 11 and ch.rows_out == 14
+
+
+def test_fit_on_shards_validates_in_batch_size_chunks(tmp_path):
+    torch = pytest.importorskip("torch")
+    from deepCommodity.model.orderflow_transformer import OrderflowConfig, TrainConfig, build_model, fit
+
+    write_shards([_tape(600)], tmp_path, horizon_sec=60)
+    X, y = load_shards(tmp_path, seq_len=60)
+    model = build_model(OrderflowConfig(seq_len=60, d_model=16, n_heads=2, n_layers=1, dim_ff=32))
+    seen = []
+    model.register_forward_hook(lambda m, inp, out: None if m.training else seen.append(len(inp[0])))
+    torch.manual_seed(0)
+    hist = fit(model, X, y, TrainConfig(epochs=1, batch_size=32, device="cpu"), n_val=100)
+    assert seen == [32, 32, 32, 4]
+    assert np.isfinite(hist["val_loss"][0]) and 0.0 <= hist["val_acc"][0] <= 1.0
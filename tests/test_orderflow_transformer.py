@@ -104,3 +104,53 @@ def test_proba_normalization():
 def test_proba_to_forecast_shared_helper():
     direction, conf = proba_to_forecast(np.array([0.05, 0.15, 0.80]))
     assert direction == "long" and conf > 0.6
+
+
+def test_causal_orderflow_steps_like_forward():
+    torch.manual_seed(1)
+    cfg = OrderflowConfig(seq_len=24, d_model=16, n_heads=2, n_layers=2, dim_ff=32, causal=True)
+    model = build_model(cfg).eval()
+    x = torch.randn(1, 30, 4)
+    with torch.no_grad():
+        state = model.new_state()
+        model.prime(x[:, :24], state)
+        for t in range(24, 30):
+            torch.testing.assert_close(model.step(x[:, t], state), model(x[:, t - 23 : t + 1]),
+                                       atol=1e-5, rtol=1e-4)
+
+
+def test_patch_tokens_cut_flops_tenfold_and_keep_the_newest_second():
+    from deepCommodity.model.orderflow_transformer import forward_flops
+    assert forward_flops(OrderflowConfig()) >= 10 * forward_flops(OrderflowConfig(patch_size=10))
+
+    torch.manual_seed(0)
+    cfg = OrderflowConfig(seq_len=65, d_model=16, n_heads=2, n_layers=1, dim_ff=32,
+                          dropout=0.0, patch_size=10)
+    model = build_model(cfg).eval()
+    assert model.pos.shape[1] == cfg.n_tokens == 6
+    x = torch.randn(3, 65, 4)
+    assert model.encode(x).shape == (3, 6, 16) and model(x).shape == (3, 3)
+    with torch.no_grad():
+        y = x.clone(); y[:, :5] = 99.0                    # the 5 dropped oldest seconds
+        torch.testing.assert_close(model(y), model(x))
+        y[:, -1] += 1.0                                   # the newest second is in the last patch
+        assert not torch.allclose(model(y), model(x))
+
+
+def test_patched_model_trains_and_round_trips_through_a_checkpoint(tmp_path):
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+    X = rng.normal(0, 1, (200, 40, 4)).astype(np.float32)
+    s = X[:, -10:, 0].sum(axis=1)
+    y = np.where(s < -1.5, 0, np.where(s > 1.5, 2, 1))
+    cfg = OrderflowConfig(seq_len=40, d_model=16, n_heads=2, n_layers=1, dim_ff=32,
+                          dropout=0.0, patch_size=5)
+    model = build_model(cfg)
+    hist = fit(model, X, y, TrainConfig(epochs=6, batch_size=32, lr=3e-3, patience=6, device="cpu"))
+    assert hist["train_loss"][-1] < hist["train_loss"][0]
+    torch.save({"state_dict": model.state_dict(), "config": cfg.__dict__}, tmp_path / "BTC.orderflow.pt")
+    ck = torch.load(tmp_path / "BTC.orderflow.pt")
+    assert ck["config"]["patch_size"] == 5
+    again = build_model(OrderflowConfig(**ck["config"]))
+    again.load_state_dict(ck["state_dict"])
+    np.testing.assert_allclose(predict_proba(again, X[:8]), predict_proba(model, X[:8]), atol=1e-6)
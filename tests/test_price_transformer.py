@@ -134,3 +134,81 @@ def test_proba_to_forecast_thresholds():
     # Uniform -> conf 0
     _, conf = proba_to_forecast(np.array([1/3, 1/3, 1/3]))
     assert conf == 0.0
+
+
+def test_forecast_codes_is_the_batched_proba_to_forecast():
+    from deepCommodity.model.price_transformer import CLASSES, forecast_codes
+    proba = np.random.default_rng(0).dirichlet([1, 1, 1], 500).astype(np.float32)
+    codes, conf = forecast_codes(proba, min_conf=0.3)
+    assert codes.shape == conf.shape == (500,) and (codes == 1).sum() > (proba.argmax(1) == 1).sum()
+    for p, c, k in zip(proba, codes, conf):
+        assert (CLASSES[c], float(k)) == proba_to_forecast(p, min_conf=0.3)
+
+
+# ---- causal variant -------------------------------------------------------
+
+def test_causal_step_matches_full_reencode():
+    torch.manual_seed(0)
+    cfg = TransformerConfig(seq_len=32, d_model=16, n_heads=2, n_layers=3, dim_ff=32, causal=True)
+    model = build_model(cfg).eval()
+    assert model.receptive_field <= cfg.seq_len
+    x = torch.randn(2, 60, 4)
+    with torch.no_grad():
+        state = model.new_state()
+        primed = model.prime(x[:, :32], state)
+        torch.testing.assert_close(primed, model(x[:, :32]))
+        for t in range(32, 60):
+            torch.testing.assert_close(model.step(x[:, t], state), model(x[:, t - 31 : t + 1]),
+                                       atol=1e-5, rtol=1e-4)
+    assert state["seen"] == 60
+    assert all(k.size(2) == model.window - 1 for k, _ in state["kv"])
+
+
+def test_causal_model_trains_with_fit():
+    torch.manual_seed(0)
+    rng = np.random.default_rng(3)
+    X = rng.normal(0, 1, (300, 16, 4)).astype(np.float32)
+    m = X[:, -4:, 0].mean(axis=1)
+    y = np.where(m < -0.25, 0, np.where(m > 0.25, 2, 1))
+    cfg = TransformerConfig(seq_len=16, d_model=16, n_heads=2, n_layers=2, dim_ff=32,
+                            dropout=0.0, causal=True)
+    hist = fit(build_model(cfg), X, y, TrainConfig(epochs=8, batch_size=32, lr=3e-3,
+                                                   patience=8, device="cpu"))
+    assert hist["train_loss"][-1] < hist["train_loss"][0]
+
+
+def test_causal_window_must_fit_seq_len():
+    with pytest.raises(ValueError):
+        build_model(TransformerConfig(seq_len=16, n_layers=4, attn_window=8, causal=True))
+
+
+# ---- global (cross-asset) variant -----------------------------------------
+
+def test_pool_windows_puts_each_symbols_latest_windows_in_val():
+    from deepCommodity.model.price_transformer import asset_ids, pool_windows
+    w = {s: (np.full((n, 4, 1), i, np.float32), np.arange(n)) for i, (s, n) in
+         enumerate([("ETH", 10), ("BTC", 20)])}
+    X, y, aid, symbols, n_val = pool_windows(w, val_frac=0.2)
+    assert symbols == ["BTC", "ETH"] and n_val == 2 + 4
+    assert aid[:-n_val].tolist() == [1] * 16 + [2] * 8
+    assert aid[-n_val:].tolist() == [1] * 4 + [2] * 2
+    assert y[-n_val:].tolist() == [16, 17, 18, 19, 8, 9]          # most recent of each symbol
+    assert asset_ids(symbols, ["ETH", "NEW"]).tolist() == [2, 0]
+
+
+def test_global_model_learns_asset_dependent_labels():
+    from deepCommodity.model.price_transformer import pool_windows
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+    # same features, opposite labels per asset: only the embedding can tell them apart
+    feats = rng.normal(0, 1, (240, 8, 4)).astype(np.float32)
+    base = (feats[:, -1, 0] > 0).astype(np.int64) * 2
+    X, y, aid, symbols, n_val = pool_windows({"A": (feats, base), "B": (feats, 2 - base)})
+    cfg = TransformerConfig(seq_len=8, d_model=16, n_heads=2, n_layers=1, dim_ff=32,
+                            dropout=0.0, n_assets=len(symbols) + 1, asset_dropout=0.0)
+    model = build_model(cfg)
+    hist = fit(model, X, y, TrainConfig(epochs=15, batch_size=32, lr=3e-3, patience=15,
+                                        device="cpu"), asset_id=aid, n_val=n_val)
+    assert hist["val_acc"][-1] > 0.7
+    proba = predict_proba(model, X[:4])                           # no ids -> unknown-asset slot
+    assert proba.shape == (4, 3)
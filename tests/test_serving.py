@@ -88,6 +88,7 @@ def test_reload_returns_summary(client):
     r = client.post("/reload")
     assert r.status_code == 200
     assert "reloaded" in r.json()
+    assert r.json()["changed"] == [] and r.json()["removed"] == []
 
 
 def test_forecast_fails_closed_without_key_or_open(monkeypatch, tmp_path):
@@ -132,3 +133,421 @@ def test_api_key_enforced_when_set(monkeypatch, tmp_path):
                          "pct_change_24h": 1.2, "pct_change_7d": 5.0},
                    headers={"X-API-Key": "wrong"})
         assert r.status_code == 401
+
+
+def test_batch_endpoint_returns_items_in_order(client):
+    r = client.post("/forecast/batch", json={"requests": [
+        {"symbol": "BTC", "model": "rule-based", "pct_change_24h": 1.2, "pct_change_7d": 5.0},
+        {"symbol": "ETH", "model": "price",
+         "bars": {"open": [1, 2], "high": [1, 2], "low": [1, 2], "close": [1, 2], "volume": [1, 1]}},
+        {"symbol": "SOL", "model": "rule-based", "pct_change_24h": -2.0, "pct_change_7d": -8.0},
+    ]})
+    assert r.status_code == 200, r.text
+    res = r.json()["results"]
+    assert [x["ok"] for x in res] == [True, False, True]
+    assert res[0]["forecast"]["symbol"] == "BTC" and res[0]["forecast"]["direction"] == "long"
+    assert res[1]["status_code"] == 404 and "no price model" in res[1]["error"]
+    assert res[2]["forecast"]["direction"] == "short"
+
+
+def test_batch_endpoint_rejects_empty(client):
+    assert client.post("/forecast/batch", json={"requests": []}).status_code == 422
+
+
+def test_micro_batcher_coalesces_concurrent_calls():
+    import threading
+
+    import numpy as np
+    from serving.batching import MicroBatcher
+
+    calls = []
+
+    def run(handle, X):
+        calls.append(len(X))
+        return np.stack([np.full(3, x[0, 0]) for x in X])
+
+    b = MicroBatcher(run, max_batch=8, max_wait_ms=50)
+    out = {}
+
+    def worker(i):
+        out[i] = b.infer("k", object(), np.full((4, 2), float(i)))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert sum(calls) == 8 and len(calls) < 8         # fewer forward passes than requests
+    assert all(out[i][0] == float(i) for i in range(8))   # each caller gets its own row
+
+
+def test_micro_batcher_propagates_errors():
+    import numpy as np
+    from serving.batching import MicroBatcher
+
+    def run(handle, X):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        MicroBatcher(run, max_wait_ms=0).infer("k", None, np.zeros((2, 2)))
+
+
+def _tiny_price_checkpoint(models_dir, symbol="BTC", seq_len=16):
+    torch = pytest.importorskip("torch")
+    from deepCommodity.model.price_transformer import TransformerConfig, build_model
+    cfg = TransformerConfig(seq_len=seq_len, d_model=16, n_heads=2, n_layers=1, dim_ff=32)
+    torch.save({"state_dict": build_model(cfg).state_dict(), "config": cfg.__dict__},
+               models_dir / f"{symbol}.pt")
+
+
+def _bars(n=40, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    close = (100 * np.cumprod(1 + rng.normal(0, 0.01, n))).tolist()
+    return {"open": close, "high": [c * 1.01 for c in close], "low": [c * 0.99 for c in close],
+            "close": close, "volume": [1000.0] * n}
+
+
+def test_batch_price_matches_single_forecast(monkeypatch, tmp_path):
+    _tiny_price_checkpoint(tmp_path)
+    monkeypatch.delenv("DC_API_KEY", raising=False)
+    monkeypatch.setenv("DC_ALLOW_OPEN", "true")
+    monkeypatch.setenv("MODELS_DIR", str(tmp_path))
+    for m in ("serving.app", "serving.registry"):
+        sys.modules.pop(m, None)
+    from serving.app import app
+    with TestClient(app) as c:
+        single = c.post("/forecast", json={"symbol": "BTC", "model": "price",
+                                           "bars": _bars(seed=1)}).json()
+        batch = c.post("/forecast/batch", json={"requests": [
+            {"symbol": "BTC", "model": "price", "bars": _bars(seed=s)} for s in (1, 2, 3)
+        ]}).json()["results"]
+    assert all(x["ok"] for x in batch)
+    assert batch[0]["forecast"]["proba"] == pytest.approx(single["proba"], abs=1e-5)
+
+
+def test_global_price_model_serves_symbols_without_their_own_checkpoint(monkeypatch, tmp_path):
+    torch = pytest.importorskip("torch")
+    import numpy as np
+    from deepCommodity.model.price_transformer import (
+        TransformerConfig, build_model, make_features, predict_proba,
+    )
+    import pandas as pd
+    torch.manual_seed(0)
+    cfg = TransformerConfig(seq_len=16, d_model=16, n_heads=2, n_layers=1, dim_ff=32, n_assets=3)
+    model = build_model(cfg).eval()
+    torch.save({"state_dict": model.state_dict(), "config": cfg.__dict__,
+                "meta": {"symbols": ["BTC", "ETH"]}}, tmp_path / "price.global.pt")
+    _tiny_price_checkpoint(tmp_path, "SOL")                      # its own checkpoint wins
+    monkeypatch.delenv("DC_API_KEY", raising=False)
+    monkeypatch.setenv("DC_ALLOW_OPEN", "true")
+    monkeypatch.setenv("MODELS_DIR", str(tmp_path))
+    for m in ("serving.app", "serving.registry"):
+        sys.modules.pop(m, None)
+    from serving.app import app
+    import serving.app as app_mod
+    sizes = []
+    real = app_mod._global_forward
+    monkeypatch.setattr(app_mod, "_global_forward", lambda m, X: sizes.append(len(X[0])) or real(m, X))
+    with TestClient(app) as c:
+        assert sorted(c.get("/health").json()["available_models"]["price"]) == ["GLOBAL", "SOL"]
+        items = c.post("/forecast/batch", json={"requests": [
+            {"symbol": s, "model": "price", "bars": _bars()} for s in ("BTC", "ETH", "NEWCOIN", "SOL")
+        ]}).json()["results"]
+    assert all(i["ok"] for i in items)
+    window = make_features(pd.DataFrame(_bars()))[-16:][None].astype(np.float32)
+    for item, aid in zip(items[:3], (1, 2, 0)):                  # NEWCOIN -> unknown-asset slot
+        want = predict_proba(model, window, asset_id=np.array([aid]))[0]
+        assert item["forecast"]["proba"] == pytest.approx(want.tolist(), abs=1e-5)
+    assert items[0]["forecast"]["proba"] != pytest.approx(items[1]["forecast"]["proba"], abs=1e-4)
+    assert sum(sizes) == 3                                       # SOL never hit the global model
+
+
+def test_bounded_executor_admission():
+    import threading
+
+    from serving.executor import BoundedExecutor, ExecutorSaturated
+
+    gate = threading.Event()
+    ex = BoundedExecutor(max_workers=1, max_queue=1)
+    try:
+        ex.submit(gate.wait); ex.submit(gate.wait)          # 1 running + 1 queued
+        with pytest.raises(ExecutorSaturated):
+            ex.submit(gate.wait)
+        gate.set()
+    finally:
+        gate.set(); ex.shutdown()
+
+
+def test_saturated_forecast_returns_503_with_retry_after_and_health_stays_up(client):
+    import threading
+
+    import serving.app as app_mod
+    from serving.executor import BoundedExecutor
+
+    gate = threading.Event()
+    ex = BoundedExecutor(max_workers=1, max_queue=0)
+    app_mod.EXECUTOR, saved = ex, app_mod.EXECUTOR
+    try:
+        ex.submit(gate.wait)                                 # occupy the only slot
+        r = client.post("/forecast", json={"symbol": "BTC", "model": "rule-based",
+                                           "pct_change_24h": 1.2, "pct_change_7d": 5.0})
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "1"
+        assert client.get("/health").status_code == 200
+    finally:
+        gate.set(); ex.shutdown()
+        app_mod.EXECUTOR = saved
+
+
+def test_lazy_registry_indexes_then_loads_on_demand(tmp_path):
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    _tiny_price_checkpoint(tmp_path, "ETH")
+    from serving.registry import ModelRegistry
+    reg = ModelRegistry(tmp_path, lazy=True)
+    assert reg.load_all() == {"price": ["BTC", "ETH"]}
+    assert reg.stats()["resident"] == 0 and reg.stats()["indexed"] == 2
+    m = reg.get("btc", "price")
+    assert m is not None and m.nbytes > 0
+    assert reg.get("BTC", "price") is m                 # second get is a cache hit
+    assert reg.stats()["loads"] == 1
+    assert reg.get("DOGE", "price") is None
+
+
+def test_lazy_registry_evicts_lru_past_budget(tmp_path):
+    for sym in ("BTC", "ETH", "SOL"):
+        _tiny_price_checkpoint(tmp_path, sym)
+    from serving.registry import ModelRegistry
+    probe = ModelRegistry(tmp_path, lazy=True); probe.load_all()
+    one = probe.get("BTC", "price").nbytes
+    reg = ModelRegistry(tmp_path, lazy=True, budget_bytes=int(one * 2.5))
+    reg.load_all()
+    reg.get("BTC", "price"); reg.get("ETH", "price")
+    reg.get("BTC", "price")                              # ETH is now least recently used
+    reg.get("SOL", "price")
+    st = reg.stats()
+    assert st["resident"] == 2 and st["evictions"] == 1
+    assert st["resident_bytes"] <= st["budget_bytes"]
+    assert ("ETH", "price") not in reg._models
+
+
+def test_mmap_registry_adopts_mapped_weights(tmp_path):
+    import numpy as np
+    from deepCommodity.model.price_transformer import predict_proba
+    from serving.registry import ModelRegistry
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    copied, mapped = ModelRegistry(tmp_path), ModelRegistry(tmp_path, mmap=True)
+    copied.load_all(); mapped.load_all()
+    m = mapped.get("BTC", "price")
+    assert mapped.stats()["mmap"] and m.nbytes == copied.get("BTC", "price").nbytes
+    assert not any(t.is_meta for t in m.handle.state_dict().values())
+    X = np.random.default_rng(0).normal(size=(3, 16, 4)).astype(np.float32)
+    np.testing.assert_allclose(predict_proba(m.handle, X),
+                               predict_proba(copied.get("BTC", "price").handle, X), atol=1e-6)
+
+
+def test_process_memory_reads_smaps_rollup(tmp_path):
+    from serving.memory import process_memory
+    f = tmp_path / "smaps_rollup"
+    f.write_text("00400000-7fff [rollup]\nRss:  300 kB\nPss:  200 kB\nShared_Clean:  100 kB\n"
+                 "Shared_Dirty:  0 kB\nPrivate_Clean:  50 kB\nPrivate_Dirty:  150 kB\n"
+                 "Anonymous:  140 kB\n")
+    mem = process_memory(f)
+    assert mem["rss_bytes"] == 300 * 1024 and mem["shared_bytes"] == 100 * 1024
+    assert mem["private_bytes"] == 200 * 1024 and mem["anon_bytes"] == 140 * 1024
+    assert process_memory(tmp_path / "missing") is None
+
+
+def test_lazy_reload_drops_changed_checkpoint(tmp_path):
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    from serving.registry import ModelRegistry
+    reg = ModelRegistry(tmp_path, lazy=True); reg.load_all()
+    first = reg.get("BTC", "price")
+    # touch without changing content: stays resident
+    st = (tmp_path / "BTC.pt").stat()
+    os.utime(tmp_path / "BTC.pt", (st.st_atime, st.st_mtime + 10))
+    reg.load_all()
+    assert reg.get("BTC", "price") is first
+    _tiny_price_checkpoint(tmp_path, "BTC")              # new weights
+    reg.load_all()
+    assert reg.stats()["resident"] == 0
+    assert reg.get("BTC", "price") is not first
+
+
+def test_lazy_index_hashes_only_on_first_load(tmp_path, monkeypatch):
+    import serving.registry as registry
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    _tiny_price_checkpoint(tmp_path, "ETH")
+    hashed = []
+    real = registry._file_sha256
+    monkeypatch.setattr(registry, "_file_sha256", lambda f: (hashed.append(f.name), real(f))[1])
+    reg = registry.ModelRegistry(tmp_path, lazy=True); reg.load_all()
+    assert hashed == []                                  # startup is stat-only
+    reg.get("BTC", "price")
+    reg.load_all()
+    assert hashed == ["BTC.pt"]
+
+
+def test_eager_reload_is_incremental(tmp_path):
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    _tiny_price_checkpoint(tmp_path, "ETH")
+    from serving.registry import ModelRegistry
+    reg = ModelRegistry(tmp_path); reg.load_all()
+    btc, eth = reg.get("BTC", "price"), reg.get("ETH", "price")
+    assert reg.stats()["loads"] == 2
+
+    reg.load_all()                                       # nothing changed
+    assert reg.stats()["loads"] == 2 and reg.last_diff == {"changed": [], "removed": []}
+
+    _tiny_price_checkpoint(tmp_path, "ETH")
+    _tiny_price_checkpoint(tmp_path, "SOL")
+    (tmp_path / "BTC.pt").unlink()
+    summary = reg.load_all()
+    assert sorted(summary["price"]) == ["ETH", "SOL"]
+    assert reg.last_diff == {"changed": ["price/ETH", "price/SOL"], "removed": ["price/BTC"]}
+    assert reg.get("BTC", "price") is None
+    assert reg.get("ETH", "price") is not eth
+    assert btc is not None and reg.stats()["loads"] == 4
+
+
+def test_eager_reload_keeps_old_model_when_new_checkpoint_is_corrupt(tmp_path):
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    from serving.registry import ModelRegistry
+    reg = ModelRegistry(tmp_path); reg.load_all()
+    good = reg.get("BTC", "price")
+    (tmp_path / "BTC.pt").write_bytes(b"half-written")
+    reg.load_all()
+    assert reg.get("BTC", "price") is good
+
+
+def test_registry_watch_picks_up_new_checkpoint(tmp_path):
+    import time as _time
+    from serving.registry import ModelRegistry
+    reg = ModelRegistry(tmp_path); reg.load_all()
+    reg.start_watch(0.05)
+    try:
+        _tiny_price_checkpoint(tmp_path, "BTC")
+        deadline = _time.time() + 5
+        while reg.get("BTC", "price") is None and _time.time() < deadline:
+            _time.sleep(0.05)
+        assert reg.get("BTC", "price") is not None
+    finally:
+        reg.stop_watch()
+
+
+def test_health_reports_registry_stats(monkeypatch, tmp_path):
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    monkeypatch.delenv("DC_API_KEY", raising=False)
+    monkeypatch.setenv("DC_ALLOW_OPEN", "true")
+    monkeypatch.setenv("MODELS_DIR", str(tmp_path))
+    monkeypatch.setenv("DC_REGISTRY_LAZY", "true")
+    for m in ("serving.app", "serving.registry"):
+        sys.modules.pop(m, None)
+    from serving.app import app
+    with TestClient(app) as c:
+        h = c.get("/health").json()
+        assert h["available_models"] == {"price": ["BTC"]}
+        assert h["registry"]["mode"] == "lazy" and h["registry"]["resident"] == 0
+        r = c.post("/forecast", json={"symbol": "BTC", "model": "price", "bars": _bars()})
+        assert r.status_code == 200, r.text
+        h = c.get("/health").json()
+        assert h["registry"]["resident"] == 1 and h["registry"]["loads"] == 1
+        assert h["registry"]["resident_bytes"] > 0
+        if Path("/proc/self/smaps_rollup").exists():
+            assert h["process"]["rss_bytes"] >= h["process"]["anon_bytes"] > 0
+
+
+def _metric(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not in /metrics")
+
+
+def test_metrics_histogram_renders_cumulative_buckets():
+    from serving.metrics import Histogram
+    h = Histogram("dc_test_seconds", "test", ("kind",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 5.0):
+        h.observe(v, "price")
+    out = "\n".join(h.render())
+    assert 'dc_test_seconds_bucket{kind="price",le="0.1"} 1' in out
+    assert 'dc_test_seconds_bucket{kind="price",le="1"} 3' in out
+    assert 'dc_test_seconds_bucket{kind="price",le="+Inf"} 4' in out
+    assert 'dc_test_seconds_count{kind="price"} 4' in out
+
+
+def test_metrics_endpoint_exposes_request_inference_and_registry_series(monkeypatch, tmp_path):
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    monkeypatch.delenv("DC_API_KEY", raising=False)
+    monkeypatch.setenv("DC_ALLOW_OPEN", "true")
+    monkeypatch.setenv("MODELS_DIR", str(tmp_path))
+    for m in ("serving.app", "serving.registry"):
+        sys.modules.pop(m, None)
+    from serving.app import app
+    with TestClient(app) as c:
+        before = c.get("/metrics").text
+        key = 'dc_batch_size_count{kind="price"}'
+        n0 = _metric(before, key) if key in before else 0.0
+        assert c.post("/forecast", json={"symbol": "BTC", "model": "price",
+                                         "bars": _bars()}).status_code == 200
+        c.get("/nope")
+        r = c.get("/metrics")
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain")
+        text = r.text
+        assert _metric(text, 'dc_http_requests_total{endpoint="/forecast",status="200"}') >= 1
+        assert _metric(text, 'dc_http_requests_total{endpoint="other",status="404"}') >= 1
+        assert 'endpoint="/nope"' not in text
+        assert _metric(text, 'dc_forecast_seconds_count{model="price"}') >= 1
+        assert _metric(text, 'dc_featurize_seconds_count{kind="price"}') >= 1
+        assert _metric(text, key) == n0 + 1
+        assert _metric(text, 'dc_inference_seconds_count{kind="price"}') >= 1
+        assert _metric(text, "dc_registry_resident_models") == 1
+        assert _metric(text, "dc_registry_resident_bytes") > 0
+        assert _metric(text, "dc_executor_inflight") == 0
+        assert _metric(text, "dc_reload_seconds_count") >= 1
+        assert text.count("# TYPE dc_executor_inflight gauge") == 1
+
+
+def test_packed_window_forecast_matches_json(monkeypatch, tmp_path):
+    import pandas as pd
+    from serving.wire import BAR_COLUMNS, encode_window
+    _tiny_price_checkpoint(tmp_path)
+    monkeypatch.delenv("DC_API_KEY", raising=False)
+    monkeypatch.setenv("DC_ALLOW_OPEN", "true")
+    monkeypatch.setenv("MODELS_DIR", str(tmp_path))
+    for m in ("serving.app", "serving.registry"):
+        sys.modules.pop(m, None)
+    from serving.app import app
+    bars = _bars(seed=4)
+    packed = encode_window(pd.DataFrame(bars), BAR_COLUMNS)
+    with TestClient(app) as c:
+        as_json = c.post("/forecast", json={"symbol": "BTC", "model": "price", "bars": bars})
+        as_packed = c.post("/forecast", json={"symbol": "BTC", "model": "price", "bars": packed})
+        assert as_packed.status_code == 200, as_packed.text
+        # float32 on the wire vs float64 lists: same forecast to float32 precision
+        assert as_packed.json()["proba"] == pytest.approx(as_json.json()["proba"], abs=1e-4)
+
+        short = dict(packed, shape=[packed["shape"][0] + 1, 5])
+        assert c.post("/forecast", json={"symbol": "BTC", "model": "price",
+                                         "bars": short}).status_code == 422
+        no_vol = encode_window(pd.DataFrame(bars), BAR_COLUMNS[:4])
+        r = c.post("/forecast", json={"symbol": "BTC", "model": "price", "bars": no_vol})
+        assert r.status_code == 422 and "volume" in r.text
+
+
+def test_router_api_windows_are_packed_by_default(tmp_path):
+    import importlib
+    import numpy as np
+    import pandas as pd
+    forecast = importlib.import_module("tools.forecast")
+    from serving.schemas import ForecastRequest
+    (tmp_path / "bars").mkdir(); (tmp_path / "of").mkdir()
+    pd.DataFrame(_bars(n=30)).assign(ts=range(30)).to_csv(tmp_path / "bars" / "BTC.csv", index=False)
+
+    packed = forecast._api_windows("BTC", tmp_path / "bars", tmp_path / "of")
+    assert set(packed) == {"bars"} and packed["bars"]["shape"] == [30, 5]
+    req = ForecastRequest(symbol="BTC", model="price", **packed)
+    np.testing.assert_allclose(req.bars.array[:, 3], _bars(n=30)["close"], rtol=1e-6)
+
+    as_lists = forecast._api_windows("BTC", tmp_path / "bars", tmp_path / "of", "json")
+    assert ForecastRequest(symbol="BTC", **as_lists).bars.close[-1] == pytest.approx(
+        _bars(n=30)["close"][-1])
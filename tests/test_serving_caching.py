@@ -0,0 +1,112 @@
+"""serving/caching.py — single-flight coalescing, TTL/LRU reuse, and the X-Cache header."""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from serving.caching import ResponseCache  # noqa: E402
+from tests.test_serving import _bars, _tiny_price_checkpoint  # noqa: E402
+
+
+def test_concurrent_identical_requests_compute_once():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return {"v": len(calls)}
+
+    async def main():
+        cache = ResponseCache(ttl_sec=0.1)
+        first = await asyncio.gather(*(cache.get("k", compute) for _ in range(5)))
+        again = await cache.get("k", compute)
+        await asyncio.sleep(0.15)                              # past the TTL
+        expired = await cache.get("k", compute)
+        return cache, first, again, expired
+
+    cache, first, again, expired = asyncio.run(main())
+    assert [s for _, s in first] == ["miss"] + ["coalesced"] * 4
+    assert all(v is first[0][0] for v, _ in first)
+    assert again == (first[0][0], "hit")
+    assert expired == ({"v": 2}, "miss") and len(calls) == 2
+    assert cache.stats()["hit_rate"] == pytest.approx(5 / 7, abs=1e-4)
+
+
+def test_errors_reach_waiters_but_are_not_cached():
+    calls = []
+
+    async def boom():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("bad window")
+
+    async def main():
+        cache = ResponseCache()
+        res = await asyncio.gather(cache.get("k", boom), cache.get("k", boom), return_exceptions=True)
+        again = await asyncio.gather(cache.get("k", boom), return_exceptions=True)
+        return cache, res + again
+
+    cache, res = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in res) and len(calls) == 2
+    assert len(cache) == 0
+
+
+def test_get_many_computes_each_distinct_miss_once_and_evicts_lru():
+    seen = []
+
+    async def compute(idx):
+        seen.append(idx)
+        return [f"v{i}" for i in idx]
+
+    async def main():
+        cache = ResponseCache(max_entries=2)
+        got = await cache.get_many(["a", "b", "a", "c"], compute)
+        return cache, got, await cache.get_many(["a", "c"], compute)
+
+    cache, got, again = asyncio.run(main())
+    assert seen == [[0, 1, 3], [0]]                            # "a" was the LRU entry evicted
+    assert got == [("v0", "miss"), ("v1", "miss"), ("v0", "coalesced"), ("v3", "miss")]
+    assert again == [("v0", "miss"), ("v3", "hit")]
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    TestClient = pytest.importorskip("fastapi.testclient").TestClient
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    monkeypatch.delenv("DC_API_KEY", raising=False)
+    monkeypatch.setenv("DC_ALLOW_OPEN", "true")
+    monkeypatch.setenv("MODELS_DIR", str(tmp_path))
+    for m in ("serving.app", "serving.registry"):
+        sys.modules.pop(m, None)
+    from serving.app import app
+    with TestClient(app) as c:
+        yield c
+
+
+def test_forecast_cache_header_batch_items_and_reload_invalidation(client, tmp_path):
+    body = {"symbol": "BTC", "model": "price", "bars": _bars()}
+    first = client.post("/forecast", json=body)
+    assert first.headers["x-cache"] == "miss"
+    second = client.post("/forecast", json=body)
+    assert second.headers["x-cache"] == "hit" and second.json() == first.json()
+
+    other = {"symbol": "BTC", "model": "price", "bars": _bars(seed=3)}
+    items = client.post("/forecast/batch", json={"requests": [body, other, other]}).json()["results"]
+    assert [i["cache"] for i in items] == ["hit", "miss", "coalesced"]
+    bad = client.post("/forecast/batch", json={"requests": [{"symbol": "BTC", "model": "price"}]})
+    assert bad.json()["results"][0]["cache"] == "miss"
+
+    stats = client.get("/health").json()["response_cache"]
+    assert stats["hit"] == 2 and stats["coalesced"] == 1 and stats["entries"] == 2
+
+    time.sleep(0.01)
+    _tiny_price_checkpoint(tmp_path, "BTC")                      # retrained weights
+    assert client.post("/reload").json()["changed"] == ["price/BTC"]
+    assert client.post("/forecast", json=body).headers["x-cache"] == "miss"
@@ -0,0 +1,67 @@
+"""serving/loadtest.py — request mixes, the async driver, and run-over-run reports."""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from serving.loadtest import (  # noqa: E402
+    Sample, Scenario, build_bodies, compare, run, save, summarize, synthetic_bars,
+)
+from tests.test_serving import _tiny_price_checkpoint  # noqa: E402
+
+
+def test_bodies_are_valid_requests_from_csvs_or_synthetic(tmp_path):
+    from serving.schemas import ForecastRequest
+    synthetic_bars(300, np.random.default_rng(1)).to_csv(tmp_path / "BTC.csv", index=False)
+    scn = Scenario(symbols=("BTC", "ETH"), rows=(64, 128), pool=3, bars_dir=str(tmp_path))
+    bodies = build_bodies(scn)
+    assert {m: len(b) for m, b in bodies.items()} == {"price": 6, "orderflow": 6, "ensemble": 6}
+    for body in bodies["ensemble"]:
+        req = ForecastRequest(**body)
+        assert req.bars.array.shape[0] in (64, 128) and req.orderflow is not None
+    # BTC windows come from the CSV, staggered; ETH falls back to synthetic
+    assert len({b["bars"]["data"] for b in bodies["price"] if b["symbol"] == "BTC"}) == 3
+
+
+def test_summary_percentiles_errors_and_compare(tmp_path):
+    samples = [Sample("price", 0.1 * i, float(i + 1), 200, "miss") for i in range(100)]
+    samples += [Sample("price", 1.0, 5.0, 503), Sample("ensemble", 1.0, 9.0, 0)]
+    s = summarize(samples, wall=10.0)
+    o = s["overall"]
+    assert o["requests"] == 102 and o["ok"] == 100 and o["status"] == {"0": 1, "200": 100, "503": 1}
+    assert o["p50_ms"] == pytest.approx(50.5) and o["p99_ms"] == pytest.approx(99.01)
+    assert o["throughput_rps"] == 10.0 and s["by_model"]["ensemble"]["p50_ms"] is None
+
+    prev = json.loads(save({"summary": s}, tmp_path, "base").read_text())
+    faster = summarize([Sample("price", 0, 1.0, 200)] * 10, wall=1.0)
+    assert (tmp_path / "last.json").exists()
+    d = compare({"summary": faster}, prev)
+    assert d["overall"]["p50_ms"] == {"prev": 50.5, "cur": 1.0, "delta_pct": -98.0}
+
+
+def test_closed_loop_run_against_the_app(monkeypatch, tmp_path):
+    httpx = pytest.importorskip("httpx")
+    TestClient = pytest.importorskip("fastapi.testclient").TestClient
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    monkeypatch.delenv("DC_API_KEY", raising=False)
+    monkeypatch.setenv("DC_ALLOW_OPEN", "true")
+    monkeypatch.setenv("MODELS_DIR", str(tmp_path))
+    for m in ("serving.app", "serving.registry"):
+        sys.modules.pop(m, None)
+    from serving.app import app
+    scn = Scenario(mix={"price": 1.0}, symbols=("BTC",), rows=(40,), pool=4)
+    with TestClient(app):                                       # runs the lifespan
+        samples, wall = asyncio.run(run("http://test", build_bodies(scn), scn.mix, concurrency=3,
+                                        duration=0.3, warmup=0.0,
+                                        transport=httpx.ASGITransport(app=app)))
+    s = summarize(samples, wall)["overall"]
+    assert s["requests"] > 4 and s["error_rate"] == 0.0 and s["p95_ms"] is not None
+    assert s["cache"]["miss"] <= 4 and s["cache"].get("hit", 0) > 0
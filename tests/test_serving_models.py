@@ -0,0 +1,197 @@
+"""serving — contextual and fused kinds in the registry and /forecast."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+torch = pytest.importorskip("torch")
+TestClient = pytest.importorskip("fastapi.testclient").TestClient
+
+from tests.test_serving import _bars  # noqa: E402
+
+MACRO_SEQ = 6
+
+
+def _contextual_checkpoint(models_dir: Path):
+    from deepCommodity.model.contextual_transformer import ContextualConfig, build_model, fit_norm
+    cfg = ContextualConfig(price_seq=16, macro_seq=MACRO_SEQ, n_assets=2, d_model=16,
+                           n_heads=2, n_layers=1, dim_ff=32)
+    rng = np.random.default_rng(0)
+    norm = fit_norm(rng.normal(0, 0.01, (10, 16, 4)), rng.normal(0, 1, (10, MACRO_SEQ, 7)))
+    model = build_model(cfg)
+    torch.save({"state_dict": model.state_dict(), "config": cfg.__dict__, "norm": norm,
+                "meta": {"symbols": ["BTC", "ETH"]}}, models_dir / "contextual.pt")
+    return model.eval(), cfg, norm
+
+
+def _macro(seed=0, date="2026-10-16"):
+    rows = np.random.default_rng(seed).normal(0, 1, (MACRO_SEQ + 2, 7)).tolist()
+    return {"date": date, "rows": rows}
+
+
+def _app_factory(monkeypatch, models_dir: Path):
+    """() -> (serving.app module, TestClient), freshly imported over models_dir."""
+    def make():
+        monkeypatch.delenv("DC_API_KEY", raising=False)
+        monkeypatch.setenv("DC_ALLOW_OPEN", "true")
+        monkeypatch.setenv("MODELS_DIR", str(models_dir))
+        for m in ("serving.app", "serving.registry"):
+            sys.modules.pop(m, None)
+        import serving.app as app_mod
+        return app_mod, TestClient(app_mod.app)
+    return make
+
+
+@pytest.fixture
+def app_client(monkeypatch, tmp_path):
+    return _app_factory(monkeypatch, tmp_path)
+
+
+def test_registry_classifies_contextual_and_fused():
+    from serving.registry import _classify
+    assert _classify(Path("contextual.pt")) == ("GLOBAL", "contextual")
+    assert _classify(Path("btc.fused.pt")) == ("BTC", "fused")
+    assert _classify(Path("ETH.orderflow.pt")) == ("ETH", "orderflow")
+    assert _classify(Path("SOL.pt")) == ("SOL", "price")
+
+
+def test_contextual_batch_shares_one_macro_encode_and_matches_local(app_client, tmp_path):
+    import pandas as pd
+    from deepCommodity.model.contextual_transformer import apply_norm, predict
+    from deepCommodity.model.price_transformer import make_features
+    model, cfg, norm = _contextual_checkpoint(tmp_path)
+    app_mod, client = app_client()
+    macro = _macro()
+    with client as c:
+        assert c.get("/health").json()["available_models"]["contextual"] == ["GLOBAL"]
+        r = c.post("/forecast/batch", json={"requests": [
+            {"symbol": s, "model": "contextual", "bars": _bars(seed=i), "macro": macro}
+            for i, s in enumerate(["BTC", "ETH", "BTC"])]})
+        items = r.json()["results"]
+        assert all(x["ok"] for x in items), items
+        assert app_mod.ENCODINGS.misses == 1 and app_mod.ENCODINGS.hits == 2
+
+        # same numbers as the local (off-box) path: full forward over normalized inputs
+        feats = make_features(pd.DataFrame(_bars(seed=1)))[-cfg.price_seq:]
+        pxn, mxn = apply_norm(feats[None], np.asarray(macro["rows"])[-MACRO_SEQ:][None], norm)
+        local = predict(model, pxn, mxn, np.array([1]))
+        eth = items[1]["forecast"]
+        assert eth["horizons"]["weekly"] == pytest.approx(local["weekly"][0].tolist(), abs=1e-5)
+        assert eth["horizons"]["daily"] == pytest.approx(local["daily"][0].tolist(), abs=1e-5)
+        assert eth["rationale"].startswith("contextual:")
+
+        # a new macro date is a new encoding
+        c.post("/forecast", json={"symbol": "BTC", "model": "contextual", "bars": _bars(),
+                                  "macro": _macro(seed=1, date="2026-10-17")})
+        assert app_mod.ENCODINGS.misses == 2
+
+        assert c.post("/forecast", json={"symbol": "SOL", "model": "contextual",
+                                         "bars": _bars(), "macro": macro}).status_code == 404
+        assert c.post("/forecast", json={"symbol": "BTC", "model": "contextual",
+                                         "bars": _bars()}).status_code == 422
+        short = {"date": "x", "rows": macro["rows"][:2]}
+        assert c.post("/forecast", json={"symbol": "BTC", "model": "contextual",
+                                         "bars": _bars(), "macro": short}).status_code == 422
+
+
+def test_contextual_reload_swaps_the_macro_encoding(app_client, tmp_path):
+    _contextual_checkpoint(tmp_path)
+    app_mod, client = app_client()
+    req = {"symbol": "BTC", "model": "contextual", "bars": _bars(), "macro": _macro()}
+    with client as c:
+        before = c.post("/forecast", json=req).json()["horizons"]
+        torch.manual_seed(1)                           # same config, new weights
+        _contextual_checkpoint(tmp_path)
+        assert c.post("/reload").json()["changed"] == ["contextual/GLOBAL"]
+        after = c.post("/forecast", json=req).json()["horizons"]
+        assert app_mod.ENCODINGS.misses == 2 and app_mod.ENCODINGS.hits == 0
+        assert after != before
+
+def test_fused_checkpoint_served_and_falls_back_to_ensemble(app_client, tmp_path):
+    import pandas as pd
+    from deepCommodity.model import fused_transformer, price_transformer
+    pcfg = price_transformer.TransformerConfig(seq_len=16, d_model=16, n_heads=2, n_layers=1, dim_ff=32)
+    fcfg = fused_transformer.FusedConfig(price_d_model=16, orderflow_d_model=16, fused_hidden=16)
+    fused = fused_transformer.build_model(price_transformer.build_model(pcfg), None, fcfg).eval()
+    torch.save(fused_transformer.fused_checkpoint(fused, pcfg), tmp_path / "BTC.fused.pt")
+
+    _, client = app_client()
+    with client as c:
+        r = c.post("/forecast", json={"symbol": "BTC", "model": "fused", "bars": _bars(),
+                                      "news_text": "ETF approval drives rally"}).json()
+        assert r["model"] == "fused" and r["backends_used"] == ["price", "news"]
+        feats = price_transformer.make_features(pd.DataFrame(_bars()))[-16:]
+        from deepCommodity.model.news_model import get_sentiment_backend
+        s = get_sentiment_backend().score("ETF approval drives rally")
+        with torch.no_grad():
+            ref = torch.softmax(fused(price_x=torch.tensor(feats[None], dtype=torch.float32),
+                                      news_x=torch.tensor([[s.value, s.confidence]])), -1)[0]
+        assert r["proba"] == pytest.approx(ref.tolist(), abs=1e-5)
+
+        # no fused checkpoint for ETH: the old ensemble behaviour
+        r = c.post("/forecast", json={"symbol": "ETH", "model": "fused",
+                                      "pct_change_24h": 1.2, "pct_change_7d": 5.0}).json()
+        assert r["backends_used"] == ["rule-based"]
+
+
+def test_router_sends_macro_window_for_contextual(tmp_path):
+    import importlib
+    import pandas as pd
+    from serving.schemas import ForecastRequest
+    from deepCommodity.model.contextual_transformer import MACRO_FEATURE_COLS
+    forecast = importlib.import_module("tools.forecast")
+    panel = pd.DataFrame(np.ones((10, 7)), columns=MACRO_FEATURE_COLS,
+                         index=pd.Index(pd.date_range("2026-10-01", periods=10).strftime("%Y-%m-%d"),
+                                        name="date"))
+    panel.to_csv(tmp_path / "features.csv")
+    extra = forecast._api_macro(str(tmp_path / "features.csv"))
+    req = ForecastRequest(symbol="BTC", model="contextual", **extra)
+    assert req.macro.date == "2026-10-10" and len(req.macro.rows) == 10
+    assert forecast._api_macro(str(tmp_path / "missing.csv")) == {}
+
+
+def test_fused_reuses_the_specialists_window_embedding(app_client, tmp_path):
+    import pandas as pd
+    from deepCommodity.model import fused_transformer, price_transformer
+    pcfg = price_transformer.TransformerConfig(seq_len=16, d_model=16, n_heads=2, n_layers=1, dim_ff=32)
+    fcfg = fused_transformer.FusedConfig(price_d_model=16, orderflow_d_model=16, fused_hidden=16)
+    encoder = price_transformer.build_model(pcfg)
+    torch.save({"state_dict": encoder.state_dict(), "config": pcfg.__dict__}, tmp_path / "BTC.pt")
+    fused = fused_transformer.build_model(encoder, None, fcfg).eval()
+    torch.save(fused_transformer.fused_checkpoint(fused, pcfg), tmp_path / "BTC.fused.pt")
+    # same architecture, other weights: must never be served BTC.pt's embeddings
+    other = fused_transformer.build_model(price_transformer.build_model(pcfg), None, fcfg)
+    torch.save(fused_transformer.fused_checkpoint(other, pcfg), tmp_path / "ETH.fused.pt")
+
+    app_mod, client = app_client()
+    with client as c:
+        cold = c.post("/forecast", json={"symbol": "BTC", "model": "fused", "bars": _bars(seed=1)})
+        assert cold.json()["backends_used"] == ["price"]
+        hits = app_mod.ENCODINGS.hits
+        c.post("/forecast", json={"symbol": "BTC", "model": "price", "bars": _bars(seed=2)})
+        warm = c.post("/forecast", json={"symbol": "BTC", "model": "fused", "bars": _bars(seed=2)})
+        assert app_mod.ENCODINGS.hits == hits + 1
+        feats = price_transformer.make_features(pd.DataFrame(_bars(seed=2)))[-16:]
+        with torch.no_grad():
+            ref = torch.softmax(fused(price_x=torch.tensor(feats[None], dtype=torch.float32)), -1)[0]
+        assert warm.json()["proba"] == pytest.approx(ref.tolist(), abs=1e-5)
+
+        hits = app_mod.ENCODINGS.hits
+        c.post("/forecast", json={"symbol": "ETH", "model": "fused", "bars": _bars(seed=2)})
+        assert app_mod.ENCODINGS.hits == hits
+
+
+def test_serving_imports_nothing_from_tools():
+    # serving/Dockerfile ships only deepCommodity/ and serving/
+    import ast
+    for path in (ROOT / "serving").glob("*.py"):
+        for node in ast.walk(ast.parse(path.read_text())):
+            names = ([a.name for a in node.names] if isinstance(node, ast.Import)
+                     else [node.module or ""] if isinstance(node, ast.ImportFrom) else [])
+            assert not any(n.split(".")[0] == "tools" for n in names), path.name
@@ -0,0 +1,120 @@
+"""serving/sessions.py — ring buffers, incremental features, TTL, and the /sessions API."""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from serving.sessions import SessionLimit, SessionStore, _Ring  # noqa: E402
+from tests.test_serving import _bars, _tiny_price_checkpoint  # noqa: E402
+
+
+def test_ring_keeps_newest_rows_in_order():
+    r = _Ring(4, 1)
+    r.extend(np.arange(3.0)[:, None])
+    r.extend(np.arange(3.0, 6.0)[:, None])
+    assert len(r) == 4 and r.tail(4)[:, 0].tolist() == [2, 3, 4, 5]
+    r.extend(np.arange(6.0, 16.0)[:, None])          # larger than capacity
+    assert r.tail(3)[:, 0].tolist() == [13, 14, 15]
+
+
+def _stream_features(kind, raw: np.ndarray, chunks, capacity):
+    if kind == "price":
+        from deepCommodity.model.price_transformer import FEATURE_LOOKBACK, make_features
+        cols = ("open", "high", "low", "close", "volume")
+    else:
+        from deepCommodity.model.orderflow_transformer import FEATURE_LOOKBACK, make_features
+        cols = ("signed_volume", "trade_count", "mean_size", "vwap_drift")
+    store = SessionStore(max_rows=capacity, max_bytes=1 << 30)
+    sess = store.open("BTC", kind, cols, make_features, FEATURE_LOOKBACK, min_rows=1)
+    i = 0
+    for k in chunks:
+        sess.append(raw[i:i + k]); i += k
+        sess.features(8)                               # featurize as the stream goes
+    return sess, make_features, cols
+
+
+@pytest.mark.parametrize("kind,width,seq", [("price", 5, 32), ("orderflow", 4, 64)])
+def test_incremental_features_match_full_recompute(kind, width, seq):
+    rng = np.random.default_rng(0)
+    raw = np.abs(rng.normal(1, 0.1, (900, width))) + 1
+    capacity = 500
+    sess, make_features, cols = _stream_features(kind, raw, [50, 1, 1, 200, 7, 300, 1, 340], capacity)
+    assert sess.rows == capacity and sess.dropped == 900 - capacity
+    expected = make_features(pd.DataFrame(raw[-capacity:], columns=list(cols)))[-seq:]
+    np.testing.assert_allclose(sess.features(seq), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_store_caps_memory_and_expires_idle_sessions():
+    store = SessionStore(ttl_sec=0.05, max_sessions=1, max_rows=10_000, max_bytes=8 * 1024)
+    assert store.capacity_for(5) == 8 * 1024 // 80
+    with pytest.raises(ValueError):
+        store.open("BTC", "price", ("a",) * 5, lambda df: df.to_numpy(), 1, min_rows=500)
+    s = store.open("BTC", "price", ("a",) * 5, lambda df: df.to_numpy(), 1, min_rows=2)
+    assert s.nbytes <= 8 * 1024
+    with pytest.raises(SessionLimit):
+        store.open("ETH", "price", ("a",) * 5, lambda df: df.to_numpy(), 1, min_rows=2)
+    time.sleep(0.1)
+    assert store.get(s.id) is None and store.expired == 1
+    store.open("ETH", "price", ("a",) * 5, lambda df: df.to_numpy(), 1, min_rows=2)
+
+
+@pytest.fixture
+def price_client(monkeypatch, tmp_path):
+    TestClient = pytest.importorskip("fastapi.testclient").TestClient
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    monkeypatch.delenv("DC_API_KEY", raising=False)
+    monkeypatch.setenv("DC_ALLOW_OPEN", "true")
+    monkeypatch.setenv("MODELS_DIR", str(tmp_path))
+    for m in ("serving.app", "serving.registry"):
+        sys.modules.pop(m, None)
+    from serving.app import app
+    with TestClient(app) as c:
+        yield c
+
+
+def _cols(bars: dict, lo: int, hi: int) -> dict:
+    return {k: v[lo:hi] for k, v in bars.items()}
+
+
+def test_session_stream_forecast_matches_full_window(price_client):
+    c = price_client
+    bars = _bars(n=60, seed=7)
+    r = c.post("/sessions", json={"symbol": "btc", "model": "price", "bars": _cols(bars, 0, 10)})
+    assert r.status_code == 200, r.text
+    opened = r.json()
+    sid = opened["session_id"]
+    assert opened["rows"] == 10 and opened["min_rows"] == 17
+
+    assert c.post(f"/sessions/{sid}/forecast").status_code == 422     # not enough bars yet
+    for i in range(10, 60):                                           # one bar at a time
+        assert c.post(f"/sessions/{sid}/append", json={"bars": _cols(bars, i, i + 1)}).json()["rows"] == i + 1
+    streamed = c.post(f"/sessions/{sid}/forecast").json()
+    full = c.post("/forecast", json={"symbol": "BTC", "model": "price", "bars": bars}).json()
+    assert streamed["proba"] == pytest.approx(full["proba"], abs=1e-6)
+    assert streamed["direction"] == full["direction"]
+
+    assert c.post(f"/sessions/{sid}/append", json={"orderflow": {
+        "signed_volume": [1.0], "trade_count": [1.0], "mean_size": [1.0], "vwap_drift": [0.0]}}
+    ).status_code == 422
+    assert c.delete(f"/sessions/{sid}").status_code == 204
+    assert c.post(f"/sessions/{sid}/forecast").status_code == 404
+
+
+def test_session_append_does_not_run_on_the_event_loop(price_client):
+    import inspect
+    from serving.app import append_session, open_session
+    # plain def handlers run on the threadpool, off the event loop
+    assert not inspect.iscoroutinefunction(append_session)
+    assert not inspect.iscoroutinefunction(open_session)
+
+
+def test_session_open_404s_without_model(price_client):
+    assert price_client.post("/sessions", json={"symbol": "DOGE", "model": "price"}).status_code == 404
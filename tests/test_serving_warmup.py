@@ -0,0 +1,85 @@
+"""serving/warmup.py — warm-up passes, /ready gating, and warm-before-swap on reload."""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+torch = pytest.importorskip("torch")
+
+from serving.registry import ModelRegistry  # noqa: E402
+from serving.warmup import Warmup  # noqa: E402
+from tests.test_serving import _tiny_price_checkpoint  # noqa: E402
+from tests.test_serving_models import _contextual_checkpoint  # noqa: E402
+
+
+def test_warmup_runs_every_kind(tmp_path):
+    from deepCommodity.model import fused_transformer, price_transformer
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    _contextual_checkpoint(tmp_path)
+    pcfg = price_transformer.TransformerConfig(seq_len=16, d_model=16, n_heads=2, n_layers=1, dim_ff=32)
+    fcfg = fused_transformer.FusedConfig(price_d_model=16, orderflow_d_model=16, fused_hidden=16)
+    fused = fused_transformer.build_model(price_transformer.build_model(pcfg), None, fcfg)
+    torch.save(fused_transformer.fused_checkpoint(fused, pcfg), tmp_path / "BTC.fused.pt")
+    reg = ModelRegistry(tmp_path)
+    reg.load_all()
+
+    w = Warmup(batch_sizes=(1, 4), rounds=1)
+    w.start(reg.resident()).join(timeout=30)
+    st = w.status()
+    assert st["ready"] and st["pending"] == 0 and st["errors"] == {}
+    assert set(st["models_ms"]) == {"price/BTC", "contextual/GLOBAL", "fused/BTC"}
+
+
+def test_reload_warms_changed_models_before_swapping_them_in(tmp_path):
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    reg = ModelRegistry(tmp_path)
+    reg.load_all()
+    old = reg.get("BTC", "price")
+    seen = []
+
+    def warm(m):
+        seen.append((m, reg.get("BTC", "price")))           # what is being served meanwhile
+
+    reg.warm = warm
+    time.sleep(0.01)
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    reg.load_all()
+    assert len(seen) == 1 and seen[0][1] is old             # old model served during warm-up
+    assert reg.get("BTC", "price") is seen[0][0]
+
+
+def test_ready_is_503_until_startup_warmup_finishes(monkeypatch, tmp_path):
+    TestClient = pytest.importorskip("fastapi.testclient").TestClient
+    import serving.warmup as warmup_mod
+    _tiny_price_checkpoint(tmp_path, "BTC")
+    gate = threading.Event()
+    real = warmup_mod.warm_model
+
+    def slow(loaded, batch_sizes, rounds=2):
+        gate.wait(5)
+        return real(loaded, batch_sizes, rounds)
+
+    monkeypatch.setattr(warmup_mod, "warm_model", slow)
+    monkeypatch.delenv("DC_API_KEY", raising=False)
+    monkeypatch.setenv("DC_ALLOW_OPEN", "true")
+    monkeypatch.setenv("MODELS_DIR", str(tmp_path))
+    for m in ("serving.app", "serving.registry"):
+        sys.modules.pop(m, None)
+    from serving.app import app
+    with TestClient(app) as c:
+        r = c.get("/ready")
+        assert r.status_code == 503 and r.json()["pending"] == 1
+        assert c.get("/health").status_code == 200            # liveness is unaffected
+        gate.set()
+        for _ in range(100):
+            if (r := c.get("/ready")).status_code == 200:
+                break
+            time.sleep(0.05)
+        assert r.status_code == 200 and "price/BTC" in r.json()["models_ms"]
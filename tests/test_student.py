@@ -0,0 +1,106 @@
+"""deepCommodity/model/student.py + tools/distill_student.py — NumPy student."""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from deepCommodity.model.student import (  # noqa: E402
+    _softmax, agreement, distill, load_student, summary_features,
+)
+
+
+def _windows(n=2000, T=32, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, [0.01, 0.1, 0.02, 0.01], (n, T, 4)).astype(np.float32)
+
+
+def test_summary_features_match_direct_window_stats():
+    X = _windows(n=3, T=10)
+    F = summary_features(X, lookbacks=(1, 4, 24))             # 24 doesn't fit: skipped
+    last4 = X[:, -4:].astype(np.float64)
+    expected = np.concatenate([
+        X[:, -1, [0]], X[:, -1, 1:],                            # L=1: return + means
+        last4[:, :, 0].sum(1, keepdims=True), last4[:, :, 0].std(1, keepdims=True),
+        last4[:, :, 1:].mean(1),
+    ], axis=1)
+    np.testing.assert_allclose(F, expected, atol=1e-6)
+
+
+@pytest.mark.parametrize("hidden", [0, 16])
+def test_distilled_student_tracks_teacher_and_round_trips(tmp_path, hidden):
+    X = _windows()
+    F = summary_features(X)
+    w = np.random.default_rng(1).normal(0, 1, (F.shape[1], 3))
+    teacher = _softmax((F - F.mean(0)) / F.std(0) @ w)
+    student = distill(X[:1500], teacher[:1500], hidden=hidden, epochs=150)
+    rep = agreement(student.predict_proba(X[1500:]), teacher[1500:])
+    assert rep["top1_agreement"] > 0.9 and rep["mean_kl"] < 0.05
+
+    student.meta = {"agreement": rep}
+    student.save(tmp_path / "s.npz")
+    loaded = load_student(tmp_path / "s.npz")
+    assert loaded.meta == {"agreement": rep} and loaded.seq_len == 32
+    np.testing.assert_array_equal(loaded.predict_proba(X[:5]), student.predict_proba(X[:5]))
+
+
+def _bars(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    return pd.DataFrame({"open": close, "high": close * 1.01, "low": close * 0.99,
+                         "close": close, "volume": rng.uniform(500, 1500, n)})
+
+
+def test_distill_tool_and_torch_free_forecast(tmp_path):
+    torch = pytest.importorskip("torch")
+    from deepCommodity.model.price_transformer import TransformerConfig, build_model
+    bars, models = tmp_path / "bars", tmp_path / "models"
+    bars.mkdir(); models.mkdir()
+    for i, sym in enumerate(["BTC", "ETH"]):
+        _bars(300, i).to_csv(bars / f"{sym}.csv", index=False)
+    cfg = TransformerConfig(seq_len=32, d_model=16, n_heads=2, n_layers=1, dim_ff=32)
+    torch.save({"state_dict": build_model(cfg).state_dict(), "config": cfg.__dict__},
+               models / "BTC.pt")
+    r = subprocess.run([sys.executable, str(ROOT / "tools" / "distill_student.py"),
+                        "--bars-dir", str(bars), "--models-dir", str(models),
+                        "--out", str(models / "price.student.npz"), "--epochs", "20"],
+                       capture_output=True, text=True)
+    assert r.returncode == 0, r.stderr
+    meta = json.loads(r.stdout)
+    assert meta["teachers"] == {"BTC": "BTC.pt"}                 # ETH has no teacher
+    assert set(meta["agreement"]) == {"train", "val", "latency_ms_per_symbol"}
+
+    # the router's student path must run with torch unimportable
+    code = ("import sys, runpy; sys.modules['torch'] = None; sys.argv = sys.argv[1:]; "
+            "runpy.run_path(sys.argv[0], run_name='__main__')")
+    r = subprocess.run([sys.executable, "-c", code, str(ROOT / "tools" / "forecast.py"),
+                        "--model", "student", "--symbols", "BTC,ETH,DOGE",
+                        "--bars-dir", str(bars), "--student", str(models / "price.student.npz")],
+                       capture_output=True, text=True)
+    assert r.returncode == 0, r.stderr
+    out = json.loads(r.stdout)
+    assert [f["symbol"] for f in out["forecasts"]] == ["BTC", "ETH"]
+    assert all(f["rationale"].startswith("[student]") for f in out["forecasts"])
+
+
+def test_forecast_router_student_honours_min_conf(tmp_path):
+    X = _windows(n=500)
+    F = summary_features(X)
+    teacher = _softmax((F - F.mean(0)) / F.std(0) @ np.random.default_rng(1).normal(0, 1, (F.shape[1], 3)))
+    distill(X, teacher, hidden=0, epochs=5).save(tmp_path / "s.npz")
+    bars = tmp_path / "bars"; bars.mkdir()
+    _bars(60, 0).to_csv(bars / "BTC.csv", index=False)
+    run = lambda *extra: json.loads(subprocess.run(  # noqa: E731
+        [sys.executable, str(ROOT / "tools" / "forecast.py"), "--model", "student", "--symbols", "BTC",
+         "--bars-dir", str(bars), "--student", str(tmp_path / "s.npz"), *extra],
+        capture_output=True, text=True, check=True).stdout)["forecasts"][0]
+    assert run("--min-conf", "0.0")["direction"] != "flat"
+    assert run("--min-conf", "0.99")["direction"] == "flat"
@@ -27,8 +27,7 @@ import pandas as pd
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
-from deepCommodity.model.contextual_transformer import regime_readout  # noqa: E402
-from tools.fetch_macro_features import MACRO_FEATURE_COLS  # noqa: E402
+from deepCommodity.model.contextual_transformer import MACRO_FEATURE_COLS, regime_readout  # noqa: E402
 
 
 def _load_bars(csv: Path) -> pd.DataFrame | None:
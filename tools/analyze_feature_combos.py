@@ -29,7 +29,7 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
 from tools.analyze_contextual_data import _load_bars  # noqa: E402
-from tools.fetch_macro_features import MACRO_FEATURE_COLS  # noqa: E402
+from deepCommodity.model.contextual_transformer import MACRO_FEATURE_COLS  # noqa: E402
 
 
 def _build_panel(bars: dict, macro: pd.DataFrame, horizons: dict[str, int]) -> pd.DataFrame:
@@ -62,6 +62,19 @@ def _load_json(path: Path) -> dict[str, list[Bar]]:
     return out
 
 
+def _forecaster(args):
+    if args.forecaster == "rule-based":
+        return rule_based
+    import pandas as pd
+    from deepCommodity.backtest.analog_forecaster import AnalogForecaster
+    from deepCommodity.model.analog import load_analog
+    from deepCommodity.model.contextual_transformer import MACRO_FEATURE_COLS
+    macro = pd.read_csv(args.macro, index_col="date", parse_dates=True)[MACRO_FEATURE_COLS]
+    macro.index = macro.index.normalize()
+    return AnalogForecaster(load_analog(Path(args.analog_index)), macro,
+                            min_confidence=args.min_confidence)
+
+
 def main() -> None:
     p = argparse.ArgumentParser()
     src = p.add_mutually_exclusive_group(required=True)
@@ -75,6 +88,13 @@ def main() -> None:
     p.add_argument("--warmup", type=int, default=168)
     p.add_argument("--rebalance-every", type=int, default=1)
     p.add_argument("--trades-out", help="optional path to write trade ledger CSV")
+    p.add_argument("--forecaster", choices=["rule-based", "analog"], default="rule-based",
+                   help="analog: k nearest historical windows (daily bars + macro panel)")
+    p.add_argument("--analog-index", default=str(ROOT / "data" / "models" / "analog"),
+                   help="index dir for --forecaster analog "
+                        "(tools/build_analog_index.py --close-volume-only)")
+    p.add_argument("--macro", default=str(ROOT / "data" / "macro" / "features.csv"),
+                   help="macro panel for --forecaster analog")
     args = p.parse_args()
 
     bars = _load_csv_dir(Path(args.bars_dir)) if args.bars_dir else _load_json(Path(args.bars_json))
@@ -90,7 +110,7 @@ def main() -> None:
         warmup_bars=args.warmup,
         rebalance_every=args.rebalance_every,
     )
-    res = run_backtest(bars, rule_based, cfg)
+    res = run_backtest(bars, _forecaster(args), cfg)
 
     print(json.dumps({
         "starting_nav": cfg.starting_nav,
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""Benchmark the rule-based sentiment scorer on large synthetic digests.
+
+Two workloads, each timed as the median of --repeat runs:
+
+    digest   one --words-word digest through RuleBasedSentiment.score
+    items    --items items of --item-words words through score_many
+
+The text is random filler words with lexicon entries (single words, phrases,
+hyphenated forms, intensifiers) mixed in at --hit-rate. `reference` times the
+pre-trie scorer: one token per hyphenated word, set lookups, no phrases. It is
+the baseline for the trie scan, whose result is also reported so changes to
+the lexicon show up here.
+
+    python tools/bench_sentiment.py --words 200000 --items 5000 --item-words 300
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from deepCommodity.model.news_model import (  # noqa: E402
+    BEAR_TERMS, BULL_TERMS, INTENSIFIERS, RuleBasedSentiment, _scan, _tokenize,
+)
+
+FILLER = ("the market traded on volume as investors watched rates bitcoin ether "
+          "token network fees miners exchange report quarter guidance analysts "
+          "said week price level support resistance funding").split()
+EXTRA = ["sell-off", "all time high", "ETF approval", "Massive", "short-lived"]
+
+
+def _text(rng: np.random.Generator, n_words: int, hit_rate: float) -> str:
+    lexicon = sorted(BULL_TERMS | BEAR_TERMS | set(INTENSIFIERS)) + EXTRA
+    hits = rng.random(n_words) < hit_rate
+    words = np.where(hits, rng.choice(lexicon, n_words), rng.choice(FILLER, n_words))
+    return " ".join(words.tolist())
+
+
+def _reference(text: str) -> tuple[int, int]:
+    """The pre-trie scorer's hit counts: per-token set lookups, hyphens kept."""
+    tokens = [w.lower() for w in re.findall(r"[A-Za-z][A-Za-z'-]+", text)]
+    return sum(t in BULL_TERMS for t in tokens), sum(t in BEAR_TERMS for t in tokens)
+
+
+def _median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1e3)
+    return round(statistics.median(times), 2)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--words", type=int, default=200_000, help="digest length")
+    p.add_argument("--items", type=int, default=5000)
+    p.add_argument("--item-words", type=int, default=300)
+    p.add_argument("--hit-rate", type=float, default=0.05, help="share of lexicon words")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    digest = _text(rng, args.words, args.hit_rate)
+    items = [_text(rng, args.item_words, args.hit_rate) for _ in range(args.items)]
+    scorer = RuleBasedSentiment()
+
+    bull, bear, _ = _scan(_tokenize(digest))
+    ref_bull, ref_bear = _reference(digest)
+    print(json.dumps({
+        "config": vars(args),
+        "digest": {"words": args.words,
+                   "trie_ms": _median_ms(lambda: scorer.score(digest), args.repeat),
+                   "reference_ms": _median_ms(lambda: _reference(digest), args.repeat),
+                   "hits": {"trie": [bull, bear], "reference": [ref_bull, ref_bear]}},
+        "items": {"n": args.items, "words_each": args.item_words,
+                  "trie_ms": _median_ms(lambda: scorer.score_many(items), args.repeat),
+                  "reference_ms": _median_ms(lambda: [_reference(t) for t in items], args.repeat)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
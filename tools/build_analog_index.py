@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""Build the historical-analog index over data/contextual/dataset.npz.
+
+Embeds every (price, macro) window (`--embedding raw` random-projects the
+normalized windows; `--embedding encoder` uses a trained contextual
+checkpoint's encoders) and writes the IVF index to data/models/analog/.
+Forecast from it with tools/forecast.py --model analog. Backtest bars carry
+close/volume only, so tools/backtest.py --forecaster analog needs an index
+built with --close-volume-only.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from deepCommodity.model.analog import CLOSE_VOLUME, PRICE_FEATS, build_analog_index  # noqa: E402
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--dataset", default=str(ROOT / "data" / "contextual" / "dataset.npz"))
+    p.add_argument("--out-dir", default=str(ROOT / "data" / "models" / "analog"))
+    p.add_argument("--embedding", choices=["raw", "encoder"], default="raw")
+    p.add_argument("--ckpt", default=str(ROOT / "data" / "models" / "contextual.pt"),
+                   help="contextual checkpoint for --embedding encoder")
+    p.add_argument("--dim", type=int, default=64, help="--embedding raw: projected dims")
+    p.add_argument("--n-lists", type=int, default=None,
+                   help="IVF lists (default: sqrt of the window count)")
+    p.add_argument("--close-volume-only", action="store_true",
+                   help="embed pct_close/log_vol_chg only (needed for tools/backtest.py)")
+    args = p.parse_args()
+
+    if not Path(args.dataset).exists():
+        sys.exit(f"no dataset at {args.dataset}; run tools/build_contextual_dataset.py first")
+    t0 = time.time()
+    meta = build_analog_index(Path(args.dataset), Path(args.out_dir), embedding=args.embedding,
+                              ckpt=Path(args.ckpt) if args.embedding == "encoder" else None,
+                              dim=args.dim, n_lists=args.n_lists,
+                              price_feats=CLOSE_VOLUME if args.close_volume_only else PRICE_FEATS)
+    meta.pop("norm", None)
+    print(json.dumps({"out": args.out_dir, "build_sec": round(time.time() - t0, 1), **meta}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
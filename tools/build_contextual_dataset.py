@@ -8,6 +8,8 @@ For each asset and each prediction date D (the close of a daily bar):
   y_weekly: sign of the forward return over `weekly_h` days past D    {0,1,2}
   y_daily : sign of the forward return over `daily_h` days past D     {0,1,2}
   date    : D (ordinal) — used for chronological / walk-forward splits
+  realized: date (ordinal) of the bar `weekly_h` bars past D, when both labels
+            are known; bars skip weekends/holidays, so not D + weekly_h days
   asset_id: index into the asset list
 
 Macro rows are sliced as-of D (`macro.loc[:D]`); features.csv is already
@@ -30,7 +32,7 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
 from deepCommodity.model.price_transformer import make_features, make_labels  # noqa: E402
-from tools.fetch_macro_features import MACRO_FEATURE_COLS  # noqa: E402
+from deepCommodity.model.contextual_transformer import MACRO_FEATURE_COLS  # noqa: E402
 
 
 def _build_one(sym: str, asset_id: int, bars_csv: Path, macro: pd.DataFrame,
@@ -52,7 +54,7 @@ def _build_one(sym: str, asset_id: int, bars_csv: Path, macro: pd.DataFrame,
     r_dl = (df["close"].shift(-daily_h) / df["close"] - 1.0).to_numpy()[1:]
     bar_dates = ts.values[1:]                       # date for feats[k]
 
-    px, mx, yw, yd, rw, rd, dates = [], [], [], [], [], [], []
+    px, mx, yw, yd, rw, rd, dates, realized = [], [], [], [], [], [], [], []
     for j in range(price_seq - 1, len(feats) - weekly_h):
         D = pd.Timestamp(bar_dates[j]).normalize()
         mwin = macro.loc[:D]
@@ -63,6 +65,7 @@ def _build_one(sym: str, asset_id: int, bars_csv: Path, macro: pd.DataFrame,
         yw.append(int(y_wk[j])); yd.append(int(y_dl[j]))
         rw.append(float(np.nan_to_num(r_wk[j]))); rd.append(float(np.nan_to_num(r_dl[j])))
         dates.append(int(D.toordinal()))
+        realized.append(int(pd.Timestamp(bar_dates[j + weekly_h]).toordinal()))
     if not px:
         return None
     return {
@@ -73,6 +76,7 @@ def _build_one(sym: str, asset_id: int, bars_csv: Path, macro: pd.DataFrame,
         "r_weekly": np.asarray(rw, dtype=np.float32),
         "r_daily": np.asarray(rd, dtype=np.float32),
         "dates": np.asarray(dates, dtype=np.int64),
+        "realized": np.asarray(realized, dtype=np.int64),
         "asset_id": np.full(len(px), asset_id, dtype=np.int64),
         "symbol": sym,
     }
@@ -113,7 +117,7 @@ def main() -> None:
     out = Path(args.out); out.parent.mkdir(parents=True, exist_ok=True)
     merged = {k: np.concatenate([p[k] for p in parts]) for k in
               ("price_X", "macro_X", "y_weekly", "y_daily", "r_weekly", "r_daily",
-               "dates", "asset_id")}
+               "dates", "realized", "asset_id")}
     np.savez_compressed(out, **merged)
     meta = {
         "symbols": syms, "n_samples": int(len(merged["price_X"])),
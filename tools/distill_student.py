@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""Distill the price transformer(s) into one NumPy-only student for screening.
+
+For every bars CSV with a teacher (<SYM>.pt, else price.global.pt), slides the
+teacher's window over the history, records its class probabilities and fits
+deepCommodity.model.student on (summary features -> teacher proba). The oldest
+(1 - val_frac) of each symbol's windows are used for training. The newest
+ones are held out for the agreement report, which is also stored in the
+student's meta. The result is data/models/price.student.npz, which
+tools/forecast.py --model student runs without torch.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _teacher(models_dir: Path, sym: str):
+    """(model, cfg, asset id array or None, checkpoint path) or None."""
+    import torch
+    from deepCommodity.model.price_transformer import TransformerConfig, asset_ids, build_model
+    path = models_dir / f"{sym}.pt"
+    if not path.exists():
+        path = models_dir / "price.global.pt"
+        if not path.exists():
+            return None
+    ck = torch.load(path, map_location="cpu")
+    cfg = TransformerConfig(**ck["config"])
+    model = build_model(cfg)
+    model.load_state_dict(ck["state_dict"])
+    aid = asset_ids(ck.get("meta", {}).get("symbols", []), [sym]) if cfg.n_assets else None
+    return model.eval(), cfg, aid, path
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--bars-dir", default=str(ROOT / "data" / "bars"))
+    p.add_argument("--models-dir", default=str(ROOT / "data" / "models"))
+    p.add_argument("--out", default=str(ROOT / "data" / "models" / "price.student.npz"))
+    p.add_argument("--symbols", default="", help="comma-sep filter; default = all CSVs in bars-dir")
+    p.add_argument("--stride", type=int, default=1, help="step between teacher windows")
+    p.add_argument("--val-frac", type=float, default=0.2)
+    p.add_argument("--hidden", type=int, default=32, help="0 = softmax regression")
+    p.add_argument("--epochs", type=int, default=200)
+    p.add_argument("--lr", type=float, default=1e-2)
+    args = p.parse_args()
+
+    try:
+        import torch  # noqa: F401
+    except ImportError:
+        sys.exit("the teacher needs torch; pip install torch (CPU build is fine)")
+    from deepCommodity.model.price_transformer import make_features, predict_proba
+    from deepCommodity.model.student import agreement, distill
+
+    files = sorted(Path(args.bars_dir).glob("*.csv"))
+    if args.symbols:
+        wanted = {s.strip().upper() for s in args.symbols.split(",")}
+        files = [f for f in files if f.stem.upper() in wanted]
+
+    train_X, train_P, val_X, val_P, teachers = [], [], [], [], {}
+    seq_len = None
+    for f in files:
+        sym = f.stem.upper()
+        loaded = _teacher(Path(args.models_dir), sym)
+        if loaded is None:
+            print(f"  {sym}: skipped — no teacher checkpoint", file=sys.stderr)
+            continue
+        model, cfg, aid, path = loaded
+        if seq_len is not None and cfg.seq_len != seq_len:
+            print(f"  {sym}: skipped — seq_len {cfg.seq_len} != {seq_len}", file=sys.stderr)
+            continue
+        seq_len = cfg.seq_len
+        feats = make_features(pd.read_csv(f)).astype(np.float32)
+        if len(feats) < seq_len:
+            continue
+        X = np.lib.stride_tricks.sliding_window_view(feats, (seq_len, feats.shape[1]))[::args.stride, 0]
+        X = np.ascontiguousarray(X)
+        P = predict_proba(model, X, asset_id=None if aid is None else np.repeat(aid, len(X)))
+        cut = int(len(X) * (1 - args.val_frac))
+        train_X.append(X[:cut]); train_P.append(P[:cut])
+        val_X.append(X[cut:]); val_P.append(P[cut:])
+        teachers[sym] = path.name
+        print(f"  {sym}: {len(X)} windows from {path.name}", file=sys.stderr)
+    if not teachers:
+        sys.exit("no symbols with both bars and a teacher checkpoint")
+
+    X, P = np.concatenate(train_X), np.concatenate(train_P)
+    vX, vP = np.concatenate(val_X), np.concatenate(val_P)
+    student = distill(X, P, hidden=args.hidden, epochs=args.epochs, lr=args.lr)
+    report = {"train": agreement(student.predict_proba(X), P),
+              "val": agreement(student.predict_proba(vX), vP)}
+
+    # per-symbol screening cost: one window per symbol, as the watch loop runs it
+    sym0 = next(iter(teachers))
+    model, _, aid, _ = _teacher(Path(args.models_dir), sym0)
+    probe = vX[-1:] if len(vX) else X[-1:]
+    t0 = time.perf_counter()
+    for _ in range(20):
+        predict_proba(model, probe, asset_id=aid)
+    teacher_ms = (time.perf_counter() - t0) / 20 * 1e3
+    batch = np.repeat(probe, 250, axis=0)
+    t0 = time.perf_counter()
+    for _ in range(20):
+        student.predict_proba(batch)
+    student_ms = (time.perf_counter() - t0) / 20 / 250 * 1e3
+    report["latency_ms_per_symbol"] = {"teacher": round(teacher_ms, 3), "student": round(student_ms, 4)}
+
+    student.meta = {"teachers": teachers, "hidden": args.hidden, "agreement": report}
+    out = Path(args.out); out.parent.mkdir(parents=True, exist_ok=True)
+    student.save(out)
+    print(json.dumps({"out": str(out), **student.meta}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
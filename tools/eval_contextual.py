@@ -27,8 +27,9 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
 from deepCommodity.model.contextual_transformer import (  # noqa: E402
-    apply_norm, build_model, predict, proba_to_forecast, ContextualConfig,
+    apply_norm, build_model, predict, ContextualConfig,
 )
+from deepCommodity.model.price_transformer import forecast_codes  # noqa: E402
 
 ACC_LIFT_GATE = 0.05      # weekly directional-accuracy lift vs baseline
 COST_BPS = 7.0            # round-trip cost proxy on a taken long
@@ -72,9 +73,7 @@ def evaluate(ds_path: Path, ckpt_path: Path, test_frac: float, min_conf: float)
     px, mx = apply_norm(d["price_X"][te], d["macro_X"][te], norm)
     proba = predict(model, px, mx, d["asset_id"][te])["weekly"]
 
-    ctx_dir = np.array([2 if proba_to_forecast(p, min_conf)[0] == "long"
-                        else 0 if proba_to_forecast(p, min_conf)[0] == "short"
-                        else 1 for p in proba], np.int64)
+    ctx_dir, _ = forecast_codes(proba, min_conf)    # codes share the labels' 0/1/2
     base_dir = _baseline_dir(d["price_X"][te])
     y, r = d["y_weekly"][te], d["r_weekly"][te]
 
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+"""Export serving checkpoints to TorchScript or ONNX (optionally int8) for CPU inference.
+
+For every checkpoint under --models-dir this writes the exported artifact next to
+it (naming: serving/backends.py), runs a parity check of exported vs eager
+softmax outputs on random inputs, benchmarks both at a few batch sizes and
+writes `<artifact>.json` with the source checkpoint's sha256, the max
+probability delta, the tolerance, parity_ok and the timings. The API serves an
+artifact only with DC_REGISTRY_BACKEND=<format> (+ DC_REGISTRY_INT8=true) and
+only while the sidecar still matches the checkpoint and parity_ok is true.
+
+int8 is dynamic quantization of the Linear layers (weights int8, activations
+quantized on the fly): torch.ao quantize_dynamic before tracing for TorchScript,
+onnxruntime.quantization.quantize_dynamic for ONNX. Fused checkpoints and the
+cross-asset price.global.pt (its asset_id input is not traced) are not exported
+and stay eager; they are listed under "skipped", the global model whenever it
+serves a requested symbol.
+
+    python tools/export_models.py --format onnx --int8 --only BTC
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import inspect
+import json
+import statistics
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from serving.backends import (  # noqa: E402
+    EXPORTABLE, artifact_parts, artifact_path, open_artifact, sidecar_path,
+)
+from serving.registry import GLOBAL_SYMBOL, CheckpointEntry, checkpoint_entry, load_eager  # noqa: E402
+
+FP32_TOL = 1e-4           # max |proba delta| for a float32 export
+INT8_TOL = 0.05           # dynamic int8 moves probabilities by ~1e-2
+
+
+@contextlib.contextmanager
+def _no_fastpath():
+    """Trace the plain TransformerEncoder path: the fused fast path can't be
+    traced over quantized Linears and isn't what ONNX export sees either."""
+    import torch
+    prev = torch.backends.mha.get_fastpath_enabled()
+    torch.backends.mha.set_fastpath_enabled(False)
+    try:
+        yield
+    finally:
+        torch.backends.mha.set_fastpath_enabled(prev)
+
+
+def _sample(kind: str, config: dict, rows: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    if kind == "contextual":
+        return {"price_x": rng.normal(size=(rows, config["price_seq"], config["price_feats"])),
+                "macro_x": rng.normal(size=(1, config["macro_seq"], config["macro_feats"])),
+                "asset_id": rng.integers(0, config["n_assets"], rows)}
+    return {"x": rng.normal(size=(rows, config["seq_len"], config["n_features"]))}
+
+
+def _head(sample: dict, n: int) -> dict:
+    """The first n rows of a sample (the macro window is shared, never sliced)."""
+    return {k: (v if k == "macro_x" else np.resize(v, (n,) + v.shape[1:])) for k, v in sample.items()}
+
+
+def _proba(kind: str, model, sample: dict) -> np.ndarray:
+    """(N, 3) softmax (contextual: (N, horizons, 3)) — same code path for eager and exported."""
+    import torch
+    if kind != "contextual":
+        from deepCommodity.model.price_transformer import predict_proba
+        return predict_proba(model, sample["x"].astype(np.float32))
+    from deepCommodity.model.contextual_transformer import HORIZONS
+    with torch.no_grad():
+        macro_h = model.encode_macro(torch.from_numpy(sample["macro_x"].astype(np.float32)))
+        logits = model.forward_encoded(torch.from_numpy(sample["price_x"].astype(np.float32)),
+                                       macro_h, torch.from_numpy(sample["asset_id"]).long())
+        return np.stack([torch.softmax(logits[h], -1).numpy() for h in HORIZONS], axis=1)
+
+
+def _modules(kind: str, model, sample: dict) -> dict:
+    """part -> (module, example inputs, input names, output names, batch-dynamic names)."""
+    import torch
+    from torch import nn
+    if kind != "contextual":
+        x = torch.from_numpy(sample["x"].astype(np.float32))
+        return {"": (model, (x,), ["x"], ["logits"], ["x", "logits"])}
+
+    from deepCommodity.model.contextual_transformer import HORIZONS
+
+    class Head(nn.Module):
+        def __init__(self, m):
+            super().__init__()
+            self.m = m
+
+        def forward(self, price_x, macro_h, asset_id):
+            out = self.m.forward_encoded(price_x, macro_h, asset_id)
+            return torch.stack([out[h] for h in HORIZONS], dim=1)
+
+    class Macro(nn.Module):
+        def __init__(self, m):
+            super().__init__()
+            self.m = m
+
+        def forward(self, macro_x):
+            return self.m.encode_macro(macro_x)
+
+    px = torch.from_numpy(sample["price_x"].astype(np.float32))
+    mx = torch.from_numpy(sample["macro_x"].astype(np.float32))
+    aid = torch.from_numpy(sample["asset_id"]).long()
+    with torch.no_grad():
+        mh = model.encode_macro(mx)
+    return {"": (Head(model), (px, mh, aid), ["price_x", "macro_h", "asset_id"], ["logits"],
+                 ["price_x", "asset_id", "logits"]),
+            "macro": (Macro(model), (mx,), ["macro_x"], ["macro_h"], [])}
+
+
+def _export_part(module, inputs: tuple, path: Path, fmt: str, int8: bool,
+                 input_names: list[str], output_names: list[str], dynamic: list[str]) -> None:
+    import torch
+    module = module.eval()
+    with _no_fastpath(), torch.no_grad():
+        if fmt == "torchscript":
+            if int8:
+                module = torch.ao.quantization.quantize_dynamic(
+                    module, {torch.nn.Linear}, dtype=torch.qint8)
+            torch.jit.save(torch.jit.trace(module, inputs, check_trace=False), str(path))
+            return
+        fp32 = path.with_name(path.name + ".fp32.tmp") if int8 else path
+        # the TorchScript-based exporter; newer torch defaults to dynamo, older lacks the flag
+        legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+        torch.onnx.export(module, inputs, str(fp32), input_names=input_names,
+                          output_names=output_names, opset_version=17,
+                          dynamic_axes={n: {0: "batch"} for n in dynamic}, **legacy)
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        try:
+            quantize_dynamic(str(fp32), str(path), weight_type=QuantType.QInt8)
+        finally:
+            fp32.unlink(missing_ok=True)
+
+
+def _median_ms(fn, iters: int) -> float:
+    fn()                                        # warm-up (allocations, lazy init)
+    times = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return round(statistics.median(times) * 1000, 3)
+
+
+def export_checkpoint(entry: CheckpointEntry, fmt: str, int8: bool = False,
+                      tol: float | None = None, parity_rows: int = 64,
+                      bench_batches: tuple[int, ...] = (1, 32), bench_iters: int = 20) -> dict:
+    """Export one checkpoint, check parity, benchmark, write the sidecar; returns it."""
+    tol = tol if tol is not None else (INT8_TOL if int8 else FP32_TOL)
+    eager = load_eager(entry)
+    sample = _sample(entry.kind, eager.config, parity_rows)
+    for part, (module, inputs, names_in, names_out, dynamic) in _modules(
+            entry.kind, eager.handle, sample).items():
+        _export_part(module, inputs, artifact_path(entry.path, fmt, int8, part),
+                     fmt, int8, names_in, names_out, dynamic)
+
+    exported, nbytes = open_artifact(entry.kind, entry.path, fmt, int8)
+    delta = float(np.max(np.abs(_proba(entry.kind, eager.handle, sample)
+                                - _proba(entry.kind, exported, sample))))
+    bench = {}
+    for b in bench_batches:
+        s = _head(sample, b)
+        e_ms = _median_ms(lambda: _proba(entry.kind, eager.handle, s), bench_iters)
+        x_ms = _median_ms(lambda: _proba(entry.kind, exported, s), bench_iters)
+        bench[str(b)] = {"eager_ms": e_ms, "exported_ms": x_ms,
+                         "speedup": round(e_ms / x_ms, 2) if x_ms else None}
+
+    report = {
+        "source": entry.path.name,
+        "source_sha": entry.sha,
+        "symbol": entry.symbol,
+        "kind": entry.kind,
+        "format": fmt,
+        "quantized": "int8" if int8 else None,
+        "artifacts": [artifact_path(entry.path, fmt, int8, p).name for p in artifact_parts(entry.kind)],
+        "artifact_bytes": nbytes,
+        "eager_bytes": eager.nbytes,
+        "max_proba_delta": round(delta, 6),
+        "tolerance": tol,
+        "parity_ok": bool(delta <= tol),
+        "parity_rows": parity_rows,
+        "bench": bench,
+        "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    sidecar_path(artifact_path(entry.path, fmt, int8)).write_text(json.dumps(report, indent=2))
+    return report
+
+
+def select(models_dir: Path, only: set[str] | None = None) -> tuple[list[CheckpointEntry], list[dict]]:
+    """(checkpoints to export, skipped ones with a reason). The global price
+    model serves every symbol without its own checkpoint, so it is reported
+    even when `only` names symbols."""
+    todo, skipped = [], []
+    for f in sorted(Path(models_dir).glob("*.pt")):
+        entry = checkpoint_entry(f, hashed=False)
+        global_price = entry.symbol == GLOBAL_SYMBOL and entry.kind == "price"
+        if only is not None and entry.symbol not in only and not global_price:
+            continue
+        if entry.kind not in EXPORTABLE:
+            skipped.append({"source": f.name, "reason": f"{entry.kind} is served eager"})
+        elif global_price:                               # traced graphs would drop asset_id
+            skipped.append({"source": f.name, "reason": "cross-asset price is served eager"})
+        else:
+            todo.append(checkpoint_entry(f))
+    return todo, skipped
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("--models-dir", default=str(ROOT / "data" / "models"))
+    p.add_argument("--format", choices=["torchscript", "onnx"], default="torchscript")
+    p.add_argument("--int8", action="store_true", help="dynamic int8 quantization of Linear layers")
+    p.add_argument("--only", nargs="*", default=None, help="symbols to export (default: all)")
+    p.add_argument("--tol", type=float, default=None,
+                   help=f"max proba delta (default {FP32_TOL} fp32, {INT8_TOL} int8)")
+    p.add_argument("--parity-rows", type=int, default=64)
+    p.add_argument("--bench-batch", type=int, nargs="*", default=[1, 32])
+    p.add_argument("--bench-iters", type=int, default=20)
+    args = p.parse_args()
+    warnings.filterwarnings("ignore", category=FutureWarning)        # jit.* deprecation notes
+    warnings.filterwarnings("ignore", category=DeprecationWarning)   # legacy ONNX exporter
+    warnings.filterwarnings("ignore", message="Converting a tensor to a Python")  # shape asserts
+
+    only = {s.upper() for s in args.only} if args.only else None
+    todo, skipped = select(Path(args.models_dir), only)
+    out = {"exported": [], "skipped": skipped, "failed": []}
+    for entry in todo:
+        try:
+            rep = export_checkpoint(entry, args.format, args.int8, args.tol, args.parity_rows,
+                                    tuple(args.bench_batch), args.bench_iters)
+        except Exception as e:  # noqa: BLE001 — report and keep exporting the rest
+            out["failed"].append({"source": entry.path.name, "error": f"{type(e).__name__}: {e}"})
+            continue
+        out["exported" if rep["parity_ok"] else "failed"].append(rep)
+    print(json.dumps(out, indent=2))
+    sys.exit(1 if out["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -36,15 +36,7 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
 # Feature columns the model consumes (order matters — it's the macro channel layout).
-MACRO_FEATURE_COLS = [
-    "m2_yoy",          # M2 year-over-year growth
-    "netliq_z",        # net liquidity level, trailing z-score
-    "netliq_chg4w",    # net liquidity 4-week change (normalized)
-    "dxy_z",           # broad USD index level, trailing z-score
-    "dxy_chg4w",       # USD 4-week change
-    "totalcap_chg4w",  # total crypto market cap 4-week change
-    "btc_dom",         # BTC dominance in [0,1]
-]
+from deepCommodity.model.contextual_transformer import MACRO_FEATURE_COLS  # noqa: E402,F401
 
 # FRED series + assumed publication lag in days (conservative). See plan's leakage table.
 FRED_SERIES = {
@@ -8,18 +8,36 @@ Backends (selected via --model):
   news           : Phase 7 sentiment scorer        (no checkpoint needed for rule-based)
   fused          : Phase 8 fused multi-modal       (data/models/<SYM>.fused.pt)
   ensemble       : weighted average of available models for the symbol
+                   (backends run in parallel; --deadline name=sec drops a slow one)
+  contextual     : global macro-contextual model     (data/models/contextual.pt)
+  analog         : k nearest historical windows     (data/models/analog/)
+  student        : distilled NumPy price model      (data/models/price.student.npz)
+                   no torch; screens hundreds of symbols in one batch
 
 Output (always):
   {"forecasts": [{"symbol": ..., "direction": "long|short|flat",
                    "confidence": 0..1, "rationale": "..."}, ...]}
+
+Model-backed forecasts (price / orderflow / news) are memoized in a small on-disk
+cache keyed by (symbol, backend, checkpoint hash, last input bar ts, news digest
+hash), so repeat passes inside the same bar are served without re-running
+inference. Those forecasts carry `"cache_hit": true|false`. Disable with
+--no-cache; tune with --cache-ttl / --cache-max / DC_FORECAST_CACHE.
 """
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import os
+import queue
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -29,6 +47,15 @@ DATA_MODELS = ROOT / "data" / "models"
 
 DC_API_URL_ENV = "DC_API_URL"
 DC_API_KEY_ENV = "DC_API_KEY"
+DC_FORECAST_CACHE_ENV = "DC_FORECAST_CACHE"
+DEFAULT_CACHE_PATH = Path(tempfile.gettempdir()) / "dc_forecast_cache.json"
+
+# Per-backend wall-clock budget (seconds, from the start of the ensemble pass). A
+# backend still running past its budget is dropped from that symbol's vote.
+ENSEMBLE_DEADLINES = {"price": 30.0, "orderflow": 30.0, "news": 15.0}
+
+# Trailing rows of bars / order flow sent with --model api (covers seq_len + warm-up).
+API_WINDOW_ROWS = 1024
 
 
 # ---- rule-based (no torch) -------------------------------------------------
@@ -56,6 +83,115 @@ def rule_based(symbols_data: dict[str, dict]) -> list[dict]:
     return out
 
 
+# ---- forecast cache (on-disk, TTL + LRU) -----------------------------------
+
+class ForecastCache:
+    """JSON-file memo of forecast dicts. Entries expire after `ttl_sec`; the file is
+    capped at `max_entries`, evicting least-recently-used first. A corrupt or
+    unreadable file is treated as empty — the cache must never break a forecast."""
+
+    def __init__(self, path: Path, ttl_sec: float = 3600.0, max_entries: int = 512):
+        self.path = Path(path)
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._entries: dict[str, dict] = {}
+        self._dirty = False
+        self._lock = threading.Lock()   # ensemble backends share one cache across threads
+        try:
+            raw = json.loads(self.path.read_text())
+            if isinstance(raw, dict):
+                self._entries = {k: e for k, e in raw.items() if _valid_entry(e)}
+        except Exception:  # noqa: BLE001
+            pass
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            e = self._entries.get(key)
+            if e is None:
+                return None
+            if not _valid_entry(e) or time.time() - e["stored_at"] > self.ttl_sec:
+                self._entries.pop(key); self._dirty = True
+                return None
+            self._entries[key] = self._entries.pop(key)    # move to MRU end
+            self._dirty = True
+            return dict(e["forecast"])
+
+    def put(self, key: str, forecast: dict) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = {"stored_at": time.time(), "forecast": forecast}
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))   # LRU is the oldest insertion
+            self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(self._entries))
+                os.replace(tmp, self.path)
+                self._dirty = False
+            except Exception:  # noqa: BLE001
+                pass
+
+
+def _valid_entry(e) -> bool:
+    return (isinstance(e, dict) and isinstance(e.get("forecast"), dict)
+            and isinstance(e.get("stored_at"), (int, float)) and not isinstance(e["stored_at"], bool))
+
+
+_SHA_MEMO: dict[tuple[Path, int, int], str] = {}
+
+
+def _file_sha256(path: Path) -> str:
+    """Short content hash, memoized per (path, size, mtime): every symbol keyed
+    on price.global.pt would otherwise re-read it."""
+    st = path.stat()
+    memo = (Path(path), st.st_size, st.st_mtime_ns)
+    if memo not in _SHA_MEMO:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _SHA_MEMO[memo] = h.hexdigest()[:16]
+    return _SHA_MEMO[memo]
+
+
+def _last_bar_ts(df) -> str | None:
+    if "ts" not in df.columns or df.empty:
+        return None
+    return str(df["ts"].iloc[-1])
+
+
+def _cache_key(cache: ForecastCache | None, symbol: str, backend: str, *,
+               ckpt: Path | None = None, last_bar: str | None = None,
+               news_text: str | None = None) -> str | None:
+    """None when caching is off or the inputs can't be pinned down (e.g. no `ts`)."""
+    if cache is None:
+        return None
+    if ckpt is not None and last_bar is None:
+        return None
+    ckpt_hash = _file_sha256(ckpt) if ckpt is not None else "-"
+    news_hash = hashlib.sha256(news_text.encode()).hexdigest()[:16] if news_text else "-"
+    return "|".join([symbol.upper(), backend, ckpt_hash, last_bar or "-", news_hash])
+
+
+def _cached(cache: ForecastCache | None, key: str | None, compute) -> dict | None:
+    if cache is not None and key is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return {**hit, "cache_hit": True}
+    f = compute()
+    if f is None or cache is None:
+        return f
+    if key is not None:
+        cache.put(key, f)
+    return {**f, "cache_hit": False}
+
+
 # ---- macro-contextual (global model; torch lazy) ---------------------------
 
 def _contextual_forecast(symbols, bars_dir, macro_path, ckpt_path, min_conf=0.1):
@@ -68,9 +204,8 @@ def _contextual_forecast(symbols, bars_dir, macro_path, ckpt_path, min_conf=0.1)
     import pandas as pd
     import torch
     from deepCommodity.model.contextual_transformer import (
-        ContextualConfig, apply_norm, build_model, predict, proba_to_forecast, regime_readout)
-    from deepCommodity.model.price_transformer import make_features
-    from tools.fetch_macro_features import MACRO_FEATURE_COLS
+        MACRO_FEATURE_COLS, ContextualConfig, apply_norm, build_model, predict, regime_readout)
+    from deepCommodity.model.price_transformer import CLASSES, forecast_codes, make_features
 
     ck = torch.load(ckpt_path, map_location="cpu", weights_only=False)
     cfg = ContextualConfig(**ck["config"])
@@ -97,10 +232,11 @@ def _contextual_forecast(symbols, bars_dir, macro_path, ckpt_path, min_conf=0.1)
 
     pxn, mxn = apply_norm(np.asarray(px_list, np.float32), np.asarray(mx_list, np.float32), ck["norm"])
     proba = predict(model, pxn, mxn, np.asarray(aid_list, np.int64))
+    (w_code, w_conf), (d_code, d_conf) = (forecast_codes(proba[h], min_conf) for h in ("weekly", "daily"))
     forecasts = []
     for i, sym in enumerate(syms_ok):
-        wd, wc = proba_to_forecast(proba["weekly"][i], min_conf)
-        dd, dc = proba_to_forecast(proba["daily"][i], min_conf)
+        wd, wc = CLASSES[w_code[i]], float(w_conf[i])
+        dd, dc = CLASSES[d_code[i]], float(d_conf[i])
         forecasts.append({
             "symbol": sym, "direction": wd, "confidence": round(wc, 3),
             "rationale": f"[contextual:{regime['regime']}] weekly={wd}/{wc:.2f} daily={dd}/{dc:.2f}",
@@ -109,20 +245,111 @@ def _contextual_forecast(symbols, bars_dir, macro_path, ckpt_path, min_conf=0.1)
     return forecasts, regime
 
 
+# ---- historical analogs (NumPy index; torch only for an encoder index) -----
+
+def _analog_forecast(symbols, bars_dir, macro_path, index_dir, min_conf=0.1, k=32):
+    """Per-symbol weekly+daily direction from the k nearest historical windows."""
+    import numpy as np
+    import pandas as pd
+    from deepCommodity.model.analog import load_analog
+    from deepCommodity.model.contextual_transformer import MACRO_FEATURE_COLS
+    from deepCommodity.model.price_transformer import CLASSES, forecast_codes, make_features
+
+    analog = load_analog(Path(index_dir))
+    price_seq, macro_seq = analog.meta["price_shape"][0], analog.meta["macro_shape"][0]
+    macro = pd.read_csv(macro_path, index_col="date", parse_dates=True)[MACRO_FEATURE_COLS]
+    macro_win = macro.tail(macro_seq).to_numpy()
+    px_list, syms_ok = [], []
+    for sym in symbols:
+        csv = Path(bars_dir) / f"{sym}.csv"
+        if not csv.exists():
+            continue
+        feats = make_features(pd.read_csv(csv))
+        if len(feats) < price_seq or len(macro_win) < macro_seq:
+            continue
+        px_list.append(feats[-price_seq:]); syms_ok.append(sym)
+    if not syms_ok:
+        return []
+
+    out = analog.predict(np.asarray(px_list, np.float32),
+                         np.repeat(macro_win[None], len(syms_ok), 0).astype(np.float32), k=k)
+    (w_code, w_conf), (d_code, d_conf) = (forecast_codes(out[h], min_conf) for h in ("weekly", "daily"))
+    forecasts = []
+    for i, sym in enumerate(syms_ok):
+        wd, wc = CLASSES[w_code[i]], float(w_conf[i])
+        dd, dc = CLASSES[d_code[i]], float(d_conf[i])
+        forecasts.append({
+            "symbol": sym, "direction": wd, "confidence": round(wc, 3),
+            "rationale": f"[analog k={int(out['n'][i])}] weekly={wd}/{wc:.2f} daily={dd}/{dc:.2f} "
+                         f"E[r_weekly]={out['r_weekly'][i]:+.2%}",
+            "horizons": {"weekly": {"direction": wd, "confidence": round(wc, 3),
+                                    "expected_return": round(float(out["r_weekly"][i]), 4)},
+                         "daily": {"direction": dd, "confidence": round(dc, 3),
+                                   "expected_return": round(float(out["r_daily"][i]), 4)}}})
+    return forecasts
+
+
+# ---- distilled student (NumPy only; never imports torch) -------------------
+
+def _student_forecast(symbols, bars_dir, student_path, min_conf=0.0) -> list[dict]:
+    """Every symbol's window through the student in one batch."""
+    import numpy as np
+    import pandas as pd
+    from deepCommodity.model.price_transformer import CLASSES, forecast_codes, make_features
+    from deepCommodity.model.student import load_student
+
+    student = load_student(Path(student_path))
+    windows, syms_ok = [], []
+    for sym in symbols:
+        csv = Path(bars_dir) / f"{sym}.csv"
+        if not csv.exists():
+            continue
+        feats = make_features(pd.read_csv(csv))
+        if len(feats) < student.seq_len:
+            continue
+        windows.append(feats[-student.seq_len:]); syms_ok.append(sym)
+    if not syms_ok:
+        return []
+    proba = student.predict_proba(np.asarray(windows))
+    codes, confs = forecast_codes(proba, min_conf)
+    out = []
+    for sym, pr, code, conf in zip(syms_ok, proba, codes, confs):
+        out.append({"symbol": sym, "direction": CLASSES[code], "confidence": round(float(conf), 3),
+                    "rationale": f"[student] proba=[{pr[0]:.2f}/{pr[1]:.2f}/{pr[2]:.2f}]"})
+    return out
+
+
 # ---- transformer specialists (torch lazy) ---------------------------------
 
+def _price_ckpt(symbol: str) -> Path | None:
+    """The symbol's own checkpoint, else the cross-asset price.global.pt."""
+    for path in (DATA_MODELS / f"{symbol.upper()}.pt", DATA_MODELS / "price.global.pt"):
+        if path.exists():
+            return path
+    return None
+
+
+_PRICE_MODELS: dict[tuple[Path, int], tuple] = {}
+_PRICE_MODELS_LOCK = threading.Lock()
+
+
 def _load_price_model(symbol: str):
-    path = DATA_MODELS / f"{symbol.upper()}.pt"
-    if not path.exists():
+    path = _price_ckpt(symbol)
+    if path is None:
         return None
-    import torch
-    from deepCommodity.model.price_transformer import TransformerConfig, build_model
-    ckpt = torch.load(path, map_location="cpu")
-    cfg = TransformerConfig(**ckpt["config"])
-    model = build_model(cfg)
-    model.load_state_dict(ckpt["state_dict"])
-    model.eval()
-    return model, cfg
+    # one deserialization per checkpoint per run: every symbol shares price.global.pt
+    key = (path, path.stat().st_mtime_ns)
+    with _PRICE_MODELS_LOCK:
+        if key not in _PRICE_MODELS:
+            import torch
+            from deepCommodity.model.price_transformer import TransformerConfig, build_model
+            ckpt = torch.load(path, map_location="cpu")
+            cfg = TransformerConfig(**ckpt["config"])
+            model = build_model(cfg)
+            model.load_state_dict(ckpt["state_dict"])
+            model.eval()
+            _PRICE_MODELS[key] = (model, cfg, ckpt.get("meta", {}).get("symbols", []))  # global: asset ids
+        return _PRICE_MODELS[key]
 
 
 def _load_orderflow_model(symbol: str):
@@ -139,40 +366,95 @@ def _load_orderflow_model(symbol: str):
     return model, cfg
 
 
-def _price_predict(symbol: str, bars_csv: Path) -> dict | None:
-    if not bars_csv.exists():
-        return None
-    loaded = _load_price_model(symbol)
-    if loaded is None:
+def _price_predict(symbol: str, bars_csv: Path,
+                   cache: ForecastCache | None = None) -> dict | None:
+    ckpt = _price_ckpt(symbol)
+    if not bars_csv.exists() or ckpt is None:
         return None
-    model, cfg = loaded
     import pandas as pd
+    df = pd.read_csv(bars_csv)
+    key = _cache_key(cache, symbol, "price", ckpt=ckpt, last_bar=_last_bar_ts(df))
+    return _cached(cache, key, lambda: _price_infer(symbol, df))
+
+
+def _price_infer(symbol: str, df) -> dict | None:
+    return _price_infer_many([(symbol, df)]).get(symbol)
+
+
+def _price_infer_many(items: list[tuple[str, object]]) -> dict[str, dict]:
+    """[(symbol, bars df)] sharing one checkpoint -> {symbol: forecast}, in one
+    batched predict_proba (with asset ids when the checkpoint is global)."""
+    loaded = _load_price_model(items[0][0]) if items else None
+    if loaded is None:
+        return {}
+    model, cfg, symbols = loaded
+    import numpy as np
     from deepCommodity.model.price_transformer import (
-        make_features, predict_proba, proba_to_forecast,
+        CLASSES, asset_ids, forecast_codes, make_features, predict_proba,
     )
-    df = pd.read_csv(bars_csv)
-    feats = make_features(df)
-    if len(feats) < cfg.seq_len:
-        return None
-    X = feats[-cfg.seq_len:][None, :, :]
-    proba = predict_proba(model, X)[0]
-    direction, conf = proba_to_forecast(proba, min_conf=0.0)
-    return {"symbol": symbol, "direction": direction, "confidence": round(conf, 3),
-            "rationale": f"[price] proba=[{proba[0]:.2f}/{proba[1]:.2f}/{proba[2]:.2f}]"}
+    syms, windows = [], []
+    for sym, df in items:
+        feats = make_features(df)
+        if len(feats) >= cfg.seq_len:
+            syms.append(sym)
+            windows.append(feats[-cfg.seq_len:])
+    if not syms:
+        return {}
+    aid = asset_ids(symbols, [s.upper() for s in syms]) if cfg.n_assets else None
+    proba = predict_proba(model, np.asarray(windows, dtype=np.float32), asset_id=aid)
+    codes, confs = forecast_codes(proba, 0.0)
+    return {sym: {"symbol": sym, "direction": CLASSES[c], "confidence": round(float(conf), 3),
+                  "rationale": f"[price] proba=[{pr[0]:.2f}/{pr[1]:.2f}/{pr[2]:.2f}]"}
+            for sym, pr, c, conf in zip(syms, proba, codes, confs)}
+
+
+def _price_predict_global(symbols: list[str], bars_dir: Path,
+                          cache: ForecastCache | None = None) -> dict[str, dict]:
+    """{symbol: forecast} for symbols served by price.global.pt: cache hits are
+    reused, the misses run through the global model together in one batch."""
+    import pandas as pd
+    ckpt = DATA_MODELS / "price.global.pt"
+    out, todo, keys = {}, [], {}
+    for sym in symbols:
+        csv = bars_dir / f"{sym}.csv"
+        if not csv.exists():
+            continue
+        df = pd.read_csv(csv)
+        keys[sym] = _cache_key(cache, sym, "price", ckpt=ckpt, last_bar=_last_bar_ts(df))
+        hit = cache.get(keys[sym]) if cache is not None and keys[sym] is not None else None
+        if hit is not None:
+            out[sym] = {**hit, "cache_hit": True}
+        else:
+            todo.append((sym, df))
+    for sym, f in _price_infer_many(todo).items():
+        out[sym] = _cached(cache, keys[sym], lambda f=f: f)
+    return out
 
 
-def _orderflow_predict(symbol: str, of_csv: Path) -> dict | None:
-    if not of_csv.exists():
+def _uses_global_price(symbol: str) -> bool:
+    path = _price_ckpt(symbol)
+    return path is not None and path.name == "price.global.pt"
+
+
+def _orderflow_predict(symbol: str, of_csv: Path,
+                       cache: ForecastCache | None = None) -> dict | None:
+    ckpt = DATA_MODELS / f"{symbol.upper()}.orderflow.pt"
+    if not of_csv.exists() or not ckpt.exists():
         return None
+    import pandas as pd
+    df = pd.read_csv(of_csv)
+    key = _cache_key(cache, symbol, "orderflow", ckpt=ckpt, last_bar=_last_bar_ts(df))
+    return _cached(cache, key, lambda: _orderflow_infer(symbol, df))
+
+
+def _orderflow_infer(symbol: str, df) -> dict | None:
     loaded = _load_orderflow_model(symbol)
     if loaded is None:
         return None
     model, cfg = loaded
-    import pandas as pd
     from deepCommodity.model.orderflow_transformer import (
         make_features, predict_proba, proba_to_forecast,
     )
-    df = pd.read_csv(of_csv)
     feats = make_features(df)
     if len(feats) < cfg.seq_len:
         return None
@@ -185,7 +467,27 @@ def _orderflow_predict(symbol: str, of_csv: Path) -> dict | None:
 
 # ---- news -----------------------------------------------------------------
 
-def _news_predict(symbol: str, news_text: str) -> dict:
+def _news_predict(symbol: str, news_text: str,
+                  cache: ForecastCache | None = None) -> dict:
+    backend_name = (os.getenv("SENTIMENT_BACKEND") or "rule-based").lower()
+    model_path = os.getenv("SENTIMENT_MODEL_PATH")
+    # scorer version: sklearn keys on its model file's hash (ckpt), the
+    # rule-based scorer on its lexicon + tokenizer, HF on the model id
+    ckpt = Path(model_path) if backend_name == "sklearn" and model_path else None
+    version = "-"
+    if backend_name in ("rule-based", "rules", "lexicon"):
+        from deepCommodity.model.news_model import LEXICON_VERSION
+        version = LEXICON_VERSION
+    elif backend_name in ("huggingface", "hf", "finbert"):
+        version = os.getenv("SENTIMENT_HF_MODEL", "ProsusAI/finbert")
+    key = None
+    if news_text and (ckpt is None or ckpt.exists()):
+        key = _cache_key(cache, symbol, f"news/{backend_name}@{version}", ckpt=ckpt,
+                         last_bar="-" if ckpt else None, news_text=news_text)
+    return _cached(cache, key, lambda: _news_score(symbol, news_text))
+
+
+def _news_score(symbol: str, news_text: str) -> dict:
     from deepCommodity.model.news_model import get_sentiment_backend
     backend = get_sentiment_backend()
     s = backend.score(news_text or "")
@@ -213,6 +515,44 @@ def _clamp_confidence(value) -> float:
     return max(0.0, min(1.0, c))
 
 
+def _api_windows(symbol: str, bars_dir: Path, of_dir: Path, encoding: str = "packed") -> dict:
+    """Local bar / order-flow CSVs -> `bars` / `orderflow` request fields.
+
+    "packed" ships each window as one base64 float32 block (serving/wire.py);
+    "json" falls back to per-column float lists for servers that predate it.
+    """
+    from serving.wire import BAR_COLUMNS, ORDERFLOW_COLUMNS, encode_window
+    out: dict = {}
+    for field, path, cols in (("bars", bars_dir / f"{symbol}.csv", BAR_COLUMNS),
+                              ("orderflow", of_dir / f"{symbol}.csv", ORDERFLOW_COLUMNS)):
+        if not path.exists():
+            continue
+        import pandas as pd
+        df = pd.read_csv(path)
+        if not set(cols) <= set(df.columns) or len(df) < 2:
+            continue
+        if encoding == "packed":
+            out[field] = encode_window(df, cols, max_rows=API_WINDOW_ROWS)
+        else:
+            tail = df[list(cols)].tail(API_WINDOW_ROWS)
+            out[field] = {c: tail[c].astype(float).tolist() for c in cols}
+    return out
+
+
+def _api_macro(macro_path: str, rows: int = 256) -> dict:
+    """Macro panel -> the `macro` request field (for --api-model contextual)."""
+    import pandas as pd
+    from deepCommodity.model.contextual_transformer import MACRO_FEATURE_COLS
+    path = Path(macro_path)
+    if not path.exists():
+        return {}
+    macro = pd.read_csv(path, index_col="date")[MACRO_FEATURE_COLS].tail(rows)
+    if macro.empty:
+        return {}
+    return {"macro": {"date": str(macro.index[-1]),
+                      "rows": macro.astype(float).to_numpy().tolist()}}
+
+
 def _api_predict(symbol: str, payload_extras: dict, api_url: str, api_key: str | None,
                  model: str = "ensemble", timeout: float = 20.0) -> dict | None:
     """POST /forecast on the deepCommodity inference service. Returns None on
@@ -242,7 +582,7 @@ def _api_predict(symbol: str, payload_extras: dict, api_url: str, api_key: str |
 
 # ---- ensemble -------------------------------------------------------------
 
-def _ensemble(predictions: list[dict]) -> dict | None:
+def _ensemble(predictions: list[dict], dropped: list[str] | None = None) -> dict | None:
     if not predictions:
         return None
     sym = predictions[0]["symbol"]
@@ -255,6 +595,8 @@ def _ensemble(predictions: list[dict]) -> dict | None:
         score += s * c
         weight += c
         rationales.append(p["rationale"])
+    if dropped:
+        rationales.append("dropped: " + ", ".join(dropped))
     avg_conf = weight / len(predictions) if predictions else 0.0
     if score > 0.15 and avg_conf > 0.3:
         d = "long"
@@ -262,8 +604,122 @@ def _ensemble(predictions: list[dict]) -> dict | None:
         d = "short"
     else:
         d = "flat"
-    return {"symbol": sym, "direction": d, "confidence": round(min(1.0, abs(score)), 3),
-            "rationale": "[ensemble] " + " | ".join(rationales)}
+    out = {"symbol": sym, "direction": d, "confidence": round(min(1.0, abs(score)), 3),
+           "rationale": "[ensemble] " + " | ".join(rationales)}
+    cached = [p["cache_hit"] for p in predictions if "cache_hit" in p]
+    if cached:
+        out["cache_hit"] = all(cached)   # a hit only if every model-backed vote was served cached
+    return out
+
+
+def _start_daemon_jobs(calls: list, workers: int) -> list[Future]:
+    """Run `calls` on `workers` daemon threads -> one Future each.
+
+    Not a ThreadPoolExecutor: its workers are joined at interpreter exit, so a
+    backend past its deadline would still hold the CLI open until it finished.
+    Cancelling a Future that hasn't started yet skips it.
+    """
+    todo: queue.SimpleQueue = queue.SimpleQueue()
+    futures = []
+    for call in calls:
+        f = Future()
+        futures.append(f)
+        todo.put((f, call))
+
+    def work():
+        while True:
+            try:
+                f, call = todo.get_nowait()
+            except queue.Empty:
+                return
+            if not f.set_running_or_notify_cancel():
+                continue
+            try:
+                f.set_result(call())
+            except BaseException as e:  # noqa: BLE001
+                f.set_exception(e)
+
+    for _ in range(max(1, min(workers, len(calls)))):
+        threading.Thread(target=work, name="dc-ensemble", daemon=True).start()
+    return futures
+
+
+def _ensemble_pass(symbols: list[str], symbols_data: dict[str, dict], bars_dir: Path,
+                   of_dir: Path, news_text: str, cache: ForecastCache | None = None,
+                   deadlines: dict[str, float] | None = None,
+                   workers: int | None = None) -> list[dict]:
+    """Ensemble over the whole universe with backend x symbol work on a thread pool.
+
+    torch inference releases the GIL, so wall-clock approaches the slowest single
+    backend rather than the sum. Each backend gets its own budget measured from the
+    start of the pass; a miss (or an exception) drops that vote and is named in the
+    rationale instead of stalling or failing the whole pass. Late backends run on
+    daemon threads and are abandoned: they don't delay exit, and their results
+    (and cache entries) are discarded. Symbols served by price.global.pt share one
+    batched price job (key (None, "price")) instead of one job each.
+    """
+    deadlines = {**ENSEMBLE_DEADLINES, **(deadlines or {})}
+    jobs = {
+        "price": lambda sym: _price_predict(sym, bars_dir / f"{sym}.csv", cache),
+        "orderflow": lambda sym: _orderflow_predict(sym, of_dir / f"{sym}.csv", cache),
+    }
+    if news_text:
+        jobs["news"] = lambda sym: _news_predict(sym, news_text, cache)
+
+    batched = {sym for sym in symbols if _uses_global_price(sym)}
+    keys = [(sym, name) for sym in symbols for name in jobs
+            if not (name == "price" and sym in batched)]
+    calls = [partial(jobs[name], sym) for sym, name in keys]
+    if batched:
+        keys.append((None, "price"))
+        calls.append(partial(_price_predict_global, [s for s in symbols if s in batched],
+                             bars_dir, cache))
+    t0 = time.monotonic()
+    futures = dict(zip(keys, _start_daemon_jobs(calls, workers or min(8, (os.cpu_count() or 1) * 2))))
+    out = []
+    try:
+        for sym in symbols:
+            d = symbols_data.get(sym, {})
+            direction, conf, rat = _signal(d.get("pct_change_24h"), d.get("pct_change_7d"))
+            preds = [{"symbol": sym, "direction": direction, "confidence": conf,
+                      "rationale": f"[rule-based] {rat}"}]
+            dropped = []
+            for name in jobs:
+                budget = deadlines.get(name, 30.0)
+                own = (sym, name) in futures
+                try:
+                    f = futures[(sym, name) if own else (None, name)].result(
+                        timeout=max(0.0, t0 + budget - time.monotonic()))
+                    if not own:
+                        f = f.get(sym)
+                except FutureTimeout:
+                    dropped.append(f"{name}(>{budget:g}s)")
+                    continue
+                except Exception as e:  # noqa: BLE001
+                    dropped.append(f"{name}(error: {e})")
+                    continue
+                if f:
+                    preds.append(f)
+            agg = _ensemble(preds, dropped)
+            if agg:
+                out.append(agg)
+    finally:
+        # late backends are abandoned, not awaited; queued ones never start
+        for f in futures.values():
+            f.cancel()
+    return out
+
+
+def _parse_deadlines(specs: list[str]) -> dict[str, float]:
+    """['price=5', 'news=2.5'] -> {'price': 5.0, 'news': 2.5}."""
+    out = {}
+    for spec in specs:
+        name, _, sec = spec.partition("=")
+        if name.strip() not in ENSEMBLE_DEADLINES or not sec:
+            raise SystemExit(f"bad --deadline {spec!r}; expected one of "
+                             f"{sorted(ENSEMBLE_DEADLINES)} as name=seconds")
+        out[name.strip()] = float(sec)
+    return out
 
 
 # ---- I/O ------------------------------------------------------------------
@@ -296,11 +752,18 @@ def main() -> None:
                    help="optional override of symbols to forecast (else from --input)")
     p.add_argument("--model", default="rule-based",
                    choices=["rule-based", "price", "orderflow", "news",
-                            "fused", "ensemble", "api", "contextual"])
+                            "fused", "ensemble", "api", "contextual", "analog", "student"])
     p.add_argument("--macro", default=str(ROOT / "data" / "macro" / "features.csv"),
-                   help="macro panel for --model contextual")
+                   help="macro panel for --model contextual / analog "
+                        "(and --model api --api-model contextual)")
     p.add_argument("--ckpt", default=str(ROOT / "data" / "models" / "contextual.pt"),
                    help="contextual checkpoint for --model contextual")
+    p.add_argument("--analog-index", default=str(ROOT / "data" / "models" / "analog"),
+                   help="index dir for --model analog (tools/build_analog_index.py)")
+    p.add_argument("--analog-k", type=int, default=32,
+                   help="--model analog: neighbours per forecast")
+    p.add_argument("--student", default=str(ROOT / "data" / "models" / "price.student.npz"),
+                   help="student for --model student (tools/distill_student.py)")
     p.add_argument("--min-conf", type=float, default=0.1)
     p.add_argument("--out", help="also write the full payload (incl. regime) here as JSON")
     p.add_argument("--bars-dir", default=str(ROOT / "data" / "bars"))
@@ -312,6 +775,20 @@ def main() -> None:
                    help="X-API-Key for the inference service (or DC_API_KEY env)")
     p.add_argument("--api-model", default="ensemble",
                    help="model param to send when --model=api (default: ensemble)")
+    p.add_argument("--api-encoding", choices=["packed", "json"], default="packed",
+                   help="how --model=api ships bar/order-flow windows (default: packed float32)")
+    p.add_argument("--no-cache", action="store_true",
+                   help="always recompute model forecasts (skip the on-disk cache)")
+    p.add_argument("--cache-path", default=os.getenv(DC_FORECAST_CACHE_ENV, str(DEFAULT_CACHE_PATH)),
+                   help="forecast cache file (or DC_FORECAST_CACHE env)")
+    p.add_argument("--cache-ttl", type=float, default=3600.0,
+                   help="seconds a cached forecast stays valid (default: one hourly bar)")
+    p.add_argument("--cache-max", type=int, default=512,
+                   help="max cached forecasts; least-recently-used are evicted first")
+    p.add_argument("--deadline", action="append", default=[],
+                   help="per-backend ensemble budget as name=seconds (repeatable), e.g. price=5")
+    p.add_argument("--workers", type=int, default=None,
+                   help="ensemble thread-pool size (default: min(8, 2*cpus))")
     args = p.parse_args()
 
     symbols_data = _load_inputs(args.input) if args.input else {}
@@ -327,6 +804,8 @@ def main() -> None:
         news_text = json.loads(_safe_input_path(args.news_input).read_text()).get("digest", "")
 
     forecasts: list[dict] = []
+    cache = None if args.no_cache else ForecastCache(
+        Path(args.cache_path), ttl_sec=args.cache_ttl, max_entries=args.cache_max)
     bars_dir = Path(args.bars_dir)
     of_dir = Path(args.orderflow_dir)
 
@@ -342,52 +821,69 @@ def main() -> None:
             Path(args.out).write_text(json.dumps(payload, indent=2))
         return
 
-    for sym in wanted:
-        if args.model == "rule-based":
-            d = symbols_data.get(sym, {})
-            direction, conf, rat = _signal(d.get("pct_change_24h"), d.get("pct_change_7d"))
-            forecasts.append({"symbol": sym, "direction": direction,
-                              "confidence": conf, "rationale": f"[rule-based] {rat}"})
-            continue
-        if args.model == "price":
-            f = _price_predict(sym, bars_dir / f"{sym}.csv")
-            if f: forecasts.append(f)
-            continue
-        if args.model == "orderflow":
-            f = _orderflow_predict(sym, of_dir / f"{sym}.csv")
-            if f: forecasts.append(f)
-            continue
-        if args.model == "news":
-            forecasts.append(_news_predict(sym, news_text))
-            continue
-        if args.model == "api":
-            if not args.api_url:
-                sys.exit("--model api requires --api-url or DC_API_URL env")
-            d = symbols_data.get(sym, {})
-            extras = {
-                "pct_change_24h": d.get("pct_change_24h"),
-                "pct_change_7d": d.get("pct_change_7d"),
-                "news_text": news_text or None,
-            }
-            f = _api_predict(sym, extras, args.api_url, args.api_key,
-                             model=args.api_model)
-            if f: forecasts.append(f)
-            continue
-        if args.model in ("fused", "ensemble"):
-            preds = []
-            d = symbols_data.get(sym, {})
-            direction, conf, rat = _signal(d.get("pct_change_24h"), d.get("pct_change_7d"))
-            preds.append({"symbol": sym, "direction": direction, "confidence": conf,
-                          "rationale": f"[rule-based] {rat}"})
-            f = _price_predict(sym, bars_dir / f"{sym}.csv")
-            if f: preds.append(f)
-            f = _orderflow_predict(sym, of_dir / f"{sym}.csv")
-            if f: preds.append(f)
-            if news_text:
-                preds.append(_news_predict(sym, news_text))
-            agg = _ensemble(preds)
-            if agg: forecasts.append(agg)
+    if args.model == "analog":
+        forecasts = _analog_forecast(wanted, bars_dir, args.macro, args.analog_index,
+                                     args.min_conf, args.analog_k)
+        payload = {
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "model": "analog", "forecasts": forecasts,
+        }
+        print(json.dumps(payload, indent=2))
+        if args.out:
+            Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+            Path(args.out).write_text(json.dumps(payload, indent=2))
+        return
+
+    # one macro window per pass; the server encodes it once for every symbol
+    api_macro = _api_macro(args.macro) if args.model == "api" and args.api_model == "contextual" else {}
 
+    if args.model == "student":
+        forecasts = _student_forecast(wanted, bars_dir, args.student, args.min_conf)
+    elif args.model in ("fused", "ensemble"):
+        forecasts = _ensemble_pass(wanted, symbols_data, bars_dir, of_dir, news_text, cache,
+                                   _parse_deadlines(args.deadline), args.workers)
+    else:
+        global_price = {}
+        if args.model == "price":
+            global_price = _price_predict_global([s for s in wanted if _uses_global_price(s)],
+                                                 bars_dir, cache)
+        for sym in wanted:
+            if args.model == "rule-based":
+                d = symbols_data.get(sym, {})
+                direction, conf, rat = _signal(d.get("pct_change_24h"), d.get("pct_change_7d"))
+                forecasts.append({"symbol": sym, "direction": direction,
+                                  "confidence": conf, "rationale": f"[rule-based] {rat}"})
+                continue
+            if args.model == "price":
+                f = (global_price.get(sym) if _uses_global_price(sym)
+                     else _price_predict(sym, bars_dir / f"{sym}.csv", cache))
+                if f: forecasts.append(f)
+                continue
+            if args.model == "orderflow":
+                f = _orderflow_predict(sym, of_dir / f"{sym}.csv", cache)
+                if f: forecasts.append(f)
+                continue
+            if args.model == "news":
+                forecasts.append(_news_predict(sym, news_text, cache))
+                continue
+            if args.model == "api":
+                if not args.api_url:
+                    sys.exit("--model api requires --api-url or DC_API_URL env")
+                d = symbols_data.get(sym, {})
+                extras = {
+                    "pct_change_24h": d.get("pct_change_24h"),
+                    "pct_change_7d": d.get("pct_change_7d"),
+                    "news_text": news_text or None,
+                    **_api_windows(sym, bars_dir, of_dir, args.api_encoding),
+                    **api_macro,
+                }
+                f = _api_predict(sym, extras, args.api_url, args.api_key,
+                                 model=args.api_model)
+                if f: forecasts.append(f)
+                continue
+
+    if cache is not None:
+        cache.flush()
     print(json.dumps({
         "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
         "model": args.model,
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""Featurize + label per-second order-flow tapes into training shards.
+
+Reads data/orderflow/<SYMBOL>.csv in bounded blocks and writes
+<out-dir>/<SYMBOL>/shard_NNNNN.npz + manifest.json. Memory stays flat, so a
+multi-day tape can be prepared on a small box; train on the result with
+tools/train_orderflow_transformer.py --shards-dir.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from deepCommodity.model.orderflow_shards import read_tape, write_shards  # noqa: E402
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--orderflow-dir", default=str(ROOT / "data" / "orderflow"))
+    p.add_argument("--out-dir", default=str(ROOT / "data" / "orderflow_shards"))
+    p.add_argument("--symbols", default="",
+                   help="comma-sep filter; default = all CSVs in orderflow-dir")
+    p.add_argument("--horizon-sec", type=int, default=60)
+    p.add_argument("--chunk-rows", type=int, default=100_000,
+                   help="tape rows read per block")
+    p.add_argument("--shard-rows", type=int, default=1 << 20,
+                   help="labelled rows per shard file")
+    args = p.parse_args()
+
+    src = Path(args.orderflow_dir)
+    files = sorted(src.glob("*.csv"))
+    if args.symbols:
+        wanted = {s.strip().upper() for s in args.symbols.split(",")}
+        files = [f for f in files if f.stem.upper() in wanted]
+    if not files:
+        sys.exit(f"no CSVs in {src}")
+
+    summary = {}
+    for f in files:
+        sym = f.stem.upper()
+        out = Path(args.out_dir) / sym
+        m = write_shards(read_tape(f, args.chunk_rows), out, horizon_sec=args.horizon_sec,
+                         shard_rows=args.shard_rows, symbol=sym)
+        summary[sym] = {"tape_rows": m["tape_rows"], "rows": m["rows"],
+                        "shards": len(m["shards"]), "dir": str(out)}
+        print(f"  {sym}: {m['tape_rows']} s -> {m['rows']} labelled rows "
+              f"in {len(m['shards'])} shards -> {out}", file=sys.stderr)
+
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,17 @@
 
 Mirrors tools/train_price_transformer.py for the orderflow modality.
 Saves checkpoints to <out-dir>/<SYMBOL>.orderflow.pt
+
+Long tapes: prepare them with tools/prepare_orderflow_shards.py, then pass
+--shards-dir. Training then reads the shard rows and builds windows as a
+zero-copy view instead of windowing the whole CSV in memory.
 """
 from __future__ import annotations
 
 import argparse
 import json
 import sys
+from dataclasses import replace
 from pathlib import Path
 
 import pandas as pd
@@ -28,6 +33,17 @@ def main() -> None:
     p.add_argument("--epochs", type=int, default=20)
     p.add_argument("--batch-size", type=int, default=128)
     p.add_argument("--lr", type=float, default=3e-4)
+    p.add_argument("--shards-dir", default="",
+                   help="train from tools/prepare_orderflow_shards.py output "
+                        "(<shards-dir>/<SYMBOL>/) instead of --orderflow-dir CSVs")
+    p.add_argument("--patch-size", type=int, default=1,
+                   help="seconds per token (e.g. 10); cuts encoder FLOPs ~patch_size-fold "
+                        "and makes 30-60 min --seq-len affordable")
+    p.add_argument("--causal", action="store_true",
+                   help="train the causal variant (KV-cached step() for streaming inference)")
+    p.add_argument("--compare", action="store_true",
+                   help="with --causal: also train the bidirectional model on the same "
+                        "windows and report its accuracy alongside")
     args = p.parse_args()
 
     try:
@@ -35,6 +51,7 @@ def main() -> None:
     except ImportError:
         sys.exit("torch not installed; pip install torch")
 
+    from deepCommodity.model.orderflow_shards import MANIFEST, load_shards  # noqa: E402
     from deepCommodity.model.orderflow_transformer import (  # noqa: E402
         OrderflowConfig,
         TrainConfig,
@@ -45,31 +62,46 @@ def main() -> None:
         windowize,
     )
 
-    src = Path(args.orderflow_dir)
+    src = Path(args.shards_dir or args.orderflow_dir)
     dst = Path(args.out_dir); dst.mkdir(parents=True, exist_ok=True)
-    files = sorted(src.glob("*.csv"))
+    if args.shards_dir:
+        files = sorted(d for d in src.iterdir() if (d / MANIFEST).exists())
+    else:
+        files = sorted(src.glob("*.csv"))
     if args.symbols:
         wanted = {s.strip().upper() for s in args.symbols.split(",")}
         files = [f for f in files if f.stem.upper() in wanted]
     if not files:
-        sys.exit(f"no CSVs in {src}")
+        sys.exit(f"no {'shard dirs' if args.shards_dir else 'CSVs'} in {src}")
 
     summary = {}
     for f in files:
         sym = f.stem.upper()
-        df = pd.read_csv(f)
-        feats = make_features(df)
-        labels = make_labels(df, horizon_sec=args.horizon_sec)
-        X, y = windowize(feats, labels, seq_len=args.seq_len, horizon=args.horizon_sec)
+        if args.shards_dir:
+            horizon = json.loads((f / MANIFEST).read_text())["horizon_sec"]
+            if horizon != args.horizon_sec:
+                sys.exit(f"{f} was labelled with horizon_sec={horizon}, not {args.horizon_sec}")
+            X, y = load_shards(f, seq_len=args.seq_len)
+        else:
+            df = pd.read_csv(f)
+            feats = make_features(df)
+            labels = make_labels(df, horizon_sec=args.horizon_sec)
+            X, y = windowize(feats, labels, seq_len=args.seq_len, horizon=args.horizon_sec)
         if len(X) < 200:
             print(f"  {sym}: skipped — only {len(X)} windows", file=sys.stderr)
             summary[sym] = {"status": "skipped", "n_windows": len(X)}
             continue
 
-        cfg = OrderflowConfig(seq_len=args.seq_len, horizon=args.horizon_sec)
+        cfg = OrderflowConfig(seq_len=args.seq_len, horizon=args.horizon_sec, causal=args.causal,
+                              patch_size=args.patch_size)
+        train_cfg = TrainConfig(epochs=args.epochs, batch_size=args.batch_size, lr=args.lr)
         model = build_model(cfg)
-        hist = fit(model, X, y, TrainConfig(epochs=args.epochs,
-                                            batch_size=args.batch_size, lr=args.lr))
+        hist = fit(model, X, y, train_cfg)
+        baseline = None
+        if args.causal and args.compare:
+            base = fit(build_model(replace(cfg, causal=False)), X, y, train_cfg)
+            baseline = {"best_val_loss": round(base["best_val_loss"], 4),
+                        "final_val_acc": round(base["val_acc"][-1], 4) if base["val_acc"] else None}
 
         ckpt = dst / f"{sym}.orderflow.pt"
         torch.save({"state_dict": model.state_dict(),
@@ -79,8 +111,12 @@ def main() -> None:
             "status": "trained", "n_windows": len(X),
             "best_val_loss": round(hist["best_val_loss"], 4),
             "final_val_acc": round(hist["val_acc"][-1], 4) if hist["val_acc"] else None,
+            "causal": args.causal,
+            "patch_size": args.patch_size,
             "checkpoint": str(ckpt),
         }
+        if baseline:
+            summary[sym]["bidirectional"] = baseline
         print(f"  {sym}: val_loss={hist['best_val_loss']:.4f} -> {ckpt}", file=sys.stderr)
 
     print(json.dumps(summary, indent=2))
@@ -1,13 +1,17 @@
 #!/usr/bin/env python
 """Train a price transformer per symbol on bars in data/bars/<SYMBOL>.csv.
 
-Saves checkpoints to data/models/<SYMBOL>.pt.
+Saves checkpoints to data/models/<SYMBOL>.pt. With --global, trains one
+cross-asset model on the pooled windows of every symbol and saves it to
+data/models/price.global.pt. Serving uses that model for any symbol without
+its own checkpoint, including symbols it was never trained on.
 """
 from __future__ import annotations
 
 import argparse
 import json
 import sys
+from dataclasses import replace
 from pathlib import Path
 
 import pandas as pd
@@ -27,10 +31,22 @@ def main() -> None:
     p.add_argument("--epochs", type=int, default=20)
     p.add_argument("--batch-size", type=int, default=64)
     p.add_argument("--lr", type=float, default=3e-4)
+    p.add_argument("--causal", action="store_true",
+                   help="train the causal variant (KV-cached step() for streaming inference)")
+    p.add_argument("--compare", action="store_true",
+                   help="with --causal: also train the bidirectional model on the same "
+                        "windows and report its accuracy alongside")
+    p.add_argument("--global", dest="global_model", action="store_true",
+                   help="train one cross-asset model (asset embedding) on all symbols' "
+                        "windows -> price.global.pt")
+    p.add_argument("--asset-dropout", type=float, default=0.1,
+                   help="--global: rate at which asset ids train the unknown-asset slot")
     args = p.parse_args()
+    if args.global_model and args.causal:
+        sys.exit("--global and --causal can't be combined")
 
     try:
-        import torch  # noqa: F401
+        import torch
     except ImportError:
         sys.exit("torch not installed; pip install torch (CPU build is fine)")
 
@@ -54,6 +70,7 @@ def main() -> None:
         sys.exit(f"no CSVs in {bars_dir}")
 
     summary = {}
+    pooled = {}
     for f in files:
         sym = f.stem.upper()
         df = pd.read_csv(f)
@@ -64,13 +81,20 @@ def main() -> None:
             print(f"  {sym}: skipped — only {len(X)} windows", file=sys.stderr)
             summary[sym] = {"status": "skipped", "n_windows": len(X)}
             continue
+        if args.global_model:
+            pooled[sym] = (X, y)
+            continue
 
-        cfg = TransformerConfig(seq_len=args.seq_len, horizon=args.horizon)
+        cfg = TransformerConfig(seq_len=args.seq_len, horizon=args.horizon, causal=args.causal)
+        train_cfg = TrainConfig(epochs=args.epochs, batch_size=args.batch_size, lr=args.lr)
         model = build_model(cfg)
-        hist = fit(model, X, y, TrainConfig(epochs=args.epochs,
-                                            batch_size=args.batch_size, lr=args.lr))
+        hist = fit(model, X, y, train_cfg)
+        baseline = None
+        if args.causal and args.compare:
+            base = fit(build_model(replace(cfg, causal=False)), X, y, train_cfg)
+            baseline = {"best_val_loss": round(base["best_val_loss"], 4),
+                        "final_val_acc": round(base["val_acc"][-1], 4) if base["val_acc"] else None}
 
-        import torch
         ckpt_path = out_dir / f"{sym}.pt"
         torch.save({"state_dict": model.state_dict(),
                     "config": cfg.__dict__,
@@ -80,13 +104,50 @@ def main() -> None:
             "n_windows": len(X),
             "best_val_loss": round(hist["best_val_loss"], 4),
             "final_val_acc": round(hist["val_acc"][-1], 4) if hist["val_acc"] else None,
+            "causal": args.causal,
             "checkpoint": str(ckpt_path),
         }
+        if baseline:
+            summary[sym]["bidirectional"] = baseline
         print(f"  {sym}: val_loss={hist['best_val_loss']:.4f} "
               f"acc={hist['val_acc'][-1]:.3f} -> {ckpt_path}", file=sys.stderr)
 
+    if pooled:
+        summary["GLOBAL"] = _train_global(args, pooled, out_dir)
     print(json.dumps(summary, indent=2))
 
 
+def _train_global(args, pooled: dict, out_dir: Path) -> dict:
+    """One model over every symbol's windows; per-symbol val accuracy in the summary."""
+    import torch
+    from deepCommodity.model.price_transformer import (
+        TrainConfig, TransformerConfig, build_model, fit, pool_windows, predict_proba,
+    )
+    train_cfg = TrainConfig(epochs=args.epochs, batch_size=args.batch_size, lr=args.lr)
+    X, y, aid, symbols, n_val = pool_windows(pooled, train_cfg.val_frac)
+    cfg = TransformerConfig(seq_len=args.seq_len, horizon=args.horizon,
+                            n_assets=len(symbols) + 1, asset_dropout=args.asset_dropout)
+    model = build_model(cfg)
+    hist = fit(model, X, y, train_cfg, asset_id=aid, n_val=n_val)
+
+    cut = len(X) - n_val
+    hit = predict_proba(model, X[cut:], asset_id=aid[cut:]).argmax(-1) == y[cut:]
+    per_symbol = {sym: round(float(hit[aid[cut:] == i + 1].mean()), 4)
+                  for i, sym in enumerate(symbols)}
+    ckpt_path = out_dir / "price.global.pt"
+    torch.save({"state_dict": model.state_dict(), "config": cfg.__dict__,
+                "meta": {"symbols": symbols}, "history": hist}, ckpt_path)
+    print(f"  GLOBAL ({len(symbols)} symbols, {len(X)} windows): "
+          f"val_loss={hist['best_val_loss']:.4f} acc={hist['val_acc'][-1]:.3f} -> {ckpt_path}",
+          file=sys.stderr)
+    return {
+        "status": "trained", "symbols": symbols, "n_windows": int(len(X)),
+        "best_val_loss": round(hist["best_val_loss"], 4),
+        "final_val_acc": round(hist["val_acc"][-1], 4) if hist["val_acc"] else None,
+        "val_acc_by_symbol": per_symbol,
+        "checkpoint": str(ckpt_path),
+    }
+
+
 if __name__ == "__main__":
     main()